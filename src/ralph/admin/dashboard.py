@@ -0,0 +1,293 @@
+# -*- coding: utf-8 -*-
+"""
+Counters displayed on dashboard - number of objects of models and available
+and used space (in U) of data centers.
+
+Counters are stored in cache and kept up to date by signals (they're
+incremented or decremented when objects are created, changed or deleted), so
+dashboard could read them without querying (large) tables. Missing counters
+are calculated when they're read.
+
+Changes made without signals (ex. queryset update or bulk create) or rolled
+back are not counted, so counters are reconciled (calculated from database)
+when they expire (after `DASHBOARD_COUNTERS_TIMEOUT` seconds) or by
+`reconcile_dashboard_counters` command.
+
+Counters are seen (and updated) by all processes only when cache is shared
+between them (ex. Redis), so with process local cache (default) they expire
+after `PROCESS_LOCAL_CACHE_TIMEOUT` seconds.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ralph.accounts.models import RalphUser
+from ralph.assets.models.assets import AssetModel
+from ralph.back_office.models import BackOfficeAsset
+from ralph.data_center.models import (
+    DataCenter,
+    DataCenterAsset,
+    Rack,
+    RackAccessory,
+    ServerRoom
+)
+from ralph.domains.models.domains import Domain
+from ralph.helpers import get_cache_timeout
+from ralph.lib.state_tracker import StateTracker
+from ralph.licences.models import Licence
+from ralph.supports.models import Support
+
+SUMMARY_MODELS = [
+    DataCenterAsset, BackOfficeAsset, Licence, Support, Domain, RalphUser,
+]
+COUNT_KEY = 'dashboard_count_{}'
+AVAILABLE_SPACE_KEY = 'dashboard_available_space_{}'
+USED_SPACE_KEY = 'dashboard_used_space_{}'
+# height of devices could be fractional, but cache increments have to be
+# integers - used space is stored in hundredths of U
+SPACE_SCALE = 100
+
+# fields of models affecting space of data centers
+SPACE_FIELDS = {
+    DataCenterAsset: ('rack_id', 'model_id'),
+    RackAccessory: ('rack_id',),
+    Rack: ('server_room_id', 'max_u_height', 'require_position'),
+    ServerRoom: ('data_center_id',),
+    AssetModel: ('height_of_device', 'has_parent'),
+}
+
+
+def _set_many(values):
+    cache.set_many(
+        values, get_cache_timeout(settings.DASHBOARD_COUNTERS_TIMEOUT)
+    )
+
+
+def _incr(key, delta):
+    # missing counter is calculated when it's read
+    try:
+        cache.incr(key, delta)
+    except ValueError:
+        pass
+
+
+def _get_count_key(model):
+    return COUNT_KEY.format('{}.{}'.format(
+        model._meta.app_label, model._meta.model_name
+    ))
+
+
+def _calculate_counts(models):
+    return {_get_count_key(model): model.objects.count() for model in models}
+
+
+def get_counts(models=SUMMARY_MODELS):
+    """
+    Return dict with model as a key and (cached) number of its objects as a
+    value.
+    """
+    keys = {model: _get_count_key(model) for model in models}
+    counts = cache.get_many(keys.values())
+    missing = [model for model, key in keys.items() if key not in counts]
+    if missing:
+        calculated = _calculate_counts(missing)
+        _set_many(calculated)
+        counts.update(calculated)
+    return {model: counts[key] for model, key in keys.items()}
+
+
+def _get_space_keys(data_center_id):
+    return (
+        AVAILABLE_SPACE_KEY.format(data_center_id),
+        USED_SPACE_KEY.format(data_center_id),
+    )
+
+
+def _calculate_space(data_center_ids):
+    available = Counter(dict(Rack.objects.filter(
+        server_room__data_center_id__in=data_center_ids,
+        require_position=True,
+    ).values_list('server_room__data_center_id').annotate(
+        s=Sum('max_u_height')
+    )))
+    used_by_accessories = Counter(dict(RackAccessory.objects.filter(
+        rack__server_room__data_center_id__in=data_center_ids,
+    ).values_list('rack__server_room__data_center_id').annotate(
+        s=Count('rack')
+    )))
+    used_by_assets = Counter(dict(DataCenterAsset.objects.filter(
+        rack__server_room__data_center_id__in=data_center_ids,
+        model__has_parent=False,
+        rack__require_position=True,
+    ).values_list('rack__server_room__data_center_id').annotate(
+        s=Sum('model__height_of_device')
+    )))
+    space = {}
+    for data_center_id in data_center_ids:
+        available_key, used_key = _get_space_keys(data_center_id)
+        space[available_key] = available[data_center_id] or 0
+        space[used_key] = int(round(SPACE_SCALE * (
+            (used_by_assets[data_center_id] or 0) +
+            used_by_accessories[data_center_id]
+        )))
+    return space
+
+
+def get_space(data_center_ids):
+    """
+    Return dict with data center id as a key and (cached) available and used
+    space (in U) as a value.
+    """
+    keys = {
+        data_center_id: _get_space_keys(data_center_id)
+        for data_center_id in data_center_ids
+    }
+    space = cache.get_many([key for pair in keys.values() for key in pair])
+    missing = [
+        data_center_id for data_center_id, pair in keys.items()
+        if any(key not in space for key in pair)
+    ]
+    if missing:
+        calculated = _calculate_space(missing)
+        _set_many(calculated)
+        space.update(calculated)
+    return {
+        data_center_id: (
+            space[available_key], space[used_key] / SPACE_SCALE
+        )
+        for data_center_id, (available_key, used_key) in keys.items()
+    }
+
+
+def invalidate_space(data_center_ids):
+    cache.delete_many([
+        key
+        for data_center_id in data_center_ids if data_center_id is not None
+        for key in _get_space_keys(data_center_id)
+    ])
+
+
+def reconcile_counters():
+    """
+    Calculate all counters from database.
+    """
+    _set_many(_calculate_counts(SUMMARY_MODELS))
+    _set_many(_calculate_space(
+        list(DataCenter.objects.values_list('pk', flat=True))
+    ))
+
+
+@receiver(post_save, sender=DataCenterAsset)
+@receiver(post_save, sender=BackOfficeAsset)
+@receiver(post_save, sender=Licence)
+@receiver(post_save, sender=Support)
+@receiver(post_save, sender=Domain)
+@receiver(post_save, sender=RalphUser)
+def count_created_handler(sender, instance, created, **kwargs):
+    if created:
+        _incr(_get_count_key(sender), 1)
+
+
+@receiver(post_delete, sender=DataCenterAsset)
+@receiver(post_delete, sender=BackOfficeAsset)
+@receiver(post_delete, sender=Licence)
+@receiver(post_delete, sender=Support)
+@receiver(post_delete, sender=Domain)
+@receiver(post_delete, sender=RalphUser)
+def count_deleted_handler(sender, instance, **kwargs):
+    _incr(_get_count_key(sender), -1)
+
+
+def _get_racks(rack_ids):
+    return {
+        pk: (data_center_id, require_position)
+        for pk, data_center_id, require_position in Rack.objects.filter(
+            pk__in=rack_ids
+        ).values_list(
+            'pk', 'server_room__data_center_id', 'require_position'
+        )
+    }
+
+
+def _update_used_space(deltas):
+    for data_center_id, delta in deltas.items():
+        if data_center_id is not None and delta:
+            _incr(
+                USED_SPACE_KEY.format(data_center_id),
+                int(round(SPACE_SCALE * delta))
+            )
+
+
+def _data_center_asset_changed(old_state, new_state):
+    states = [
+        state for state in (old_state, new_state)
+        if state and state[0] is not None
+    ]
+    if not states:
+        return
+    racks = _get_racks({rack_id for rack_id, _ in states})
+    # only root assets (in racks requiring position) take space
+    heights = dict(AssetModel.objects.filter(
+        pk__in={model_id for _, model_id in states}, has_parent=False,
+    ).values_list('pk', 'height_of_device'))
+    deltas = Counter()
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if not state or state[0] not in racks:
+            continue
+        data_center_id, require_position = racks[state[0]]
+        if require_position:
+            deltas[data_center_id] += sign * heights.get(state[1], 0)
+    _update_used_space(deltas)
+
+
+def _rack_accessory_changed(old_state, new_state):
+    rack_ids = {
+        state[0] for state in (old_state, new_state)
+        if state and state[0] is not None
+    }
+    if not rack_ids:
+        return
+    racks = _get_racks(rack_ids)
+    deltas = Counter()
+    for state, sign in ((old_state, -1), (new_state, 1)):
+        if state and state[0] in racks:
+            deltas[racks[state[0]][0]] += sign
+    _update_used_space(deltas)
+
+
+def _rack_changed(old_state, new_state):
+    # space of all assets and accessories in rack changes - counters of
+    # data centers are calculated again
+    invalidate_space(ServerRoom.objects.filter(pk__in={
+        state[0] for state in (old_state, new_state) if state
+    }).values_list('data_center_id', flat=True))
+
+
+def _server_room_changed(old_state, new_state):
+    invalidate_space({state[0] for state in (old_state, new_state) if state})
+
+
+def _asset_model_changed(old_state, new_state):
+    invalidate_space(DataCenter.objects.values_list('pk', flat=True))
+
+
+SPACE_HANDLERS = {
+    DataCenterAsset: _data_center_asset_changed,
+    RackAccessory: _rack_accessory_changed,
+    Rack: _rack_changed,
+    ServerRoom: _server_room_changed,
+    AssetModel: _asset_model_changed,
+}
+
+
+def space_changed_handler(sender, old_state, new_state):
+    SPACE_HANDLERS[sender](old_state, new_state)
+
+
+space_tracker = StateTracker(
+    'dashboard_space', SPACE_FIELDS, space_changed_handler
+)
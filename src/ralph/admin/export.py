@@ -0,0 +1,244 @@
+# -*- coding: utf-8 -*-
+"""
+Export of admin changelist (ex. all data center assets) without loading all
+objects into memory.
+
+Objects are fetched in chunks (keeping ordering of the changelist) and
+`prefetch_related` of the queryset is applied to every chunk separately, so
+memory usage is bounded by the size of chunk instead of the size of the
+table. CSV is written row by row and streamed to the client. XLSX is written
+row by row to temporary file, which is sent when all rows are written (so
+it is not streamed).
+"""
+import csv
+import tempfile
+from itertools import count
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import Q
+from django.db.models.constants import LOOKUP_SEP
+from django.http import FileResponse, StreamingHttpResponse
+from import_export.formats import base_formats
+
+try:
+    import openpyxl
+    openpyxl_exists = True
+except ImportError:
+    # XLSX is exported (in memory) by tablib (using its bundled copy of
+    # openpyxl) when openpyxl is not installed
+    openpyxl_exists = False
+
+
+class _OrderingKey(object):
+    """
+    Field (possibly of related object) by which objects are ordered.
+    """
+    def __init__(self, lookup, relations, field_name, descending):
+        self.lookup = lookup
+        self.relations = relations
+        self.field_name = field_name
+        self.descending = descending
+
+    def get_value(self, obj):
+        for relation in self.relations:
+            obj = getattr(obj, relation)
+            if obj is None:
+                return None
+        if self.field_name is None:
+            return obj.pk
+        return getattr(obj, self.field_name)
+
+
+def _get_ordering_key(model, ordering_field):
+    """
+    Return `_OrderingKey` for (string) ordering field or None, if objects
+    can't be paginated by it (ex. ordering by expression, to-many relation
+    or by related object, which is ordered by its own `Meta.ordering`).
+    """
+    if not isinstance(ordering_field, str) or ordering_field == '?':
+        return None
+    descending = ordering_field.startswith('-')
+    lookup = ordering_field.lstrip('-')
+    parts = lookup.split(LOOKUP_SEP)
+    relations = []
+    try:
+        for part in parts[:-1]:
+            field = model._meta.get_field(part)
+            if not (
+                field.concrete and (field.many_to_one or field.one_to_one)
+            ):
+                return None
+            relations.append(field.name)
+            model = field.rel.to
+        if parts[-1] in ('pk', model._meta.pk.name):
+            return _OrderingKey(lookup, relations, None, descending)
+        field = model._meta.get_field(parts[-1])
+    except FieldDoesNotExist:
+        return None
+    if not field.concrete or field.is_relation:
+        return None
+    return _OrderingKey(lookup, relations, field.attname, descending)
+
+
+def _get_ordering_keys(queryset):
+    """
+    Return list of `_OrderingKey`s of queryset (ending with primary key) or
+    None, if it can't be paginated by its ordering.
+    """
+    model = queryset.model
+    keys = []
+    for ordering_field in (
+        queryset.query.order_by or model._meta.ordering
+    ):
+        key = _get_ordering_key(model, ordering_field)
+        if key is None:
+            return None
+        keys.append(key)
+        if not key.relations and key.field_name is None:
+            # primary key is unique - next fields don't change ordering
+            return keys
+    keys.append(_OrderingKey('pk', [], None, False))
+    return keys
+
+
+def _get_after_filter(keys, values, nulls_largest):
+    """
+    Return filter of objects placed (in ordering by `keys`) after object
+    with `values` of keys.
+    """
+    after = None
+    equal = None
+    for key, value in zip(keys, values):
+        # NULL is ordered as the largest value by some databases (ex.
+        # PostgreSQL) and as the smallest one by others (ex. MySQL)
+        nulls_first = key.descending == nulls_largest
+        is_null = Q(**{key.lookup + '__isnull': True})
+        if value is None:
+            greater = ~is_null if nulls_first else None
+            same = is_null
+        else:
+            greater = Q(**{'{}__{}'.format(
+                key.lookup, 'lt' if key.descending else 'gt'
+            ): value})
+            if not nulls_first:
+                greater |= is_null
+            same = Q(**{key.lookup: value})
+        if greater is not None:
+            if equal is not None:
+                greater = equal & greater
+            after = greater if after is None else after | greater
+        equal = same if equal is None else equal & same
+    return after
+
+
+def _iterate_by_keys(queryset, keys, chunk_size):
+    relations = {
+        LOOKUP_SEP.join(key.relations) for key in keys if key.relations
+    }
+    # related objects are needed to read values of keys
+    if relations and queryset.query.select_related is not True:
+        queryset = queryset.select_related(*relations)
+    queryset = queryset.order_by(*[
+        ('-' if key.descending else '') + key.lookup for key in keys
+    ])
+    nulls_largest = connections[queryset.db].vendor in (
+        'postgresql', 'oracle'
+    )
+    chunk_queryset = queryset
+    while True:
+        chunk = list(chunk_queryset[:chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            break
+        chunk_queryset = queryset.filter(_get_after_filter(
+            keys, [key.get_value(chunk[-1]) for key in keys], nulls_largest
+        ))
+
+
+def _iterate_by_offset(queryset, chunk_size):
+    ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+    queryset = queryset.order_by(*(ordering + ['pk']))
+    for offset in count(0, chunk_size):
+        chunk = list(queryset[offset:offset + chunk_size])
+        yield from chunk
+        if len(chunk) < chunk_size:
+            break
+
+
+def iterate_in_chunks(queryset, chunk_size=None):
+    """
+    Yield objects of queryset fetched in chunks of `chunk_size` rows (every
+    chunk with its own `select_related` and `prefetch_related` queries).
+
+    Ordering of queryset is kept (primary key is added to it as a
+    tiebreaker). Chunks are fetched by values of ordering fields of the last
+    object of previous chunk (keyset pagination), so cost of fetching chunk
+    doesn't depend on its position and concurrent changes don't shift next
+    chunks. Only queryset ordered by expression, to-many relation or related
+    object (using its `Meta.ordering`) is fetched by offset.
+    """
+    chunk_size = chunk_size or settings.EXPORT_CHUNK_SIZE
+    keys = _get_ordering_keys(queryset)
+    if keys is None:
+        return _iterate_by_offset(queryset, chunk_size)
+    return _iterate_by_keys(queryset, keys, chunk_size)
+
+
+class _Echo(object):
+    """
+    File-like object which returns written value instead of storing it.
+    """
+    def write(self, value):
+        return value
+
+
+def _iter_rows(resource, objects):
+    yield resource.get_export_headers()
+    for obj in objects:
+        yield resource.export_resource(obj)
+
+
+def stream_csv(resource, objects):
+    """
+    Yield CSV lines of exported objects (header first).
+    """
+    writer = csv.writer(_Echo())
+    for row in _iter_rows(resource, objects):
+        yield writer.writerow(row)
+
+
+def write_xlsx(resource, objects, title):
+    """
+    Write exported objects to (temporary) XLSX file.
+
+    Workbook is created in write-only mode, so rows are not kept in memory,
+    but the file could be sent only when all rows are written.
+    """
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=title)
+    for row in _iter_rows(resource, objects):
+        sheet.append(row)
+    xlsx_file = tempfile.TemporaryFile()
+    workbook.save(xlsx_file)
+    xlsx_file.seek(0)
+    return xlsx_file
+
+
+def get_streaming_export_response(file_format, resource, objects, title):
+    """
+    Return response with exported objects or None, if file format could not
+    be exported in chunks. CSV is streamed; XLSX is sent (as file) when
+    whole workbook is written.
+    """
+    content_type = file_format.get_content_type()
+    if isinstance(file_format, base_formats.CSV):
+        return StreamingHttpResponse(
+            stream_csv(resource, objects), content_type=content_type
+        )
+    if isinstance(file_format, base_formats.XLSX) and openpyxl_exists:
+        return FileResponse(
+            write_xlsx(resource, objects, title), content_type=content_type
+        )
+    return None
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from ralph.admin.dashboard import reconcile_counters
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Calculate dashboard counters (kept up to date by signals) from "
+        "database. Should be run periodically."
+    )
+
+    def handle(self, *args, **options):
+        reconcile_counters()
+        self.stdout.write('Dashboard counters reconciled')
@@ -13,12 +13,14 @@ from django.db import models
 from django.http import HttpResponseRedirect
 from django.views.generic import TemplateView
 from import_export.admin import ImportExportModelAdmin
+from import_export.forms import ExportForm
 from import_export.widgets import ForeignKeyWidget
 from mptt.admin import MPTTAdminForm, MPTTModelAdmin
 from reversion import VersionAdmin
 
 from ralph.admin import widgets
 from ralph.admin.autocomplete import AjaxAutocompleteMixin
+from ralph.admin.export import get_streaming_export_response, iterate_in_chunks
 from ralph.admin.helpers import get_field_by_relation_path
 from ralph.admin.views.main import BULK_EDIT_VAR, BULK_EDIT_VAR_IDS
 from ralph.helpers import add_request_to_form
@@ -303,10 +305,34 @@ class RalphAdmin(
         )
         if resource_prefetch_related:
             queryset = queryset.prefetch_related(*resource_prefetch_related)
-        # cast to list to consider all prefetch_related (django-import-export
-        # use queryset.iterator() to "save memory", but then for every row
-        # sql queries are made to fetch all m2m relations)
-        return list(queryset)
+        # fetch in chunks to consider all prefetch_related without loading
+        # whole table at once (django-import-export use queryset.iterator()
+        # to "save memory", but then for every row sql queries are made to
+        # fetch all m2m relations)
+        return iterate_in_chunks(queryset)
+
+    def export_action(self, request, *args, **kwargs):
+        """
+        Stream exported file (CSV or XLSX) instead of building it in memory.
+        """
+        formats = self.get_export_formats()
+        form = ExportForm(formats, request.POST or None)
+        if form.is_valid():
+            file_format = formats[int(form.cleaned_data['file_format'])]()
+            response = get_streaming_export_response(
+                file_format,
+                self.get_export_resource_class()(),
+                self.get_export_queryset(request),
+                str(self.model._meta.verbose_name_plural),
+            )
+            if response is not None:
+                response['Content-Disposition'] = (
+                    'attachment; filename={}'.format(
+                        self.get_export_filename(file_format)
+                    )
+                )
+                return response
+        return super().export_action(request, *args, **kwargs)
 
     def get_export_resource_class(self):
         """
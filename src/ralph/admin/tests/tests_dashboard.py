@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from ralph.admin.dashboard import get_counts, get_space, reconcile_counters
+from ralph.admin.templatetags.dashboard_tags import dc_capacity
+from ralph.assets.tests.factories import DataCenterAssetModelFactory
+from ralph.data_center.models import DataCenterAsset, Rack
+from ralph.data_center.tests.factories import (
+    AccessoryFactory,
+    DataCenterAssetFactory,
+    DataCenterFactory,
+    RackAccessoryFactory,
+    RackFactory,
+    ServerRoomFactory
+)
+
+
+class DashboardCountersTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.dc_1 = DataCenterFactory(name='DC1')
+        self.dc_2 = DataCenterFactory(name='DC2')
+        self.rack_1 = RackFactory(
+            server_room=ServerRoomFactory(
+                name='Server Room A', data_center=self.dc_1
+            ),
+            max_u_height=48,
+        )
+        self.rack_2 = RackFactory(
+            server_room=ServerRoomFactory(
+                name='Server Room B', data_center=self.dc_2
+            ),
+            max_u_height=42,
+        )
+        self.model = DataCenterAssetModelFactory(
+            name='Dashboard model', height_of_device=2
+        )
+        self.dc_asset = DataCenterAssetFactory(
+            rack=self.rack_1, model=self.model
+        )
+
+    def _get_space(self):
+        # counters are read without queries
+        with self.assertNumQueries(0):
+            return get_space([self.dc_1.id, self.dc_2.id])
+
+    def test_counts(self):
+        self.assertEqual(get_counts([DataCenterAsset])[DataCenterAsset], 1)
+        DataCenterAssetFactory.create_batch(2)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                get_counts([DataCenterAsset])[DataCenterAsset], 3
+            )
+        self.dc_asset.delete()
+        self.assertEqual(get_counts([DataCenterAsset])[DataCenterAsset], 2)
+
+    @override_settings(
+        DASHBOARD_COUNTERS_TIMEOUT=3600, PROCESS_LOCAL_CACHE_TIMEOUT=30
+    )
+    def test_counters_timeout_limited_when_cache_not_shared(self):
+        with patch('ralph.admin.dashboard.cache') as cache_mock:
+            cache_mock.get_many.return_value = {}
+            get_counts([DataCenterAsset])
+        self.assertEqual(cache_mock.set_many.call_args[0][1], 30)
+
+    @override_settings(
+        DASHBOARD_COUNTERS_TIMEOUT=3600, PROCESS_LOCAL_CACHE_TIMEOUT=30
+    )
+    def test_counters_timeout_not_limited_when_cache_shared(self):
+        with patch('ralph.admin.dashboard.cache') as cache_mock, patch(
+            'ralph.helpers.is_cache_shared', return_value=True
+        ):
+            cache_mock.get_many.return_value = {}
+            get_counts([DataCenterAsset])
+        self.assertEqual(cache_mock.set_many.call_args[0][1], 3600)
+
+    def test_space(self):
+        get_space([self.dc_1.id, self.dc_2.id])
+        self.assertEqual(
+            self._get_space(), {self.dc_1.id: (48, 2), self.dc_2.id: (42, 0)}
+        )
+        # move asset to another data center
+        self.dc_asset.rack = self.rack_2
+        self.dc_asset.save()
+        self.assertEqual(
+            self._get_space(), {self.dc_1.id: (48, 0), self.dc_2.id: (42, 2)}
+        )
+        RackAccessoryFactory(
+            rack=self.rack_1, accessory=AccessoryFactory(), position=1
+        )
+        DataCenterAssetFactory(rack=self.rack_1, model=self.model)
+        self.assertEqual(
+            self._get_space(), {self.dc_1.id: (48, 3), self.dc_2.id: (42, 2)}
+        )
+        self.dc_asset.delete()
+        self.assertEqual(
+            self._get_space(), {self.dc_1.id: (48, 3), self.dc_2.id: (42, 0)}
+        )
+
+    def test_space_is_calculated_again_when_rack_changes(self):
+        get_space([self.dc_1.id, self.dc_2.id])
+        self.rack_1.require_position = False
+        self.rack_1.save()
+        self.assertEqual(
+            get_space([self.dc_1.id, self.dc_2.id]),
+            {self.dc_1.id: (0, 0), self.dc_2.id: (42, 0)}
+        )
+
+    def test_reconcile_counters(self):
+        get_space([self.dc_1.id, self.dc_2.id])
+        # queryset update doesn't send signals
+        Rack.objects.filter(pk=self.rack_1.pk).update(max_u_height=40)
+        self.assertEqual(self._get_space()[self.dc_1.id], (48, 2))
+        reconcile_counters()
+        self.assertEqual(self._get_space()[self.dc_1.id], (40, 2))
+
+    def test_dc_capacity(self):
+        result = dc_capacity()['capacities']
+        self.assertEqual([item['dc'] for item in result], ['DC1', 'DC2'])
+        self.assertEqual(result[0]['capacity'], 4)
+        self.assertIn(
+            'Free U:</strong> 46 (48 in total)', result[0]['tooltip']
+        )
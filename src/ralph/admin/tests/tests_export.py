@@ -0,0 +1,148 @@
+# -*- coding: utf-8 -*-
+import csv
+import io
+from unittest import mock, skipUnless
+
+from django.core.urlresolvers import reverse
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from import_export.formats import base_formats
+
+from ralph.admin.export import (
+    get_streaming_export_response,
+    iterate_in_chunks,
+    openpyxl_exists
+)
+from ralph.admin.sites import ralph_site
+from ralph.data_center.models.physical import RackAccessory, ServerRoom
+from ralph.data_center.tests.factories import (
+    AccessoryFactory,
+    DataCenterFactory,
+    RackAccessoryFactory,
+    RackFactory,
+    ServerRoomFactory
+)
+from ralph.data_importer.resources import ServerRoomResource
+from ralph.tests.mixins import ClientMixin
+
+if openpyxl_exists:
+    import openpyxl
+
+
+class IterateInChunksTest(TestCase):
+    def setUp(self):
+        self.server_rooms = [
+            ServerRoomFactory(name='Server Room {}'.format(i))
+            for i in range(5)
+        ]
+
+    def test_iterate_in_chunks(self):
+        queryset = ServerRoom.objects.select_related(
+            'data_center'
+        ).order_by('-name')
+        # 3 chunks (2 + 2 + 1 rows)
+        with self.assertNumQueries(3):
+            server_rooms = list(iterate_in_chunks(queryset, chunk_size=2))
+            for server_room in server_rooms:
+                server_room.data_center
+        self.assertEqual(server_rooms, self.server_rooms[::-1])
+
+    def test_iterate_in_chunks_keeps_ordering_with_pk_tiebreaker(self):
+        self.server_rooms[3].data_center = self.server_rooms[0].data_center
+        self.server_rooms[3].save()
+        queryset = ServerRoom.objects.order_by('data_center__name')
+        server_rooms = list(iterate_in_chunks(queryset, chunk_size=2))
+        self.assertEqual(server_rooms, list(queryset.order_by(
+            'data_center__name', 'pk'
+        )))
+
+    def test_iterate_in_chunks_by_ordering_fields_values(self):
+        queryset = ServerRoom.objects.order_by('data_center__name', '-name')
+        with CaptureQueriesContext(connection) as context:
+            server_rooms = list(iterate_in_chunks(queryset, chunk_size=2))
+        # 3 chunks, fetched without offset
+        self.assertEqual(len(context.captured_queries), 3)
+        self.assertFalse(any(
+            'OFFSET' in query['sql'] for query in context.captured_queries
+        ))
+        self.assertEqual(server_rooms, list(queryset.order_by(
+            'data_center__name', '-name', 'pk'
+        )))
+
+    def test_iterate_in_chunks_by_nullable_field(self):
+        rack = RackFactory()
+        for position in (None, 3, None, 1, 2, None):
+            RackAccessoryFactory(
+                rack=rack, accessory=AccessoryFactory(), position=position
+            )
+        for ordering in ('position', '-position'):
+            queryset = RackAccessory.objects.order_by(ordering)
+            self.assertEqual(
+                list(iterate_in_chunks(queryset, chunk_size=2)),
+                list(queryset.order_by(ordering, 'pk'))
+            )
+
+    def test_iterate_in_chunks_by_pk_descending(self):
+        queryset = ServerRoom.objects.order_by('-pk')
+        with self.assertNumQueries(3):
+            server_rooms = list(iterate_in_chunks(queryset, chunk_size=2))
+        self.assertEqual(server_rooms, self.server_rooms[::-1])
+
+    def test_iterate_in_chunks_prefetch_related_per_chunk(self):
+        queryset = ServerRoom.objects.prefetch_related('rack_set')
+        # 3 chunks, every with prefetch query
+        with self.assertNumQueries(3 * 2):
+            server_rooms = list(iterate_in_chunks(queryset, chunk_size=2))
+            for server_room in server_rooms:
+                list(server_room.rack_set.all())
+        self.assertEqual(len(server_rooms), 5)
+
+
+class StreamingExportTest(ClientMixin, TestCase):
+    def setUp(self):
+        self.login_as_user()
+        data_center = DataCenterFactory(name='DC1')
+        self.server_rooms = [
+            ServerRoomFactory(
+                name='Server Room {}'.format(i), data_center=data_center
+            )
+            for i in range(3)
+        ]
+        self.url = reverse('admin:data_center_serverroom_export')
+
+    def _export(self, format_class):
+        formats = ralph_site._registry[ServerRoom].get_export_formats()
+        response = self.client.post(
+            self.url, {'file_format': formats.index(format_class)}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('attachment', response['Content-Disposition'])
+        return b''.join(response.streaming_content)
+
+    def test_export_csv(self):
+        content = self._export(base_formats.CSV)
+        rows = list(csv.DictReader(io.StringIO(content.decode('utf-8'))))
+        self.assertEqual(
+            [row['name'] for row in rows],
+            [server_room.name for server_room in self.server_rooms]
+        )
+        self.assertEqual(rows[0]['data_center_str'], 'DC1')
+
+    @skipUnless(openpyxl_exists, 'openpyxl is not installed')
+    def test_export_xlsx(self):
+        content = self._export(base_formats.XLSX)
+        sheet = openpyxl.load_workbook(io.BytesIO(content)).active
+        rows = [[cell.value for cell in row] for row in sheet.iter_rows()]
+        self.assertEqual(len(rows), 4)
+        header = list(rows[0])
+        self.assertEqual(
+            rows[1][header.index('name')], self.server_rooms[0].name
+        )
+
+    @mock.patch('ralph.admin.export.openpyxl_exists', False)
+    def test_export_xlsx_without_openpyxl_is_not_streamed(self):
+        # export falls back to django-import-export (using tablib)
+        self.assertIsNone(get_streaming_export_response(
+            base_formats.XLSX(), ServerRoomResource(), [], 'server rooms'
+        ))
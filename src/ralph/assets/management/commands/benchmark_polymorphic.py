@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+import tracemalloc
+from itertools import cycle
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Max
+from django.test.utils import CaptureQueriesContext
+
+from ralph.accounts.models import Region
+from ralph.assets.models.assets import AssetModel
+from ralph.assets.models.base import BaseObject
+from ralph.assets.models.choices import ObjectModelType
+from ralph.back_office.models import BackOfficeAsset, Warehouse
+from ralph.data_center.models.physical import DataCenterAsset
+from ralph.helpers import Timer
+from ralph.lib.polymorphic.models import clear_content_type_models_cache
+from ralph.virtual.models import VirtualServer
+
+BENCHMARK_NAME = 'benchmark-polymorphic'
+
+
+def _get_tables(model):
+    """
+    Return model and its (concrete) ancestors, starting from the base one.
+    """
+    return sorted(
+        [model] + model._meta.get_parent_list(),
+        key=lambda m: len(m._meta.get_parent_list())
+    )
+
+
+def _insert_rows(model, objs):
+    """
+    Insert objects of multi-table inherited model (not supported by
+    `bulk_create`) - rows of every table are inserted in batches.
+    """
+    for table_model in _get_tables(model):
+        table_model._base_manager.all()._batched_insert(
+            objs, table_model._meta.local_concrete_fields, batch_size=None
+        )
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Measure performance (queries and memory) of polymorphic iteration "
+        "over base objects (data center assets, back office assets and "
+        "virtual servers). Generated objects are deleted at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-r', '--rows',
+            type=int,
+            default=100000,
+            help='number of base objects to generate',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_sizes',
+            type=int,
+            nargs='+',
+            default=[100, 1000, 10000],
+            help='number of base objects resolved to descendants at once',
+        )
+
+    def _generate(self, rows):
+        dc_model = AssetModel.objects.create(
+            name=BENCHMARK_NAME, type=ObjectModelType.data_center
+        )
+        bo_model = AssetModel.objects.create(
+            name=BENCHMARK_NAME, type=ObjectModelType.back_office
+        )
+        region = Region.objects.create(name=BENCHMARK_NAME)
+        warehouse = Warehouse.objects.create(name=BENCHMARK_NAME)
+        kwargs = {
+            DataCenterAsset: {'model_id': dc_model.pk},
+            BackOfficeAsset: {
+                'model_id': bo_model.pk,
+                'region_id': region.pk,
+                'warehouse_id': warehouse.pk,
+            },
+            VirtualServer: {},
+        }
+        content_types = ContentType.objects.get_for_models(*kwargs)
+        first_pk = (
+            BaseObject.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        ) + 1
+        objs = {model: [] for model in kwargs}
+        models = cycle(kwargs)
+        for pk in range(first_pk, first_pk + rows):
+            model = next(models)
+            obj = model(
+                content_type_id=content_types[model].pk, **kwargs[model]
+            )
+            # primary key (pointer to parent) of every table is the same
+            for table_model in _get_tables(model):
+                setattr(obj, table_model._meta.pk.attname, pk)
+            objs[model].append(obj)
+        for model, model_objs in objs.items():
+            _insert_rows(model, model_objs)
+        return first_pk, (dc_model, bo_model, region, warehouse)
+
+    def _cleanup(self, first_pk, related):
+        for model in (DataCenterAsset, BackOfficeAsset, VirtualServer):
+            for table_model in reversed(_get_tables(model)):
+                table_model._base_manager.filter(
+                    pk__gte=first_pk
+                )._raw_delete(table_model._base_manager.db)
+        for obj in related:
+            obj.delete()
+
+    def _iterate(self, queryset, chunk_size):
+        # iterator doesn't keep (all) objects in queryset's result cache
+        return queryset.polymorphic_chunk_size(chunk_size).iterator()
+
+    def handle(self, *args, **options):
+        with Timer() as timer:
+            first_pk, related = self._generate(options['rows'])
+        self.stdout.write('{} objects generated in {:.2f}s'.format(
+            options['rows'], timer.elapsed
+        ))
+        try:
+            queryset = BaseObject.polymorphic_objects.filter(
+                pk__gte=first_pk
+            ).order_by('pk')
+            for chunk_size in options['chunk_sizes']:
+                self.stdout.write('chunk size {}:'.format(chunk_size))
+                # content types are fetched again for every chunk size
+                clear_content_type_models_cache()
+                with CaptureQueriesContext(connection) as queries:
+                    with Timer() as timer:
+                        count = sum(
+                            1 for _ in self._iterate(queryset, chunk_size)
+                        )
+                self.stdout.write(
+                    '  {:<40} {} objects, {} queries, {:.3f}s'.format(
+                        'iterate', count, len(queries), timer.elapsed
+                    )
+                )
+                # memory is measured separately - captured queries take
+                # memory too
+                tracemalloc.start()
+                for _ in self._iterate(queryset, chunk_size):
+                    pass
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                self.stdout.write('  {:<40} {:.1f} MB'.format(
+                    'peak memory of iteration', peak / 2 ** 20
+                ))
+        finally:
+            self._cleanup(first_pk, related)
@@ -33,7 +33,12 @@ def move_parents_models(from_obj, to_obj, exclude_copy_fields=None):
     to_obj.save()
     parents = from_obj._meta.parents
     from_obj._meta.parents = {}
+    # fields (and relations) cached by _meta include these of parents - they
+    # have to be computed again without them (otherwise objects related to
+    # parents are deleted too) and with them afterwards
+    from_obj._meta._expire_cache()
     try:
         from_obj.delete()
     finally:
         from_obj._meta.parents = parents
+        from_obj._meta._expire_cache()
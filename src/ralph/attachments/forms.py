@@ -1,6 +1,5 @@
 from django import forms
 
-from ralph.admin.helpers import get_content_type_for_model
 from ralph.attachments.models import Attachment, AttachmentItem
 from ralph.lib.mixins.forms import RequestModelForm
 
@@ -28,7 +27,9 @@ class AttachmentForm(RequestModelForm):
             * mime_type - uploaded file's content type.
         """
         obj = super().save(commit=False)
-        md5 = Attachment.get_md5_sum(obj.file)
+        file = self.cleaned_data.get('file', None)
+        # md5 of large files is calculated during upload
+        md5 = getattr(file, 'md5', None) or Attachment.get_md5_sum(obj.file)
         attachment = Attachment.objects.filter(md5=md5)
         if obj.pk:
             attachment = attachment.exclude(pk=obj.pk)
@@ -37,22 +38,12 @@ class AttachmentForm(RequestModelForm):
         # _parent_object is set in attachment.views.AttachmentsView
         #  get_formset method.
         if attachment:
-            content_type = get_content_type_for_model(
-                self._parent_object._meta.model
+            AttachmentItem.objects.attach_to_objects(
+                attachment, [self._parent_object]
             )
-            if not AttachmentItem.objects.filter(
-                content_type=content_type,
-                object_id=self._parent_object.pk,
-                attachment__md5=md5
-            ).exists():
-                AttachmentItem.objects.attach(
-                    self._parent_object.pk, content_type, [attachment]
-                )
-                return None
-            return
+            return None
         obj.md5 = md5
         obj.uploaded_by = self._request.user
-        file = self.cleaned_data.get('file', None)
         if file and hasattr(file, 'content_type'):
             obj.mime_type = file.content_type
         obj.save()
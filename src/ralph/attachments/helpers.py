@@ -1,8 +1,15 @@
+import hashlib
 import mimetypes
 import os
 from collections import Iterable
+from io import UnsupportedOperation
 from uuid import uuid4
 
+from django.core.files import File
+
+# size (in bytes) of chunks read when md5 checksum of a file is calculated
+MD5_CHUNK_SIZE = 64 * 2 ** 10
+
 
 def get_file_path(instance, filename, default_dir='attachments'):
     """Generates pseudo-random file path.
@@ -25,10 +32,40 @@ def get_file_path(instance, filename, default_dir='attachments'):
     return os.path.join(default_dir, name[:1], name[1:2], name)
 
 
-def add_attachment_from_disk(objs, local_path_to_file, owner, description=''):
+def get_md5_sum(file, chunk_size=MD5_CHUNK_SIZE):
+    """Calculates md5 checksum of a file.
+
+    Checksum is updated chunk by chunk, so the file is never loaded into
+    memory as a whole.
+
+    Args:
+        file: A file-like object (Django's File or opened python file).
+        chunk_size: Size (in bytes) of read chunks.
+
+    Returns:
+        A hex digest of md5 checksum.
+    """
+    if not isinstance(file, File):
+        file = File(file)
+    md5 = hashlib.md5()
+    # chunks method rewinds the file before reading
+    for chunk in file.chunks(chunk_size):
+        md5.update(chunk)
+    try:
+        file.seek(0)
+    except (AttributeError, UnsupportedOperation):
+        pass
+    return md5.hexdigest()
+
+
+def add_attachment_from_disk(
+    objs, local_path_to_file, owner, description='', original_filename=None
+):
     """Create attachment from absolute file path.
 
     Function create and returns attachment object with file from local path.
+    If attachment with the same content (md5 checksum) already exists, it is
+    attached to objects instead of storing the file again.
 
     Args:
         obj:
@@ -50,17 +87,17 @@ def add_attachment_from_disk(objs, local_path_to_file, owner, description=''):
     >>> add_attachment_from_disk(foo, '/etc/passwd', root)
     """
     from ralph.attachments.models import Attachment, AttachmentItem
-    attachment = Attachment.objects.create_from_file_path(
-        local_path_to_file, owner
-    )
     mime_type = mimetypes.guess_type(local_path_to_file)[0]
     if mime_type is None:
         mime_type = 'application/octet-stream'
-    attachment.mime_type = mime_type
-    attachment.description = description
-    attachment.save()
+    attachment, _ = Attachment.objects.get_or_create_from_file_path(
+        local_path_to_file,
+        owner,
+        original_filename=original_filename,
+        mime_type=mime_type,
+        description=description,
+    )
     if not isinstance(objs, Iterable):
         objs = [objs]
-    for obj in objs:
-        AttachmentItem.objects.refresh(obj, new_objects=[attachment])
+    AttachmentItem.objects.attach_to_objects(attachment, objs)
     return attachment
@@ -1,16 +1,15 @@
-import hashlib
 import os
 import string
 
 from django.conf import settings
 from django.contrib.contenttypes import generic
 from django.contrib.contenttypes.models import ContentType
-from django.core.files.base import ContentFile
-from django.db import models, transaction
+from django.core.files import File
+from django.db import IntegrityError, models, transaction
 from unidecode import unidecode
 
 from ralph.admin.helpers import get_content_type_for_model
-from ralph.attachments.helpers import get_file_path
+from ralph.attachments.helpers import get_file_path, get_md5_sum
 from ralph.lib.mixins.models import TimeStampMixin
 
 
@@ -30,15 +29,44 @@ class AttachmentManager(models.Manager):
             items__object_id=obj.id,
         )
 
-    def create_from_file_path(self, file_path, uploaded_by):
-        attachment = self.model()
-        attachment.uploaded_by = uploaded_by
+    def get_or_create_from_file(self, file, uploaded_by, **kwargs):
+        """
+        Returns tuple (attachment, created) for content of the file.
+
+        Attachments are addressed by md5 checksum of their content - if there
+        is already attachment with the same content, it is returned (and
+        kwargs are ignored) instead of storing the file again. Checksum is
+        taken from `md5` attribute of the file (set while the file is
+        uploaded, see `ralph.attachments.uploadhandlers`) or calculated chunk
+        by chunk.
+        """
+        md5 = getattr(file, 'md5', None) or get_md5_sum(file)
+        attachment = self.filter(md5=md5).first()
+        if attachment:
+            return attachment, False
+        filename = os.path.basename(file.name)
+        if not kwargs.get('original_filename'):
+            kwargs['original_filename'] = self.model._safe_filename(filename)
+        attachment = self.model(md5=md5, uploaded_by=uploaded_by, **kwargs)
+        # file is copied to the storage chunk by chunk
+        attachment.file.save(filename, file, save=False)
+        try:
+            with transaction.atomic():
+                attachment.save()
+        except IntegrityError:
+            # the same content was stored in the meantime
+            attachment.file.delete(save=False)
+            return self.get(md5=md5), False
+        return attachment, True
+
+    def get_or_create_from_file_path(self, file_path, uploaded_by, **kwargs):
+        """
+        Returns tuple (attachment, created) for the file from local path.
+        """
         with open(file_path, 'rb') as f:
-            content = ContentFile(f.read())
-            filename = os.path.basename(file_path)
-            attachment.file.save(filename, content, save=True)
-        attachment.original_filename = os.path.basename(file_path)
-        return attachment
+            return self.get_or_create_from_file(
+                File(f), uploaded_by, **kwargs
+            )
 
 
 class AttachmentItemManager(models.Manager):
@@ -71,6 +99,29 @@ class AttachmentItemManager(models.Manager):
         if new_items:
             self.bulk_create(new_items)
 
+    def attach_to_objects(self, attachment, objs):
+        """
+        Attach attachment to objects to which it is not attached yet.
+        """
+        objs_by_content_type = {}
+        for obj in objs:
+            content_type = get_content_type_for_model(obj)
+            objs_by_content_type.setdefault(content_type, []).append(obj)
+        for content_type, objs in objs_by_content_type.items():
+            attached = set(self.filter(
+                attachment=attachment,
+                content_type=content_type,
+                object_id__in=[obj.pk for obj in objs],
+            ).values_list('object_id', flat=True))
+            self.bulk_create([
+                self.model(
+                    content_type=content_type,
+                    object_id=obj.pk,
+                    attachment=attachment,
+                )
+                for obj in objs if obj.pk not in attached
+            ])
+
     def dettach(self, pk, content_type, attachments):
         """
         Dettach attachments from the object (through pk and content_type).
@@ -127,21 +178,21 @@ class Attachment(TimeStampMixin, models.Model):
     @classmethod
     def get_md5_sum(cls, file):
         """
-        Return md5 checksum of a file.
+        Return md5 checksum of a file (calculated chunk by chunk).
         """
-        file.seek(0)
-        md5 = hashlib.md5(file.read()).hexdigest()
-        file.seek(0)
-        return md5
+        return get_md5_sum(file)
 
     def save(self, *args, **kwargs):
         """
         Overrided standard save method. If object is saved first time then
-        its file name is saved in database as original name.
+        its md5 checksum (unless it's already known) and file name (as
+        original name, unless it's set explicitly) are saved in database.
         """
         if not self.pk:
-            self.md5 = self.get_md5_sum(self.file)
-            self.original_filename = self._safe_filename(self.file.name)
+            if not self.md5:
+                self.md5 = self.get_md5_sum(self.file)
+            if not self.original_filename:
+                self.original_filename = self._safe_filename(self.file.name)
         super().save(*args, **kwargs)
 
     @staticmethod
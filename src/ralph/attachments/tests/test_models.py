@@ -1,5 +1,16 @@
-from ralph.attachments.models import AttachmentItem
-from ralph.attachments.tests import AttachmentsTestCase
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+
+from ralph.attachments.helpers import add_attachment_from_disk, get_md5_sum
+from ralph.attachments.models import Attachment, AttachmentItem
+from ralph.attachments.tests import AttachmentsTestCase, User
+from ralph.attachments.uploadhandlers import MD5TemporaryFileUploadHandler
 from ralph.tests.models import Foo, Manufacturer
 
 
@@ -23,3 +34,87 @@ class AttachmentTest(AttachmentsTestCase):
         self.assertEqual(
             AttachmentItem.objects.get_items_for_object(obj).count(), 2
         )
+
+
+class AttachmentDeduplicationTest(AttachmentsTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user, _ = User.objects.get_or_create(username='tester')
+        self.content = b'firmware' * 1000
+        self.md5 = hashlib.md5(self.content).hexdigest()
+
+    def _write_file(self, filename='firmware.bin'):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, filename)
+        with open(path, 'wb') as f:
+            f.write(self.content)
+        return path
+
+    def test_get_md5_sum_in_chunks(self):
+        f = io.BytesIO(self.content)
+        f.read(10)
+        self.assertEqual(get_md5_sum(f, chunk_size=7), self.md5)
+        # file is rewinded
+        self.assertEqual(f.tell(), 0)
+
+    def test_get_or_create_from_file_reuses_content(self):
+        attachment, created = Attachment.objects.get_or_create_from_file(
+            SimpleUploadedFile('a.bin', self.content), self.user
+        )
+        self.assertTrue(created)
+        self.assertEqual(attachment.md5, self.md5)
+        self.assertEqual(attachment.original_filename, 'a.bin')
+        with self.assertNumQueries(1):
+            duplicate, created = Attachment.objects.get_or_create_from_file(
+                SimpleUploadedFile('b.bin', self.content), self.user
+            )
+        self.assertFalse(created)
+        self.assertEqual(duplicate, attachment)
+
+    # mime type of unknown extension depends on system's mime types database
+    @mock.patch(
+        'ralph.attachments.helpers.mimetypes.guess_type',
+        return_value=(None, None)
+    )
+    def test_add_attachment_from_disk_reuses_content(self, guess_type_mock):
+        foo_1 = Foo.objects.create(bar='1')
+        foo_2 = Foo.objects.create(bar='2')
+        path = self._write_file()
+        attachment = add_attachment_from_disk(
+            [foo_1, foo_2], path, self.user, description='firmware'
+        )
+        self.assertEqual(attachment.md5, self.md5)
+        self.assertEqual(attachment.original_filename, 'firmware.bin')
+        self.assertEqual(attachment.mime_type, 'application/octet-stream')
+        self.assertEqual(attachment.description, 'firmware')
+        self.assertEqual(attachment.file.read(), self.content)
+        duplicate = add_attachment_from_disk(
+            foo_1, self._write_file('copy.bin'), self.user,
+            original_filename='ignored.bin',
+        )
+        self.assertEqual(duplicate, attachment)
+        self.assertEqual(duplicate.original_filename, 'firmware.bin')
+        self.assertEqual(Attachment.objects.count(), 1)
+        # attachment is not attached to the same object twice
+        self.assertEqual(
+            AttachmentItem.objects.get_items_for_object(foo_1).count(), 1
+        )
+        self.assertEqual(
+            AttachmentItem.objects.get_items_for_object(foo_2).count(), 1
+        )
+
+    def test_upload_handler_calculates_md5(self):
+        handler = MD5TemporaryFileUploadHandler()
+        handler.new_file(
+            'file', 'firmware.bin', 'application/octet-stream',
+            len(self.content)
+        )
+        for start in range(0, len(self.content), 1000):
+            handler.receive_data_chunk(
+                self.content[start:start + 1000], start
+            )
+        uploaded_file = handler.file_complete(len(self.content))
+        self.assertEqual(uploaded_file.md5, self.md5)
+        uploaded_file.seek(0)
+        self.assertEqual(uploaded_file.read(), self.content)
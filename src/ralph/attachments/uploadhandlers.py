@@ -0,0 +1,27 @@
+# -*- coding: utf-8 -*-
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class MD5TemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Upload handler streaming data to temporary file (like default handler for
+    large files) and calculating md5 checksum of received chunks on the fly.
+
+    Checksum is available as `md5` attribute of uploaded file, so content of
+    (large) file doesn't have to be read again to find attachment with the
+    same content.
+    """
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.md5 = hashlib.md5()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.md5.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.md5 = self.md5.hexdigest()
+        return file
@@ -4,6 +4,7 @@ import logging
 import os
 import re
 import tempfile
+from collections import Counter
 from functools import partial
 
 from dj.choices import Choices, Country
@@ -90,6 +91,52 @@ def _check_user_assigned(instances):
     return errors
 
 
+def _get_new_licence_assignments(instances, licences):
+    """
+    Return (not saved) assignments of licences to instances which don't have
+    them assigned yet (existing assignments are read in single query).
+    """
+    existing = set(BaseObjectLicence.objects.filter(
+        base_object__in=[instance.pk for instance in instances],
+        licence__in=[licence.pk for licence in licences],
+    ).values_list('base_object_id', 'licence_id'))
+    return [
+        BaseObjectLicence(base_object_id=instance.pk, licence_id=licence.pk)
+        for instance in instances
+        for licence in licences
+        if (instance.pk, licence.pk) not in existing
+    ]
+
+
+def _check_licences_capacity(assignments):
+    """
+    Check if there is enough free licences for all new assignments.
+
+    Raises:
+        ValidationError if any licence has not enough free items
+    """
+    required = Counter(assignment.licence_id for assignment in assignments)
+    errors = []
+    for licence in Licence.objects_used_free.filter(pk__in=required):
+        if required[licence.pk] > licence.free:
+            errors.append(_(
+                'Not enough free licences %(licence)s (required: '
+                '%(required)s, free: %(free)s)'
+            ) % {
+                'licence': licence.niw,
+                'required': required[licence.pk],
+                'free': licence.free,
+            })
+    if errors:
+        raise ValidationError(errors)
+
+
+def _validate_licences_capacity(instances, data):
+    _check_licences_capacity(
+        _get_new_licence_assignments(instances, data['licences'])
+    )
+
+
 def autocomplete_if_release_report(actions, objects, field_name='user'):
     """
     Returns value of the first item in the list objects of the field_name
@@ -142,6 +189,14 @@ class BackOfficeAsset(Regionalizable, Asset):
         OfficeInfrastructure, null=True, blank=True
     )
 
+    # fields which transitions could update in bulk (without `save`) - `save`
+    # normalizes only barcode and sn and `post_save` receivers handle
+    # created instances only
+    transition_bulk_update_fields = (
+        'status', 'user', 'owner', 'location', 'loan_end_date', 'warehouse',
+        'office_infrastructure', 'remarks', 'task_url', 'hostname',
+    )
+
     class Meta:
         verbose_name = _('Back Office Asset')
         verbose_name_plural = _('Back Office Assets')
@@ -200,6 +255,21 @@ class BackOfficeAsset(Regionalizable, Asset):
             status=BackOfficeAssetStatus.liquidated.id
         )
 
+    @classmethod
+    def can_bulk_update_transition(cls, field, target):
+        """
+        Instances could be updated in bulk (without `pre_save` signal) when
+        hostname is not assigned on change of status (see
+        `hostname_assigning`).
+        """
+        auto_assign_hostname = getattr(
+            settings, 'BACK_OFFICE_ASSET_AUTO_ASSIGN_HOSTNAME', None
+        )
+        return not (
+            auto_assign_hostname and
+            target == BackOfficeAssetStatus.in_progress.id
+        )
+
     @classmethod
     @transition_action(
         form_fields={
@@ -211,6 +281,7 @@ class BackOfficeAsset(Regionalizable, Asset):
                 )
             }
         },
+        updated_fields=['user'],
     )
     def assign_user(cls, instances, request, **kwargs):
         user = get_user_model().objects.get(pk=int(kwargs['user']))
@@ -228,14 +299,16 @@ class BackOfficeAsset(Regionalizable, Asset):
                 'autocomplete_model': 'licences.BaseObjectLicence',
                 'widget_options': {'multi': True},
             }
-        }
+        },
+        modifies_instances=False,
+        form_validation=_validate_licences_capacity,
     )
     def assign_licence(cls, instances, request, **kwargs):
-        for instance in instances:
-            for obj in kwargs['licences']:
-                BaseObjectLicence.objects.get_or_create(
-                    base_object=instance, licence_id=obj.id,
-                )
+        assignments = _get_new_licence_assignments(
+            instances, kwargs['licences']
+        )
+        _check_licences_capacity(assignments)
+        BaseObjectLicence.objects.bulk_create(assignments)
 
     @classmethod
     @transition_action(
@@ -253,6 +326,7 @@ class BackOfficeAsset(Regionalizable, Asset):
             'hostname might be generated for asset (only for particular model '
             'categories and only if owner\'s country has changed)'
         ),
+        updated_fields=['owner'],
     )
     def assign_owner(cls, instances, request, **kwargs):
         owner = get_user_model().objects.get(pk=int(kwargs['owner']))
@@ -261,7 +335,8 @@ class BackOfficeAsset(Regionalizable, Asset):
 
     @classmethod
     @transition_action(
-        run_after=['loan_report', 'return_report']
+        run_after=['loan_report', 'return_report'],
+        updated_fields=['owner'],
     )
     def unassign_owner(cls, instances, request, **kwargs):
         for instance in instances:
@@ -272,7 +347,8 @@ class BackOfficeAsset(Regionalizable, Asset):
 
     @classmethod
     @transition_action(
-        run_after=['loan_report', 'return_report']
+        run_after=['loan_report', 'return_report'],
+        updated_fields=['user'],
     )
     def unassign_user(cls, instances, request, **kwargs):
         for instance in instances:
@@ -291,13 +367,14 @@ class BackOfficeAsset(Regionalizable, Asset):
                 )
             }
         },
+        updated_fields=['loan_end_date'],
     )
     def assign_loan_end_date(cls, instances, request, **kwargs):
         for instance in instances:
             instance.loan_end_date = kwargs['loan_end_date']
 
     @classmethod
-    @transition_action()
+    @transition_action(updated_fields=['loan_end_date'])
     def unassign_loan_end_date(cls, instances, request, **kwargs):
         for instance in instances:
             instance.loan_end_date = None
@@ -309,7 +386,8 @@ class BackOfficeAsset(Regionalizable, Asset):
                 'field': forms.CharField(label=_('Warehouse')),
                 'autocomplete_field': 'warehouse'
             }
-        }
+        },
+        updated_fields=['warehouse'],
     )
     def assign_warehouse(cls, instances, request, **kwargs):
         warehouse = Warehouse.objects.get(pk=int(kwargs['warehouse']))
@@ -324,6 +402,7 @@ class BackOfficeAsset(Regionalizable, Asset):
                 'autocomplete_field': 'office_infrastructure'
             }
         },
+        updated_fields=['office_infrastructure'],
     )
     def assign_office_infrastructure(cls, instances, request, **kwargs):
         office_inf = OfficeInfrastructure.objects.get(
@@ -338,7 +417,8 @@ class BackOfficeAsset(Regionalizable, Asset):
             'remarks': {
                 'field': forms.CharField(label=_('Remarks')),
             }
-        }
+        },
+        updated_fields=['remarks'],
     )
     def add_remarks(cls, instances, request, **kwargs):
         for instance in instances:
@@ -352,14 +432,15 @@ class BackOfficeAsset(Regionalizable, Asset):
             'task_url': {
                 'field': forms.URLField(label=_('task URL')),
             }
-        }
+        },
+        updated_fields=['task_url'],
     )
     def assign_task_url(cls, instances, request, **kwargs):
         for instance in instances:
             instance.task_url = kwargs['task_url']
 
     @classmethod
-    @transition_action()
+    @transition_action(modifies_instances=False)
     def unassign_licences(cls, instances, request, **kwargs):
         BaseObjectLicence.objects.filter(base_object__in=instances).delete()
 
@@ -373,6 +454,7 @@ class BackOfficeAsset(Regionalizable, Asset):
                 ),
             }
         },
+        updated_fields=['hostname'],
     )
     def change_hostname(cls, instances, request, **kwargs):
         country_id = kwargs['country']
@@ -395,7 +477,8 @@ class BackOfficeAsset(Regionalizable, Asset):
                 'autocomplete_field': 'owner',
                 'condition': lambda obj, actions: bool(obj.owner),
             }
-        }
+        },
+        updated_fields=['user', 'owner', 'location'],
     )
     def change_user_and_owner(cls, instances, request, **kwargs):
         UserModel = get_user_model()  # noqa
@@ -468,6 +551,7 @@ class BackOfficeAsset(Regionalizable, Asset):
             }
         },
         return_attachment=True,
+        modifies_instances=False,
         run_after=['assign_owner', 'assign_user']
     )
     def release_report(cls, instances, request, **kwargs):
@@ -489,6 +573,7 @@ class BackOfficeAsset(Regionalizable, Asset):
             }
         },
         return_attachment=True,
+        modifies_instances=False,
         precondition=_check_user_assigned,
     )
     def return_report(cls, instances, request, **kwargs):
@@ -510,6 +595,7 @@ class BackOfficeAsset(Regionalizable, Asset):
             }
         },
         return_attachment=True,
+        modifies_instances=False,
         run_after=['assign_owner', 'assign_user', 'assign_loan_end_date']
     )
     def loan_report(cls, instances, request, **kwargs):
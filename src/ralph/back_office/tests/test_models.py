@@ -3,8 +3,13 @@ from datetime import datetime
 from unittest.mock import patch
 
 from dj.choices import Country
+from django.contrib.auth.models import Permission
 from django.contrib.messages.storage.fallback import FallbackStorage
+from django.core.exceptions import ValidationError
+from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
 from ralph.accounts.tests.factories import RegionFactory
@@ -17,7 +22,10 @@ from ralph.assets.tests.factories import (
     ServiceEnvironmentFactory
 )
 from ralph.back_office.models import BackOfficeAsset, BackOfficeAssetStatus
-from ralph.back_office.tests.factories import BackOfficeAssetFactory
+from ralph.back_office.tests.factories import (
+    BackOfficeAssetFactory,
+    WarehouseFactory
+)
 from ralph.data_center.models import DataCenterAsset
 from ralph.data_center.tests.factories import RackFactory
 from ralph.lib.external_services import ExternalService
@@ -27,6 +35,7 @@ from ralph.lib.transitions.models import (
     TransitionNotAllowedError
 )
 from ralph.lib.transitions.tests import TransitionTestCase
+from ralph.licences.models import BaseObjectLicence
 from ralph.licences.tests.factories import LicenceFactory
 from ralph.reports.factories import ReportTemplateFactory
 from ralph.tests import RalphTestCase
@@ -311,6 +320,73 @@ class TestBackOfficeAssetTransitions(TransitionTestCase, RalphTestCase):
             [licence.id for licence in licences],
         )
 
+    def test_assign_licence_skips_existing_assignments(self):
+        assets = [BackOfficeAssetFactory() for _ in range(2)]
+        licence = LicenceFactory(number_bought=2)
+        BaseObjectLicence.objects.create(
+            base_object=assets[0], licence=licence
+        )
+
+        with self.assertNumQueries(3):
+            BackOfficeAsset.assign_licence(
+                instances=assets, request=None, licences=[licence],
+            )
+
+        self.assertEqual(
+            BaseObjectLicence.objects.filter(licence=licence).count(), 2
+        )
+
+    def test_assign_licence_checks_capacity_of_all_instances(self):
+        assets = [BackOfficeAssetFactory() for _ in range(3)]
+        licence = LicenceFactory(number_bought=2)
+
+        with self.assertRaisesRegex(
+            ValidationError, 'required: 3, free: 2'
+        ):
+            BackOfficeAsset.assign_licence(
+                instances=assets, request=None, licences=[licence],
+            )
+
+        self.assertFalse(
+            BaseObjectLicence.objects.filter(licence=licence).exists()
+        )
+
+    def test_transition_actions_update_assets_in_bulk(self):
+        assets = [
+            BackOfficeAssetFactory(remarks='remark {}'.format(i))
+            for i in range(3)
+        ]
+        warehouse = WarehouseFactory()
+        _, transition, _ = self._create_transition(
+            model=self.bo_asset,
+            name='test',
+            source=[BackOfficeAssetStatus.new.id],
+            target=BackOfficeAssetStatus.used.id,
+            actions=['assign_warehouse', 'add_remarks']
+        )
+        with CaptureQueriesContext(connection) as queries:
+            run_field_transition(
+                assets,
+                field='status',
+                transition_obj_or_name=transition,
+                data={
+                    'assign_warehouse__warehouse': warehouse.id,
+                    'add_remarks__remarks': 'moved',
+                },
+                request=self.request
+            )
+        # single update of every modified table (back office asset and base
+        # object)
+        self.assertEqual(len([
+            query for query in queries.captured_queries
+            if 'UPDATE ' in query['sql']
+        ]), 2)
+        for i, asset in enumerate(assets):
+            asset = BackOfficeAsset.objects.get(pk=asset.pk)
+            self.assertEqual(asset.status, BackOfficeAssetStatus.used.id)
+            self.assertEqual(asset.warehouse, warehouse)
+            self.assertEqual(asset.remarks, 'remark {}\nmoved'.format(i))
+
     def test_change_hostname(self):
         _, transition, _ = self._create_transition(
             model=self.bo_asset,
@@ -359,6 +435,42 @@ class TestBackOfficeAssetTransitions(TransitionTestCase, RalphTestCase):
         )
         self.assertEqual(self.bo_asset.hostname, 'USPC01001')
 
+    def _get_bulk_transition_response(self, assets):
+        _, transition, _ = self._create_transition(
+            model=self.bo_asset,
+            name='test',
+            source=[BackOfficeAssetStatus.new.id],
+            target=BackOfficeAssetStatus.used.id,
+            actions=[]
+        )
+        user = UserFactory(is_staff=True)
+        user.regions.add(self.region_us)
+        user.user_permissions.add(*Permission.objects.filter(codename__in=[
+            transition.permission_info['codename'],
+            'can_view_extra_runbulktransitionview',
+        ]))
+        self.client.login(username=user.username, password='ralph')
+        url = reverse(
+            'admin:back_office_backofficeasset_transition_bulk',
+            args=(transition.pk,)
+        )
+        return self.client.get(
+            url, {'select': [asset.pk for asset in assets]}
+        )
+
+    def test_bulk_transition_forbidden_without_access_to_every_object(self):
+        asset_pl = BackOfficeAssetFactory(
+            model=self.model, region=self.region_pl
+        )
+        response = self._get_bulk_transition_response(
+            [self.bo_asset, asset_pl]
+        )
+        self.assertEqual(response.status_code, 403)
+
+    def test_bulk_transition_allowed_with_access_to_every_object(self):
+        response = self._get_bulk_transition_response([self.bo_asset])
+        self.assertNotEqual(response.status_code, 403)
+
     def test_return_report_when_user_not_assigned(self):
         _, transition, _ = self._create_transition(
             model=self.bo_asset,
@@ -4,6 +4,7 @@ from ralph.data_center.api.views import (
     AccessoryViewSet,
     DataCenterAssetViewSet,
     DataCenterViewSet,
+    NetworkViewSet,
     RackAccessoryViewSet,
     RackViewSet,
     ServerRoomViewSet
@@ -12,6 +13,7 @@ from ralph.data_center.api.views import (
 router.register(r'accessories', AccessoryViewSet)
 router.register(r'data-centers', DataCenterViewSet)
 router.register(r'data-center-assets', DataCenterAssetViewSet)
+router.register(r'networks', NetworkViewSet)
 router.register(r'racks', RackViewSet)
 router.register(r'rack-accessories', RackAccessoryViewSet)
 router.register(r'server-rooms', ServerRoomViewSet)
@@ -3,6 +3,7 @@ from rest_framework import serializers
 
 from ralph.api import RalphAPISerializer
 from ralph.assets.api.serializers import AssetSerializer
+from ralph.data_center.models.networks import IPAddress, Network
 from ralph.data_center.models.physical import (
     Accessory,
     DataCenter,
@@ -68,3 +69,25 @@ class DataCenterAssetSerializer(AssetSerializer):
     class Meta(AssetSerializer.Meta):
         model = DataCenterAsset
         depth = 1
+
+
+class NetworkSerializer(RalphAPISerializer):
+    class Meta:
+        model = Network
+        fields = (
+            'id', 'url', 'name', 'address', 'gateway', 'reserved',
+            'reserved_top_margin', 'remarks', 'vlan', 'data_center',
+            'min_ip', 'max_ip', 'ignore_addresses', 'dhcp_broadcast',
+            'dhcp_config',
+        )
+        read_only_fields = ('min_ip', 'max_ip')
+
+
+class ReserveIPsSerializer(serializers.Serializer):
+    count = serializers.IntegerField(min_value=1)
+
+
+class ReservedIPAddressSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = IPAddress
+        fields = ('id', 'address', 'number', 'is_public')
@@ -1,4 +1,8 @@
 # -*- coding: utf-8 -*-
+from rest_framework import status
+from rest_framework.decorators import detail_route
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
 
 from ralph.api import RalphAPIViewSet
 from ralph.assets.api.views import BaseObjectViewSet
@@ -7,10 +11,14 @@ from ralph.data_center.api.serializers import (
     AccessorySerializer,
     DataCenterAssetSerializer,
     DataCenterSerializer,
+    NetworkSerializer,
     RackAccessorySerializer,
     RackSerializer,
+    ReservedIPAddressSerializer,
+    ReserveIPsSerializer,
     ServerRoomSerializer
 )
+from ralph.data_center.models.networks import Network, NotEnoughFreeIPsError
 from ralph.data_center.models.physical import (
     Accessory,
     DataCenter,
@@ -66,3 +74,29 @@ class ServerRoomViewSet(RalphAPIViewSet):
 class DataCenterViewSet(RalphAPIViewSet):
     queryset = DataCenter.objects.all()
     serializer_class = DataCenterSerializer
+
+
+class NetworkViewSet(RalphAPIViewSet):
+    queryset = Network.objects.all()
+    serializer_class = NetworkSerializer
+
+    @detail_route(methods=['post'], url_path='reserve-ips')
+    def reserve_ips(self, request, pk=None):
+        """
+        Reserve `count` next free addresses in the network.
+        """
+        if not request.user.has_perm('data_center.add_ipaddress'):
+            raise PermissionDenied()
+        network = self.get_object()
+        serializer = ReserveIPsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        try:
+            ips = network.reserve_free_ips(serializer.validated_data['count'])
+        except NotEnoughFreeIPsError as e:
+            return Response(
+                {'count': [str(e)]}, status=status.HTTP_400_BAD_REQUEST
+            )
+        return Response(
+            ReservedIPAddressSerializer(ips, many=True).data,
+            status=status.HTTP_201_CREATED
+        )
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+import ipaddress
+import random
+from itertools import chain
+
+from django.core.management.base import BaseCommand
+
+from ralph.data_center.models.networks import Network, NetworkIndex
+from ralph.helpers import Timer
+
+
+def _generate_networks(count):
+    """
+    Generate (not saved) networks: /16 networks under 10.0.0.0/8, each with
+    /20 and /24 subnetworks.
+    """
+    networks = []
+    for net16 in ipaddress.ip_network('10.0.0.0/8').subnets(new_prefix=16):
+        for net in chain(
+            [net16],
+            net16.subnets(new_prefix=20),
+            net16.subnets(new_prefix=24),
+        ):
+            if len(networks) >= count:
+                return networks
+            min_ip = int(net.network_address)
+            networks.append(Network(
+                name=str(net),
+                address=str(net),
+                min_ip=min_ip,
+                max_ip=min_ip + net.num_addresses,
+            ))
+    return networks
+
+
+class Command(BaseCommand):
+
+    help = "Measure performance of networks containment index"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-n', '--networks',
+            type=int,
+            nargs='+',
+            default=[10000, 50000],
+            help='number of networks to generate',
+        )
+        parser.add_argument(
+            '-l', '--lookups',
+            type=int,
+            default=100000,
+            help='number of smallest containing network lookups',
+        )
+
+    def handle(self, *args, **options):
+        for count in options['networks']:
+            networks = _generate_networks(count)
+            self.stdout.write('{} networks:'.format(len(networks)))
+            with Timer('build index', self.stdout):
+                index = NetworkIndex(networks)
+            with Timer('build tree', self.stdout):
+                index.get_tree()
+            with Timer('first level children of each network', self.stdout):
+                for net in networks:
+                    index.get_subnetworks(net.min_ip, net.max_ip)
+            ips = [
+                random.randint(networks[0].min_ip, networks[-1].max_ip)
+                for _ in range(options['lookups'])
+            ]
+            with Timer(
+                '{} smallest containing lookups'.format(len(ips)), self.stdout
+            ):
+                for ip in ips:
+                    index.get_smallest_containing(ip)
@@ -0,0 +1,28 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from ralph.data_center.models.networks import (
+    RECONCILIATION_CHUNK_SIZE,
+    resolve_ip_hostnames
+)
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Resolve hostnames of IP addresses without hostname (ex. saved when "
+        "CHECK_IP_HOSTNAME_DEFERRED is on). Should be run periodically."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=RECONCILIATION_CHUNK_SIZE,
+            help='number of IP addresses resolved (and saved) at once',
+        )
+
+    def handle(self, *args, **options):
+        resolved = resolve_ip_hostnames(chunk_size=options['chunk_size'])
+        self.stdout.write('{} hostnames resolved'.format(resolved))
@@ -1,9 +1,19 @@
 # -*- coding: utf-8 -*-
+import bisect
+import copy
 import ipaddress
+import operator
+from collections import namedtuple
+from itertools import islice
+from time import monotonic
 
 from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, Max, Sum, Value, When
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
 from django.utils.translation import ugettext_lazy as _
 
 from ralph.assets.models.assets import BaseObject
@@ -11,6 +21,9 @@ from ralph.data_center.models.physical import DataCenter, Rack
 from ralph.lib import network
 from ralph.lib.mixins.models import LastSeenMixin, NamedMixin, TimeStampMixin
 
+# number of addresses processed in single query during reconciliation
+RECONCILIATION_CHUNK_SIZE = 500
+
 
 def network_validator(value):
     try:
@@ -19,52 +32,174 @@ def network_validator(value):
         raise ValidationError(exc.message)
 
 
+class NotEnoughFreeIPsError(Exception):
+    pass
+
+
 def get_network_tree(qs=None):
     """
     Returns tree of networks based on L3 containment.
     """
-    if not qs:
-        qs = Network.objects.all()
-    tree = []
-    all_networks = [
-        (net.max_ip, net.min_ip, net)
-        for net in qs.order_by('min_ip', '-max_ip')
-    ]
+    if qs is None:
+        index = get_network_index()
+    else:
+        index = NetworkIndex(qs)
+    return index.get_tree()
+
+
+def _exclude_ranges(items, networks, key=None):
+    """
+    Yield items (ordered by their number) which are not in any of networks
+    (ordered by min_ip and not overlapping each other).
+    """
+    networks = iter(networks)
+    net = next(networks, None)
+    for item in items:
+        number = key(item) if key else item
+        while net is not None and net.max_ip < number:
+            net = next(networks, None)
+        if net is None or number < net.min_ip:
+            yield item
+
+
+def _copy_network(net):
+    """
+    Return copy of network from index, so callers could modify (and save) it
+    without affecting index shared by all of them.
+    """
+    net_copy = copy.copy(net)
+    net_copy._state = copy.copy(net._state)
+    return net_copy
+
+
+class NetworkIndex(object):
+    """
+    In-memory containment index of networks.
 
-    def get_subnetworks_qs(network):
-        for net in all_networks:
-            if net[0] == network.max_ip and net[1] == network.min_ip:
+    Networks are CIDR blocks, so every two networks are either disjoint or
+    one contains another. When networks are ordered by `min_ip` and then
+    by `max_ip` descending, every network is directly followed by all of its
+    descendants - index stores position of the end of each such subtree and
+    parent of each network, which allows to get children of network or
+    the smallest network containing address without scanning all networks.
+
+    Copies of indexed networks are returned, so index could be shared.
+    """
+    def __init__(self, networks, fingerprint=None):
+        self.fingerprint = fingerprint
+        self.networks = sorted(
+            (net for net in networks if net.min_ip is not None),
+            key=lambda net: (net.min_ip, -net.max_ip)
+        )
+        self._min_ips = [net.min_ip for net in self.networks]
+        self._ends = [len(self.networks)] * len(self.networks)
+        self._parents = [None] * len(self.networks)
+        stack = []
+        for i, net in enumerate(self.networks):
+            while stack and self.networks[stack[-1]].max_ip < net.max_ip:
+                self._ends[stack.pop()] = i
+            if stack:
+                self._parents[i] = stack[-1]
+            stack.append(i)
+
+    def __len__(self):
+        return len(self.networks)
+
+    def _iter_children(self, start, end):
+        i = start
+        while i < end:
+            yield i
+            i = self._ends[i]
+
+    def get_subnetworks(self, min_ip, max_ip):
+        """
+        Return first level of networks contained in (min_ip, max_ip) range
+        (excluding network with exactly the same range).
+        """
+        subnetworks = []
+        i = bisect.bisect_left(self._min_ips, min_ip)
+        while i < len(self.networks) and self._min_ips[i] <= max_ip:
+            net = self.networks[i]
+            if net.max_ip > max_ip or (
+                net.min_ip == min_ip and net.max_ip == max_ip
+            ):
+                i += 1
                 continue
-            if net[0] <= network.max_ip and net[1] >= network.min_ip:
-                yield net[2]
-
-    def recursive_tree(network):
-        subs = []
-        sub_qs = get_subnetworks_qs(network)
-        subnetworks = network.get_subnetworks(networks=sub_qs)
-        subs = [
-            {
-                'network': sub,
-                'subnetworks': recursive_tree(sub)
-            } for sub in subnetworks
+            subnetworks.append(_copy_network(net))
+            i = self._ends[i]
+        return subnetworks
+
+    def get_smallest_containing(self, ip):
+        """
+        Return the smallest network containing ip (passed as int) or None
+        if there is no such network.
+        """
+        i = bisect.bisect_right(self._min_ips, ip) - 1
+        if i < 0:
+            return None
+        while i is not None:
+            if self.networks[i].max_ip >= ip:
+                return _copy_network(self.networks[i])
+            i = self._parents[i]
+        return None
+
+    def get_tree(self):
+        def subtree(i):
+            return {
+                'network': _copy_network(self.networks[i]),
+                'subnetworks': [
+                    subtree(j)
+                    for j in self._iter_children(i + 1, self._ends[i])
+                ]
+            }
+        return [
+            subtree(i) for i in self._iter_children(0, len(self.networks))
         ]
-        for i, net in enumerate(all_networks):
-            if net[0] == network.max_ip and net[1] == network.min_ip:
-                all_networks.pop(i)
-                break
-        return subs
 
-    while True:
-        try:
-            tree.append({
-                'network': all_networks[0][2],
-                'subnetworks': recursive_tree(all_networks[0][2])
-            })
-        except IndexError:
-            # recursive tree uses pop, so at some point all_networks[0]
-            # will rise IndexError, therefore algorithm is finished
-            break
-    return tree
+
+# (index, monotonic time of the last check of networks fingerprint)
+_network_index = (None, None)
+
+
+def _get_networks_fingerprint():
+    # networks could be changed by another process or by queryset update
+    # (without signals) - count, the latest modification time and sums of
+    # ranges are compared to detect it with single cheap query
+    result = Network.objects.aggregate(
+        count=Count('pk'), last=Max('modified'),
+        min_ips=Sum('min_ip'), max_ips=Sum('max_ip'),
+    )
+    return (
+        result['count'], result['last'], result['min_ips'], result['max_ips']
+    )
+
+
+def get_network_index():
+    """
+    Return (cached) index of all networks.
+
+    Index is built again when network is changed in this process. Changes
+    made by other processes are detected by fingerprint of networks, which
+    is checked at most every `NETWORK_INDEX_CHECK_INTERVAL` seconds.
+    """
+    global _network_index
+    index, checked = _network_index
+    now = monotonic()
+    if (
+        index is not None and
+        now < checked + settings.NETWORK_INDEX_CHECK_INTERVAL
+    ):
+        return index
+    fingerprint = _get_networks_fingerprint()
+    if index is None or index.fingerprint != fingerprint:
+        index = NetworkIndex(Network.objects.all(), fingerprint)
+    _network_index = (index, now)
+    return index
+
+
+def invalidate_network_index():
+    global _network_index
+    _network_index = (None, None)
 
 
 class NetworkKind(NamedMixin, models.Model):
@@ -301,29 +436,23 @@ class Network(NamedMixin, TimeStampMixin, models.Model):
         Return list of all subnetworks this network contains.
         Only first level of children networks are returned.
         """
-        if not networks:
-            networks = Network.objects.filter(
-                min_ip__gte=self.min_ip,
-                max_ip__lte=self.max_ip,
-            ).exclude(
-                pk=self.pk,
-            ).order_by('-min_ip', 'max_ip')
-        subnets = sorted(list(networks), key=lambda net: net.get_netmask())
-        new_subnets = list(subnets)
-        for net, netw in enumerate(subnets):
-            net_address = ipaddress.ip_network(netw.address)
-            for i, sub in enumerate(subnets):
-                sub_addr = ipaddress.ip_network(sub.address)
-                if sub_addr != net_address and sub_addr in net_address:
-                    if sub in new_subnets:
-                        new_subnets.remove(sub)
-        new_subnets = sorted(new_subnets, key=lambda net: net.min_ip)
-        return new_subnets
+        if networks is None:
+            index = get_network_index()
+        else:
+            index = NetworkIndex(networks)
+        return index.get_subnetworks(self.min_ip, self.max_ip)
 
     @classmethod
     def from_ip(cls, ip):
         """Find the smallest network containing that IP."""
-        return cls.all_from_ip(ip)[0]
+        network = get_network_index().get_smallest_containing(
+            int(ipaddress.ip_address(ip))
+        )
+        if network is None:
+            raise cls.DoesNotExist(
+                'Network containing {} does not exist'.format(ip)
+            )
+        return network
 
     @classmethod
     def all_from_ip(cls, ip):
@@ -346,17 +475,21 @@ class Network(NamedMixin, TimeStampMixin, models.Model):
         return self.network.num_addresses - 1
 
     def get_subaddresses(self):
-        subnetworks = self.get_subnetworks()
-        addresses = list(IPAddress.objects.filter(
+        """
+        Return addresses from this network which are not in any of its
+        subnetworks.
+        """
+        return list(_exclude_ranges(
+            self._get_addresses_qs(),
+            self.get_subnetworks(),
+            key=operator.attrgetter('number'),
+        ))
+
+    def _get_addresses_qs(self):
+        return IPAddress.objects.filter(
             number__gte=self.min_ip,
             number__lte=self.max_ip,
-        ).order_by('number'))
-        new_addresses = list(addresses)
-        for addr in addresses:
-            for subnet in subnetworks:
-                if addr in subnet and addr in new_addresses:
-                    new_addresses.remove(addr)
-        return new_addresses
+        ).order_by('number')
 
     def get_free_ips(self):
         """
@@ -364,14 +497,93 @@ class Network(NamedMixin, TimeStampMixin, models.Model):
         """
         subnetworks = self.get_subnetworks()
         total_ips = self.get_total_ips()
-        # TODO: performance - reduce SQL queries
         for subnet in subnetworks:
             total_ips -= subnet.get_total_ips()
-        addresses = self.get_subaddresses()
-        total_ips -= len(addresses)
+        numbers = self._get_addresses_qs().values_list(
+            'number', flat=True
+        ).iterator()
+        total_ips -= sum(1 for _ in _exclude_ranges(numbers, subnetworks))
         total_ips -= self.reserved_top_margin + self.reserved
         return total_ips
 
+    def get_allocation_range(self):
+        """
+        Return first and last number of addresses which could be assigned
+        automatically (network and broadcast addresses and reserved addresses
+        are omitted).
+        """
+        first = self.min_ip + max(self.reserved, 1)
+        # max_ip is the first address after the network (broadcast + 1)
+        last = self.max_ip - 2 - self.reserved_top_margin
+        return first, last
+
+    def _iter_free_numbers(self):
+        """
+        Yield (ascending) numbers of free addresses in allocation range which
+        are not in any subnetwork. Used addresses are fetched lazily, so only
+        part of the range which has to be checked is read.
+        """
+        first, last = self.get_allocation_range()
+        # subnetworks are read from database (not from index, which could be
+        # stale), since addresses are reserved based on them
+        subnetworks = iter(self.get_subnetworks(Network.objects.filter(
+            min_ip__gte=self.min_ip, max_ip__lte=self.max_ip
+        )))
+        used_numbers = IPAddress.objects.filter(
+            number__gte=first, number__lte=last,
+        ).order_by('number').values_list('number', flat=True).iterator()
+        subnet = next(subnetworks, None)
+        used = next(used_numbers, None)
+        number = first
+        while number <= last:
+            # max_ip of subnetwork is the first address after it
+            if subnet is not None and subnet.max_ip <= number:
+                subnet = next(subnetworks, None)
+            elif subnet is not None and subnet.min_ip <= number:
+                number = subnet.max_ip
+            elif used is not None and used < number:
+                used = next(used_numbers, None)
+            elif used == number:
+                number += 1
+            else:
+                yield number
+                number += 1
+
+    def reserve_free_ips(self, count):
+        """
+        Reserve (create) `count` next free addresses in this network, omitting
+        reserved addresses and addresses of subnetworks.
+
+        Network is locked during reservation, so concurrent reservations in
+        the same network don't get the same addresses.
+
+        Raises NotEnoughFreeIPsError if there is not enough free addresses.
+
+        Returns:
+            list of created IPAddress objects (ordered by address)
+        """
+        with transaction.atomic():
+            network = Network.objects.select_for_update().get(pk=self.pk)
+            numbers = list(islice(network._iter_free_numbers(), count))
+            if len(numbers) < count:
+                raise NotEnoughFreeIPsError(
+                    'Only {} free addresses left in network {}'.format(
+                        len(numbers), network
+                    )
+                )
+            ips = []
+            for number in numbers:
+                address = ipaddress.ip_address(number)
+                ips.append(IPAddress(
+                    address=str(address),
+                    number=number,
+                    is_public=not address.is_private,
+                ))
+            IPAddress.objects.bulk_create(ips)
+        return list(
+            IPAddress.objects.filter(number__in=numbers).order_by('number')
+        )
+
     def get_ip_usage_range(self):
         """
         Returns list of entities this network contains (addresses and subnets)
@@ -447,6 +659,12 @@ class Network(NamedMixin, TimeStampMixin, models.Model):
             return None
 
 
+@receiver(post_save, sender=Network)
+@receiver(post_delete, sender=Network)
+def network_changed_handler(sender, **kwargs):
+    invalidate_network_index()
+
+
 class NetworkTerminator(NamedMixin, models.Model):
 
     class Meta:
@@ -517,9 +735,187 @@ class IPAddress(LastSeenMixin, TimeStampMixin, models.Model):
         if settings.CHECK_IP_HOSTNAME_ON_SAVE:
             if not self.address and self.hostname:
                 self.address = network.hostname(self.hostname, reverse=True)
-            if not self.hostname and self.address:
+            # in deferred mode hostname is resolved later (in batch) by
+            # `resolve_ip_hostnames`
+            if (
+                not self.hostname and self.address and
+                not settings.CHECK_IP_HOSTNAME_DEFERRED
+            ):
                 self.hostname = network.hostname(self.address)
         self.number = int(ipaddress.ip_address(self.address))
         ip = ipaddress.ip_address(self.address)
         self.is_public = not ip.is_private
         super(IPAddress, self).save(*args, **kwargs)
+
+
+IPConflict = namedtuple('IPConflict', ['address', 'base_object_id', 'owner_id'])
+
+
+class IPReconciliationResult(object):
+    """
+    Result of IP addresses reconciliation: lists of created, claimed (assigned
+    existing) and released addresses and list of conflicts (`IPConflict`) -
+    addresses already used by another base object.
+    """
+    def __init__(self):
+        self.created = []
+        self.claimed = []
+        self.released = []
+        self.conflicts = []
+
+
+def _chunks(items, size=RECONCILIATION_CHUNK_SIZE):
+    items = list(items)
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+def reconcile_ip_addresses(assignments, resolve_hostnames=None):
+    """
+    Assign IP addresses to base objects using constant number of queries
+    (per chunk of addresses).
+
+    Args:
+        assignments: dict with base object (or its id) as a key and all
+            addresses which it should have as a value - addresses of base
+            object not listed here are released
+        resolve_hostnames: resolve hostnames of created addresses (by
+            default when `CHECK_IP_HOSTNAME_ON_SAVE` setting is on and
+            hostnames are not resolved in deferred mode)
+
+    Returns:
+        IPReconciliationResult
+    """
+    if resolve_hostnames is None:
+        resolve_hostnames = (
+            settings.CHECK_IP_HOSTNAME_ON_SAVE and
+            not settings.CHECK_IP_HOSTNAME_DEFERRED
+        )
+    result = IPReconciliationResult()
+    desired = {
+        getattr(base_object, 'pk', base_object): set(addresses)
+        for base_object, addresses in assignments.items()
+    }
+    # address -> (ip id, base object id) of desired addresses and current
+    # addresses of base objects
+    existing = {}
+    lookups = [
+        ('address__in', set().union(*desired.values())),
+        ('base_object_id__in', desired.keys()),
+    ]
+    for lookup, values in lookups:
+        for chunk in _chunks(values):
+            for ip_id, address, owner_id in IPAddress.objects.filter(
+                **{lookup: chunk}
+            ).values_list('id', 'address', 'base_object_id'):
+                existing[address] = (ip_id, owner_id)
+
+    releases = {
+        address: ip_id
+        for address, (ip_id, owner_id) in existing.items()
+        if owner_id in desired and address not in desired[owner_id]
+    }
+    claims = {}
+    creates = {}
+    for base_object_id, addresses in sorted(desired.items()):
+        for address in sorted(addresses):
+            if address in creates:
+                owner_id = creates[address]
+            elif address in existing:
+                ip_id, owner_id = existing[address]
+                if owner_id is None or address in releases:
+                    # address is free or it's moved from another base object
+                    releases.pop(address, None)
+                    claims[ip_id] = base_object_id
+                    existing[address] = (ip_id, base_object_id)
+                    result.claimed.append(address)
+                    continue
+            else:
+                creates[address] = base_object_id
+                result.created.append(address)
+                continue
+            if owner_id != base_object_id:
+                result.conflicts.append(
+                    IPConflict(address, base_object_id, owner_id)
+                )
+
+    hostnames = {}
+    if resolve_hostnames:
+        hostnames = network.resolver.get_resolver().hostnames(creates.keys())
+    now = timezone.now()
+    with transaction.atomic():
+        for chunk in _chunks(releases.values()):
+            IPAddress.objects.filter(pk__in=chunk).update(
+                base_object=None, modified=now
+            )
+        for chunk in _chunks(claims.items()):
+            IPAddress.objects.filter(
+                pk__in=[ip_id for ip_id, _ in chunk]
+            ).update(
+                base_object_id=Case(
+                    *[
+                        When(pk=ip_id, then=Value(base_object_id))
+                        for ip_id, base_object_id in chunk
+                    ],
+                    output_field=models.IntegerField()
+                ),
+                modified=now,
+            )
+        new_ips = []
+        for address, base_object_id in creates.items():
+            ip = ipaddress.ip_address(address)
+            new_ips.append(IPAddress(
+                address=address,
+                base_object_id=base_object_id,
+                hostname=hostnames.get(address),
+                number=int(ip),
+                is_public=not ip.is_private,
+            ))
+        IPAddress.objects.bulk_create(
+            new_ips, batch_size=RECONCILIATION_CHUNK_SIZE
+        )
+    result.released = sorted(releases.keys())
+    return result
+
+
+def resolve_ip_hostnames(queryset=None, chunk_size=RECONCILIATION_CHUNK_SIZE):
+    """
+    Resolve (concurrently) hostnames of IP addresses without hostname (ex.
+    saved in deferred mode) and save them with single query per chunk.
+
+    Returns:
+        number of IP addresses which hostname was resolved
+    """
+    if queryset is None:
+        queryset = IPAddress.objects.filter(
+            models.Q(hostname__isnull=True) | models.Q(hostname='')
+        )
+    queryset = queryset.order_by('pk').values_list('pk', 'address')
+    dns_resolver = network.resolver.get_resolver()
+    resolved = 0
+    last_pk = 0
+    while True:
+        chunk = list(queryset.filter(pk__gt=last_pk)[:chunk_size])
+        if not chunk:
+            break
+        last_pk = chunk[-1][0]
+        hostnames = dns_resolver.hostnames(address for _, address in chunk)
+        found = [
+            (ip_id, hostnames[address])
+            for ip_id, address in chunk if hostnames.get(address)
+        ]
+        if found:
+            IPAddress.objects.filter(
+                pk__in=[ip_id for ip_id, _ in found]
+            ).update(
+                hostname=Case(
+                    *[
+                        When(pk=ip_id, then=Value(hostname))
+                        for ip_id, hostname in found
+                    ],
+                    output_field=models.CharField()
+                ),
+                modified=timezone.now(),
+            )
+        resolved += len(found)
+    return resolved
@@ -1,6 +1,7 @@
 # -*- coding: utf-8 -*-
+import logging
 import re
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from itertools import chain
 
 from django import forms
@@ -35,6 +36,8 @@ from ralph.lib.mixins.models import AdminAbsoluteUrlMixin
 from ralph.lib.transitions.decorators import transition_action
 from ralph.lib.transitions.fields import TransitionField
 
+logger = logging.getLogger(__name__)
+
 # i.e. number in range 1-16 and optional postfix 'A' or 'B'
 VALID_SLOT_NUMBER_FORMAT = re.compile('^([1-9][A,B]?|1[0-6][A,B]?)$')
 
@@ -210,10 +213,13 @@ class Rack(AdminAbsoluteUrlMixin, NamedMixin.NonUnique, models.Model):
     def get_orientation_desc(self):
         return RackOrientation.name_from_id(self.orientation)
 
-    def get_root_assets(self, side=None):
-        filter_kwargs = {
-            'rack': self,
-        }
+    @classmethod
+    def get_root_assets_queryset(cls, side=None):
+        """
+        Returns queryset of root assets (not blade servers) of any rack -
+        should be filtered by rack.
+        """
+        filter_kwargs = {}
         if side:
             filter_kwargs['orientation'] = side
         else:
@@ -226,13 +232,25 @@ class Rack(AdminAbsoluteUrlMixin, NamedMixin.NonUnique, models.Model):
             Q(slot_no='') | Q(slot_no=None), **filter_kwargs
         ).exclude(model__has_parent=True)
 
+    def get_root_assets(self, side=None):
+        return self.get_root_assets_queryset(side).filter(rack=self)
+
     def get_free_u(self):
-        u_list = [True] * self.max_u_height
         accessories = RackAccessory.objects.values_list(
             'position').filter(rack=self)
         dc_assets = self.get_root_assets().values_list(
             'position', 'model__height_of_device'
         )
+        return self.calculate_free_u(self.max_u_height, accessories, dc_assets)
+
+    @staticmethod
+    def calculate_free_u(max_u_height, accessories, dc_assets):
+        """
+        Calculate free U of rack with `max_u_height` from positions of
+        accessories (list of 1-tuples) and positions and heights of root
+        assets (list of 2-tuples).
+        """
+        u_list = [True] * max_u_height
 
         def fill_u_list(objects, height_of_device=lambda obj: 1):
             for obj in objects:
@@ -245,7 +263,7 @@ class Rack(AdminAbsoluteUrlMixin, NamedMixin.NonUnique, models.Model):
 
                 start = obj[0] - 1
                 end = min(
-                    self.max_u_height, obj[0] + int(height_of_device(obj)) - 1
+                    max_u_height, obj[0] + int(height_of_device(obj)) - 1
                 )
                 height = end - start
                 if height:
@@ -337,6 +355,11 @@ class DataCenterAsset(Asset):
     #     ).order_by('-address').first()
     #     return management_ip.address if management_ip else ''
 
+    # fields which transitions could update in bulk (without `save`) -
+    # neither `save` (updating rack of children) nor `post_save` receivers
+    # (rack occupancy, dashboard counters) depend on status
+    transition_bulk_update_fields = ('status',)
+
     class Meta:
         verbose_name = _('data center asset')
         verbose_name_plural = _('data center assets')
@@ -361,6 +384,25 @@ class DataCenterAsset(Asset):
     def get_orientation_desc(self):
         return Orientation.name_from_id(self.orientation)
 
+    @property
+    def ip_addresses(self):
+        return [ip.address for ip in self.ipaddress_set.all()]
+
+    @ip_addresses.setter
+    def ip_addresses(self, value):
+        # networks module depends on physical models
+        from ralph.data_center.models.networks import reconcile_ip_addresses
+        result = reconcile_ip_addresses({self: value})
+        for conflict in result.conflicts:
+            logger.warning(
+                'Cannot assign IP %s to %s - it is already in use by '
+                'another asset', conflict.address, self
+            )
+        # addresses could be prefetched
+        getattr(self, '_prefetched_objects_cache', {}).pop(
+            'ipaddress_set', None
+        )
+
     @property
     def cores_count(self):
         """Returns cores count assigned to device in Ralph"""
@@ -449,20 +491,41 @@ class DataCenterAsset(Asset):
         if errors:
             raise ValidationError(errors)
 
+    @classmethod
+    def get_related_assets_queryset(cls):
+        """
+        Returns queryset of blade servers (children of blade chassis) -
+        should be filtered by parent.
+        """
+        return cls.objects.select_related('model').filter(
+            orientation__in=[Orientation.front, Orientation.back],
+            model__has_parent=True,
+        )
+
     def get_related_assets(self):
-        """Returns the children of a blade chassis"""
-        orientations = [Orientation.front, Orientation.back]
-        assets_by_orientation = []
-        for orientation in orientations:
-            assets_by_orientation.append(list(
-                DataCenterAsset.objects.select_related('model').filter(
-                    parent=self,
-                    orientation=orientation,
-                    model__has_parent=True,
-                ).exclude(id=self.id)
-            ))
+        """
+        Returns the children of a blade chassis
+
+        Children could be prefetched (for many chassis at once) to
+        `prefetched_related_assets` attribute, using queryset returned by
+        `get_related_assets_queryset`.
+        """
+        if hasattr(self, 'prefetched_related_assets'):
+            children = self.prefetched_related_assets
+        else:
+            children = self.get_related_assets_queryset().filter(
+                parent=self
+            )
+        assets_by_orientation = OrderedDict(
+            (orientation, [])
+            for orientation in [Orientation.front, Orientation.back]
+        )
+        for child in children:
+            if child.id != self.id:
+                assets_by_orientation[child.orientation].append(child)
         assets = [
-            Gap.generate_gaps(assets) for assets in assets_by_orientation
+            Gap.generate_gaps(assets)
+            for assets in assets_by_orientation.values()
         ]
         return chain(*assets)
 
@@ -9,6 +9,8 @@ from ralph.assets.tests.factories import (
 )
 from ralph.data_center.models import (
     DataCenterAsset,
+    IPAddress,
+    Network,
     Orientation,
     Rack,
     RackAccessory,
@@ -249,3 +251,36 @@ class RackAccessoryAPITests(RalphAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.rack_accessory.refresh_from_db()
         self.assertEqual(self.rack_accessory.remarks, 'qwerty')
+
+
+class NetworkAPITests(RalphAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.network = Network.objects.create(
+            name='test', address='10.1.0.0/29', reserved=1,
+            reserved_top_margin=1,
+        )
+        IPAddress.objects.create(address='10.1.0.2')
+
+    def test_get_network_details(self):
+        url = reverse('network-detail', args=(self.network.id,))
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['address'], '10.1.0.0/29')
+
+    def test_reserve_ips(self):
+        url = reverse('network-reserve-ips', args=(self.network.id,))
+        response = self.client.post(url, {'count': 3}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [ip['address'] for ip in response.data],
+            ['10.1.0.1', '10.1.0.3', '10.1.0.4']
+        )
+        self.assertEqual(IPAddress.objects.count(), 4)
+
+    def test_reserve_ips_not_enough_addresses(self):
+        url = reverse('network-reserve-ips', args=(self.network.id,))
+        response = self.client.post(url, {'count': 5}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('count', response.data)
+        self.assertEqual(IPAddress.objects.count(), 1)
@@ -1,21 +1,32 @@
 # -*- coding: utf-8 -*-
+from unittest.mock import patch
+
 from ddt import data, ddt, unpack
 from django.core.exceptions import ValidationError
+from django.test.utils import override_settings
 
 from ralph.accounts.tests.factories import RegionFactory
 from ralph.back_office.models import BackOfficeAsset
 from ralph.back_office.tests.factories import WarehouseFactory
 from ralph.data_center.models.choices import DataCenterAssetStatus, Orientation
 from ralph.data_center.models.networks import (
+    get_network_index,
     get_network_tree,
     IPAddress,
-    Network
+    IPConflict,
+    Network,
+    NotEnoughFreeIPsError,
+    reconcile_ip_addresses
 )
 from ralph.data_center.models.physical import DataCenterAsset
 from ralph.data_center.tests.factories import (
     DataCenterAssetFactory,
     RackFactory
 )
+from ralph.lib.transitions import transition_action
+from ralph.lib.transitions.models import _can_bulk_update
+from ralph.licences.models import BaseObjectLicence
+from ralph.licences.tests.factories import BaseObjectLicenceFactory
 from ralph.tests import RalphTestCase
 
 
@@ -57,7 +68,7 @@ class NetworkTest(RalphTestCase):
 
     def test_get_subnetworks(self):
         res = self.net1.get_subnetworks()
-        correct = [self.net2, self.net3, self.net4]
+        correct = [self.net2, self.net3]
         self.assertEquals(res, correct)
 
         res = self.net3.get_subnetworks()
@@ -128,10 +139,6 @@ class NetworkTest(RalphTestCase):
                             }
                         ]
                     },
-                    {
-                        'network': self.net4,
-                        'subnetworks': [],
-                    }
                 ]
             },
             {
@@ -141,6 +148,98 @@ class NetworkTest(RalphTestCase):
         ]
         self.assertEquals(res, correct)
 
+    def test_get_network_tree_from_queryset(self):
+        res = get_network_tree(Network.objects.filter(
+            pk__in=[self.net1.pk, self.net4.pk]
+        ))
+        correct = [
+            {
+                'network': self.net1,
+                'subnetworks': [
+                    {
+                        'network': self.net4,
+                        'subnetworks': [],
+                    }
+                ]
+            },
+        ]
+        self.assertEquals(res, correct)
+
+    def test_from_ip(self):
+        self.assertEqual(Network.from_ip('192.168.133.10'), self.net4)
+        self.assertEqual(Network.from_ip('192.168.128.10'), self.net3)
+        self.assertEqual(Network.from_ip('192.168.0.1'), self.net2)
+        self.assertEqual(Network.from_ip('192.169.133.1'), self.net5)
+        with self.assertRaises(Network.DoesNotExist):
+            Network.from_ip('10.0.0.1')
+
+    def test_network_index_invalidated_on_change(self):
+        self.assertEqual(Network.from_ip('192.168.133.10'), self.net4)
+        net6 = Network.objects.create(
+            name='test6', address='192.168.133.0/25',
+        )
+        self.assertEqual(Network.from_ip('192.168.133.10'), net6)
+        self.assertEqual(self.net3.get_subnetworks(), [self.net4])
+        self.assertEqual(self.net4.get_subnetworks(), [net6])
+        net6.delete()
+        self.assertEqual(Network.from_ip('192.168.133.10'), self.net4)
+
+    def test_network_index_without_queries(self):
+        get_network_index()
+        # freshness of the index is checked only once per interval
+        with self.assertNumQueries(0):
+            get_network_tree()
+            self.net1.get_subnetworks()
+            Network.from_ip('192.168.133.10')
+
+    @override_settings(NETWORK_INDEX_CHECK_INTERVAL=10)
+    def test_network_index_detects_queryset_update_after_interval(self):
+        with patch('ralph.data_center.models.networks.monotonic') as time:
+            time.return_value = 1000
+            self.assertEqual(Network.from_ip('192.168.133.10'), self.net4)
+            # change without signals (ex. made by other process)
+            Network.objects.filter(pk=self.net4.pk).update(
+                address='10.0.0.0/24', min_ip=167772160, max_ip=167772416
+            )
+            time.return_value = 1009
+            self.assertEqual(Network.from_ip('192.168.133.10'), self.net4)
+            time.return_value = 1010
+            self.assertEqual(Network.from_ip('192.168.133.10'), self.net3)
+
+    def test_network_index_returns_copies(self):
+        network = Network.from_ip('192.168.133.10')
+        network.name = 'changed'
+        self.assertEqual(Network.from_ip('192.168.133.10').name, 'test4')
+        self.assertEqual(self.net3.get_subnetworks()[0].name, 'test4')
+
+    def test_reserve_free_ips(self):
+        ips = self.net3.reserve_free_ips(10)
+        self.assertEqual(
+            [ip.address for ip in ips],
+            ['192.168.128.{}'.format(i) for i in (5, 6, 7, 8, 9)] +
+            ['192.168.128.{}'.format(i) for i in (12, 13, 14, 15, 16)]
+        )
+        self.assertTrue(all(ip.pk for ip in ips))
+
+    def test_reserve_free_ips_omits_subnetworks(self):
+        net = Network.objects.create(
+            name='test6', address='10.1.0.0/24', reserved=1,
+        )
+        Network.objects.create(name='test7', address='10.1.0.0/25')
+        ips = net.reserve_free_ips(2)
+        self.assertEqual(
+            [ip.address for ip in ips], ['10.1.0.128', '10.1.0.129']
+        )
+
+    def test_reserve_free_ips_not_enough_addresses(self):
+        net = Network.objects.create(
+            name='test6', address='10.1.0.0/29', reserved=1,
+            reserved_top_margin=1,
+        )
+        self.assertEqual(len(net.reserve_free_ips(5)), 5)
+        with self.assertRaises(NotEnoughFreeIPsError):
+            net.reserve_free_ips(1)
+
     def test_ip_is_public_or_no(self):
         ip_list = [
             ('92.143.123.123', True),
@@ -152,6 +251,80 @@ class NetworkTest(RalphTestCase):
             self.assertEquals(new_ip_address.is_public, is_public)
 
 
+class IPReconciliationTest(RalphTestCase):
+    def setUp(self):
+        self.dc_asset = DataCenterAssetFactory()
+        self.dc_asset_2 = DataCenterAssetFactory()
+        IPAddress.objects.create(
+            address='10.0.0.1', base_object=self.dc_asset
+        )
+        IPAddress.objects.create(
+            address='10.0.0.2', base_object=self.dc_asset
+        )
+        IPAddress.objects.create(
+            address='10.0.0.3', base_object=self.dc_asset_2
+        )
+        IPAddress.objects.create(address='10.0.0.4')
+
+    def _get_addresses(self, base_object):
+        return set(IPAddress.objects.filter(
+            base_object=base_object
+        ).values_list('address', flat=True))
+
+    def test_reconcile_ip_addresses(self):
+        # 2 selects, release, claim and create (+ 2 for savepoint)
+        with self.assertNumQueries(7):
+            result = reconcile_ip_addresses({
+                self.dc_asset: ['10.0.0.1', '10.0.0.4', '10.0.0.5'],
+                self.dc_asset_2: ['10.0.0.3', '10.0.0.6'],
+            }, resolve_hostnames=False)
+        self.assertEqual(result.created, ['10.0.0.5', '10.0.0.6'])
+        self.assertEqual(result.claimed, ['10.0.0.4'])
+        self.assertEqual(result.released, ['10.0.0.2'])
+        self.assertEqual(result.conflicts, [])
+        self.assertEqual(
+            self._get_addresses(self.dc_asset),
+            {'10.0.0.1', '10.0.0.4', '10.0.0.5'}
+        )
+        self.assertEqual(
+            self._get_addresses(self.dc_asset_2), {'10.0.0.3', '10.0.0.6'}
+        )
+        ip = IPAddress.objects.get(address='10.0.0.6')
+        self.assertEqual(ip.number, 167772166)
+        self.assertFalse(ip.is_public)
+        self.assertIsNone(
+            IPAddress.objects.get(address='10.0.0.2').base_object
+        )
+
+    def test_reconcile_ip_addresses_moves_released_address(self):
+        result = reconcile_ip_addresses({
+            self.dc_asset: ['10.0.0.1'],
+            self.dc_asset_2: ['10.0.0.2'],
+        }, resolve_hostnames=False)
+        self.assertEqual(result.claimed, ['10.0.0.2'])
+        self.assertEqual(result.released, ['10.0.0.3'])
+        self.assertEqual(self._get_addresses(self.dc_asset_2), {'10.0.0.2'})
+
+    def test_reconcile_ip_addresses_conflicts(self):
+        result = reconcile_ip_addresses({
+            self.dc_asset: ['10.0.0.1', '10.0.0.2', '10.0.0.3', '10.0.0.7'],
+        }, resolve_hostnames=False)
+        self.assertEqual(result.conflicts, [
+            IPConflict('10.0.0.3', self.dc_asset.pk, self.dc_asset_2.pk)
+        ])
+        self.assertEqual(self._get_addresses(self.dc_asset_2), {'10.0.0.3'})
+        self.assertEqual(
+            self._get_addresses(self.dc_asset),
+            {'10.0.0.1', '10.0.0.2', '10.0.0.7'}
+        )
+
+    def test_ip_addresses_setter(self):
+        self.dc_asset.ip_addresses = ['10.0.0.2', '10.0.0.8']
+        self.assertEqual(
+            set(self.dc_asset.ip_addresses), {'10.0.0.2', '10.0.0.8'}
+        )
+
+
 @ddt
 class DataCenterAssetTest(RalphTestCase):
     def setUp(self):
@@ -178,6 +351,42 @@ class DataCenterAssetTest(RalphTestCase):
         )
         self.assertEqual(bo_asset.hostname, hostname)
 
+    def test_convert_to_backoffice_asset_keeps_relations_of_parents(self):
+        dc_asset = DataCenterAssetFactory()
+        dc_asset_pk = dc_asset.pk
+        licence = BaseObjectLicenceFactory(base_object=dc_asset)
+        # fields (with these of parents) are cached by _meta
+        DataCenterAsset._meta.get_fields()
+        DataCenterAsset.convert_to_backoffice_asset(
+            instances=[dc_asset],
+            region=RegionFactory().id,
+            warehouse=WarehouseFactory().id,
+            request=None
+        )
+        self.assertTrue(
+            BaseObjectLicence.objects.filter(
+                pk=licence.pk, base_object=dc_asset_pk
+            ).exists()
+        )
+        self.assertIn(
+            'barcode',
+            [field.name for field in DataCenterAsset._meta.get_fields()]
+        )
+
+    def test_status_could_be_updated_in_bulk_by_transition(self):
+        @transition_action(updated_fields=['rack'])
+        def change_rack(cls, instances, **kwargs):
+            pass
+
+        self.assertTrue(_can_bulk_update(
+            [self.dc_asset], [], 'status', DataCenterAssetStatus.used.id
+        ))
+        # rack is updated for children in `save`
+        self.assertFalse(_can_bulk_update(
+            [self.dc_asset], [change_rack], 'status',
+            DataCenterAssetStatus.used.id
+        ))
+
     # =========================================================================
     # slot_no
     #  =========================================================================
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+In-memory cache of imported objects mappings (old primary key -> new primary
+key) used during import.
+
+Mappings of whole models are preloaded (in chunks), so resolving old ids of
+imported rows doesn't query database for every cell. New mappings are
+buffered and saved (using `bulk_create`) when import of dataset succeeds.
+"""
+import threading
+from contextlib import contextmanager
+
+from django.contrib.contenttypes.models import ContentType
+from django.db.models import Case, IntegerField, When
+
+from ralph.data_importer.models import ImportedObjects
+
+PRELOAD_CHUNK_SIZE = 10000
+FLUSH_BATCH_SIZE = 1000
+
+_local = threading.local()
+
+
+class ImportedObjectsCache(object):
+
+    """
+    Mappings of imported objects, grouped by content type.
+    """
+
+    def __init__(self, chunk_size=PRELOAD_CHUNK_SIZE):
+        self.chunk_size = chunk_size
+        # content type id -> {old pk: new pk}
+        self._mappings = {}
+        # mappings saved by `flush`
+        self._pending = {}
+        # objects memoized during import (ex. service environments)
+        self._objects = {}
+
+    def preload(self, models):
+        """
+        Load all mappings of models (not loaded yet) in chunks of rows.
+        """
+        content_types = ContentType.objects.get_for_models(*models).values()
+        for content_type in content_types:
+            if content_type.pk in self._mappings:
+                continue
+            mappings = self._mappings[content_type.pk] = {}
+            last_id = 0
+            while True:
+                rows = list(ImportedObjects.objects.filter(
+                    content_type=content_type, pk__gt=last_id,
+                ).order_by('pk').values_list(
+                    'pk', 'old_object_pk', 'object_pk'
+                )[:self.chunk_size])
+                if not rows:
+                    break
+                for _, old_pk, object_pk in rows:
+                    mappings[old_pk] = object_pk
+                last_id = rows[-1][0]
+
+    def get_object_pk(self, model, old_pk):
+        """
+        Return (new) primary key of imported object (or None, if it was not
+        imported).
+
+        Objects not found in mappings (ex. not preloaded or imported in the
+        meantime by another process) are queried - misses are not cached.
+        """
+        content_type_id = ContentType.objects.get_for_model(model).pk
+        old_pk = str(old_pk)
+        pending = self._pending.get(content_type_id, {})
+        if old_pk in pending:
+            return pending[old_pk]
+        mappings = self._mappings.get(content_type_id)
+        if mappings is not None and old_pk in mappings:
+            return mappings[old_pk]
+        object_pk = ImportedObjects.objects.filter(
+            content_type_id=content_type_id, old_object_pk=old_pk,
+        ).values_list('object_pk', flat=True).first()
+        if mappings is not None and object_pk is not None:
+            mappings[old_pk] = object_pk
+        return object_pk
+
+    def add(self, model, old_pk, object_pk):
+        """
+        Add mapping of imported object (saved on `flush`).
+        """
+        content_type_id = ContentType.objects.get_for_model(model).pk
+        self._pending.setdefault(content_type_id, {})[str(old_pk)] = object_pk
+
+    def memoize(self, key, func):
+        """
+        Return value of `func` (called only once for the key during import,
+        unless it returned None).
+        """
+        if key in self._objects:
+            return self._objects[key]
+        value = func()
+        if value is not None:
+            self._objects[key] = value
+        return value
+
+    def discard(self):
+        """
+        Discard pending mappings (ex. when import was rolled back).
+        """
+        self._pending = {}
+
+    def flush(self):
+        """
+        Save pending mappings - existing ones are updated (with single query
+        per batch), new ones are created using `bulk_create`.
+        """
+        for content_type_id, pending in self._pending.items():
+            old_pks = list(pending)
+            for index in range(0, len(old_pks), FLUSH_BATCH_SIZE):
+                batch = old_pks[index:index + FLUSH_BATCH_SIZE]
+                existing = set(ImportedObjects.objects.filter(
+                    content_type_id=content_type_id, old_object_pk__in=batch,
+                ).values_list('old_object_pk', flat=True))
+                if existing:
+                    ImportedObjects.objects.filter(
+                        content_type_id=content_type_id,
+                        old_object_pk__in=existing,
+                    ).update(object_pk=Case(
+                        *[
+                            When(old_object_pk=old_pk, then=pending[old_pk])
+                            for old_pk in existing
+                        ],
+                        output_field=IntegerField()
+                    ))
+                ImportedObjects.objects.bulk_create([
+                    ImportedObjects(
+                        content_type_id=content_type_id,
+                        old_object_pk=old_pk,
+                        object_pk=pending[old_pk],
+                    )
+                    for old_pk in batch if old_pk not in existing
+                ])
+            if content_type_id in self._mappings:
+                self._mappings[content_type_id].update(pending)
+        self._pending = {}
+
+
+def get_imported_objects_cache():
+    """
+    Return cache of currently running import (or None).
+    """
+    return getattr(_local, 'cache', None)
+
+
+@contextmanager
+def imported_objects_cache(chunk_size=PRELOAD_CHUNK_SIZE, new=False):
+    """
+    Use (the same) cache of imported objects for all imports run inside
+    this context. If cache is already used, it's reused, unless `new` is
+    True (ex. in worker process, which inherits cache of parent process) -
+    then new cache is used inside this context.
+    """
+    previous_cache = get_imported_objects_cache()
+    if previous_cache is not None and not new:
+        yield previous_cache
+        return
+    _local.cache = cache = ImportedObjectsCache(chunk_size)
+    try:
+        yield cache
+    finally:
+        _local.cache = previous_cache
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+import csv
+import os
+import resource
+import tempfile
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from ralph.assets.models.assets import AssetModel
+from ralph.assets.models.choices import ObjectModelType
+from ralph.data_center.models.physical import DataCenterAsset
+from ralph.data_importer.models import ImportedObjects
+from ralph.helpers import Timer
+
+SN_PREFIX = 'sn-bench-'
+BARCODE_PREFIX = 'bc-bench-'
+DELETE_BATCH = 1000
+
+
+def _write_csv(path, rows, model_id):
+    """
+    Write (row by row) CSV file with data center assets.
+    """
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['id', 'sn', 'barcode', 'model'])
+        for i in range(1, rows + 1):
+            writer.writerow([
+                i, SN_PREFIX + str(i), BARCODE_PREFIX + str(i), model_id
+            ])
+
+
+def _cleanup(model):
+    """
+    Delete imported (benchmark) data center assets, their mappings and asset
+    model.
+
+    Assets are deleted in batches, since there could be millions of them.
+    """
+    assets = DataCenterAsset.objects.filter(
+        Q(sn__startswith=SN_PREFIX) | Q(barcode__startswith=BARCODE_PREFIX)
+    )
+    content_type = ContentType.objects.get_for_model(DataCenterAsset)
+    while True:
+        pks = list(
+            assets.order_by('pk').values_list('pk', flat=True)[:DELETE_BATCH]
+        )
+        if not pks:
+            break
+        ImportedObjects.objects.filter(
+            content_type=content_type, object_pk__in=pks
+        ).delete()
+        DataCenterAsset.objects.filter(pk__in=pks).delete()
+    model.delete()
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Measure performance (throughput and memory) of CSV importer. "
+        "Chunks are committed, so it should be run against disposable "
+        "database - imported objects are deleted at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-r', '--rows',
+            type=int,
+            default=1000000,
+            help='number of data center assets to import',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=1000,
+            help='number of rows imported in single transaction',
+        )
+
+    def handle(self, *args, **options):
+        fd, path = tempfile.mkstemp(suffix='.csv')
+        os.close(fd)
+        model = AssetModel.objects.create(
+            name='benchmark-importer', type=ObjectModelType.data_center
+        )
+        with Timer() as timer:
+            _write_csv(path, options['rows'], model.pk)
+        self.stdout.write('CSV with {} rows generated in {:.2f}s'.format(
+            options['rows'], timer.elapsed
+        ))
+        try:
+            with Timer() as timer:
+                call_command(
+                    'importer', path,
+                    model_name='DataCenterAsset',
+                    chunk_size=options['chunk_size'],
+                    skipid=True,
+                    stdout=self.stdout,
+                )
+        finally:
+            os.remove(path)
+            _cleanup(model)
+        self.stdout.write('{} rows imported in {:.2f}s ({:.0f} rows/s)'.format(
+            options['rows'], timer.elapsed, options['rows'] / timer.elapsed
+        ))
+        # on Linux `ru_maxrss` is in kilobytes
+        self.stdout.write('Peak memory usage: {:.1f} MB'.format(
+            resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        ))
@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+import csv
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db.models import Max
+
+from ralph.assets.models.assets import (
+    AssetHolder,
+    BudgetInfo,
+    BusinessSegment,
+    Environment,
+    Manufacturer
+)
+from ralph.back_office.models import Warehouse
+from ralph.data_importer.models import ImportedObjects
+from ralph.helpers import Timer
+
+BENCHMARK_NAME = 'benchmark-parallel-importer'
+# models without relations - their files could be imported in parallel
+MODELS = [
+    AssetHolder, BudgetInfo, BusinessSegment, Environment, Manufacturer,
+    Warehouse,
+]
+
+
+def _write_csv_files(path, rows):
+    """
+    Write CSV file (`01_<model>.csv`) with named objects for every model.
+    """
+    for model in MODELS:
+        file_name = '01_{}.csv'.format(model._meta.object_name)
+        with open(os.path.join(path, file_name), 'w', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(['id', 'name'])
+            for i in range(1, rows + 1):
+                writer.writerow([i, '{}-{}'.format(BENCHMARK_NAME, i)])
+
+
+def _cleanup(first_mapping_pk):
+    """
+    Delete imported objects and their mappings.
+    """
+    ImportedObjects.objects.filter(pk__gte=first_mapping_pk).delete()
+    for model in MODELS:
+        model.objects.filter(name__startswith=BENCHMARK_NAME).delete()
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Compare time of sequential and parallel import of directory with "
+        "independent files. Chunks are committed, so it should be run "
+        "against disposable database - imported objects are deleted after "
+        "every run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-r', '--rows',
+            type=int,
+            default=10000,
+            help='number of rows in every imported file',
+        )
+        parser.add_argument(
+            '-w', '--workers',
+            dest='workers',
+            type=int,
+            nargs='+',
+            default=[1, 2, 4],
+            help='numbers of processes importing files in parallel',
+        )
+
+    def _import(self, path, workers):
+        first_mapping_pk = (
+            ImportedObjects.objects.aggregate(max_pk=Max('pk'))['max_pk'] or 0
+        ) + 1
+        try:
+            with Timer() as timer:
+                call_command(
+                    'importer', path, type='dir', workers=workers,
+                    skipid=True, stdout=StringIO(),
+                )
+            return timer.elapsed
+        finally:
+            _cleanup(first_mapping_pk)
+
+    def handle(self, *args, **options):
+        path = tempfile.mkdtemp()
+        try:
+            _write_csv_files(path, options['rows'])
+            total_rows = options['rows'] * len(MODELS)
+            self.stdout.write('{} files with {} rows generated'.format(
+                len(MODELS), total_rows
+            ))
+            for workers in options['workers']:
+                elapsed = self._import(path, workers)
+                self.stdout.write(
+                    '{:>2} worker(s): {:.2f}s ({:.0f} rows/s)'.format(
+                        workers, elapsed, total_rows / elapsed
+                    )
+                )
+        finally:
+            shutil.rmtree(path)
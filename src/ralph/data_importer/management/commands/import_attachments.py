@@ -153,39 +153,25 @@ class Command(BaseCommand):
                         owner, _ = get_user_model().objects.get_or_create(
                             username=line.get('uploaded_by')
                         )
-                        try:
-                            attachment = Attachment.objects.get(
-                                md5=line.get('md5')
-                            )
-                            content_type = ContentType.objects.get_for_model(
-                                obj._meta.model
+                        # file is not read when attachment with the same
+                        # content is already imported
+                        attachment = Attachment.objects.filter(
+                            md5=line.get('md5')
+                        ).first()
+                        if attachment:
+                            AttachmentItem.objects.attach_to_objects(
+                                attachment, [obj]
                             )
-                            items = attachment.items.filter(
-                                object_id=obj.pk,
-                                content_type=content_type
-                            )
-                            if not items:
-                                AttachmentItem.objects.attach(
-                                    obj.pk, content_type, [attachment]
-                                )
                             continue
-                        except Attachment.DoesNotExist:
-                            pass
-
-                        attachment = add_attachment_from_disk(
+                        add_attachment_from_disk(
                             obj,
                             os.path.join(
                                 directory,
                                 'attachments',
                                 line.get('file')
                             ),
-                            owner=owner
-                        )
-                        attachment.original_filename = line.get(
-                            'original_filename'
-                        )
-                        attachment.save(
-                            update_fields=['original_filename']
+                            owner=owner,
+                            original_filename=line.get('original_filename'),
                         )
 
     def handle(self, *args, **options):
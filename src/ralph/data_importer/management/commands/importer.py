@@ -1,21 +1,34 @@
 # -*- coding: utf-8 -*-
 import csv
+import fcntl
 import glob
+import io
+import json
 import logging
 import os
-import tempfile
+import time
 import zipfile
+from contextlib import contextmanager
+from functools import partial
+from itertools import islice
 
 import reversion
 import tablib
 from django.apps import apps
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
 from import_export import resources
 
 from ralph.data_importer import resources as ralph_resources
+from ralph.data_importer.cache import imported_objects_cache
 from ralph.data_importer.models import ImportedObjects
 from ralph.data_importer.resources import RalphModelResource
+from ralph.data_importer.scheduler import (
+    get_dependencies,
+    get_import_files,
+    run_import
+)
 
 APP_MODELS = {model._meta.model_name: model for model in apps.get_models()}
 logger = logging.getLogger(__name__)
@@ -34,6 +47,66 @@ def get_resource(model_name):
     return resource()
 
 
+class ImportCheckpoint(object):
+
+    """
+    Number of imported (committed) rows of every imported file, saved in
+    JSON file after every chunk - used to resume interrupted import.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.rows = self._load()
+
+    def _load(self):
+        if self.path and os.path.exists(self.path):
+            with open(self.path) as f:
+                return json.load(f)
+        return {}
+
+    @staticmethod
+    def _get_key(source):
+        # files of zip are extracted to different directory every time
+        return os.path.basename(source)
+
+    def get(self, source):
+        return self.rows.get(self._get_key(source), 0)
+
+    def set(self, source, rows):
+        if not self.path:
+            self.rows[self._get_key(source)] = rows
+            return
+        # files could be imported (and checkpoint saved) by many processes
+        with open('{}.lock'.format(self.path), 'w') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            self.rows = self._load()
+            self.rows[self._get_key(source)] = rows
+            tmp_path = '{}.tmp'.format(self.path)
+            with open(tmp_path, 'w') as f:
+                json.dump(self.rows, f)
+            os.replace(tmp_path, self.path)
+
+    def remove(self):
+        if not self.path:
+            return
+        for path in (self.path, '{}.lock'.format(self.path)):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def _import_file(options, import_file):
+    """
+    Import single file of directory or zip (in worker process).
+
+    Every file is imported using new cache of imported objects (cache of
+    parent process, inherited by worker, is stale).
+    """
+    command = Command()
+    command.setup(options)
+    with imported_objects_cache(new=True):
+        command.import_file(options, import_file)
+
+
 class Command(BaseCommand):
 
     help = "Imports data for specified model from specified file"
@@ -78,32 +151,87 @@ class Command(BaseCommand):
             action='store_true',
             help="Use it when importing data from Ralph 2.",
         )
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            type=int,
+            default=1000,
+            help=(
+                'Number of rows imported in single transaction (0 to import '
+                'whole file at once)'
+            ),
+        )
+        parser.add_argument(
+            '--checkpoint',
+            dest='checkpoint',
+            default=None,
+            help=(
+                'Path of checkpoint file in which number of imported rows is '
+                'saved - when it exists, import is resumed after these rows '
+                '(file is removed after successful import)'
+            ),
+        )
+        parser.add_argument(
+            '-w', '--workers',
+            dest='workers',
+            type=int,
+            default=1,
+            help=(
+                'Number of processes importing (independent) files of '
+                'directory or zip in parallel'
+            ),
+        )
 
     def from_zip(self, options):
-        with open(options.get('source'), 'rb') as f:
-            out_path = tempfile.mkdtemp()
-            z = zipfile.ZipFile(f)
-            for name in z.namelist():
-                z.extract(name, out_path)
-            options['source'] = out_path
-            self.from_dir(options)
+        # members are read directly from archive (without extracting it)
+        with zipfile.ZipFile(options.get('source')) as z:
+            names = [
+                name for name in z.namelist() if os.path.dirname(name) == ''
+            ]
+        self.from_files(get_import_files(names), options)
 
     def from_dir(self, options):
-        file_list = []
-        for path in glob.glob(os.path.join(options.get('source'), '*.csv')):
-            base_name = os.path.basename(path)
-            file_name = os.path.splitext(base_name)[0].split('_')
-            file_list.append({
-                'model': file_name[1],
-                'path': path,
-                'sort': int(file_name[0])
-            })
-        file_list = sorted(file_list, key=lambda x: x['sort'])
-        for item in file_list:
-            logger.info('Import to model: {}'.format(item['model']))
-            options['model_name'] = item['model']
-            options['source'] = item['path']
-            self.from_file(options)
+        self.from_files(get_import_files(
+            glob.glob(os.path.join(options.get('source'), '*.csv'))
+        ), options)
+
+    def from_files(self, import_files, options):
+        """
+        Import files in order of dependencies between them - with more than
+        one worker, independent files are imported in parallel.
+        """
+        workers = options.get('workers') or 1
+        if workers > 1 and connection.vendor == 'sqlite':
+            # sqlite doesn't support concurrent writes
+            self.stderr.write('Parallel import is not supported by sqlite')
+            workers = 1
+        dependencies = get_dependencies(
+            import_files, lambda model_name: APP_MODELS[model_name.lower()]
+        )
+        start = time.perf_counter()
+        if workers > 1:
+            # stdout and stderr can't be passed to worker processes
+            worker_options = {
+                key: value for key, value in options.items()
+                if key not in ('stdout', 'stderr')
+            }
+            run_import(
+                dependencies, partial(_import_file, worker_options), workers
+            )
+        else:
+            run_import(dependencies, partial(self.import_file, options))
+        self.stdout.write('{} files imported in {:.2f}s'.format(
+            len(import_files), time.perf_counter() - start
+        ))
+
+    def import_file(self, options, import_file):
+        logger.info('Import to model: {}'.format(import_file.model_name))
+        options['model_name'] = import_file.model_name
+        if options.get('type') == 'zip':
+            options['zip_member'] = import_file.name
+        else:
+            options['source'] = import_file.name
+        self.from_file(options)
 
     def delete_objs(self, data, model):
         counter = 0
@@ -122,7 +250,68 @@ class Command(BaseCommand):
             counter += 1
         return counter
 
+    def _write_errors(self, result, headers, rows, first_row_number):
+        for idx, row in enumerate(result.rows):
+            for error in row.errors:
+                error_msg = '\n'.join([
+                    'line_number: {}'.format(first_row_number + idx + 1),
+                    'error message: {}'.format(error.error),
+                    'row data: {}'.format(list(zip(headers, rows[idx]))),
+                    '',
+                ])
+                self.stderr.write(error_msg)
+            if row.errors:
+                break
+
+    def import_chunk(self, model_resource, headers, rows, first_row_number):
+        """
+        Import (and delete) objects from rows in single transaction.
+
+        Returns:
+            number of deleted objects
+        """
+        with transaction.atomic():
+            dataset = tablib.Dataset(*rows, headers=headers)
+            result = model_resource.import_data(dataset, dry_run=False)
+            if result.has_errors():
+                self._write_errors(result, headers, rows, first_row_number)
+                transaction.set_rollback(True)
+                raise CommandError(
+                    'Import of rows {}-{} failed (rows were not imported). '
+                    'Fix them and run import again with the same checkpoint '
+                    'to resume.'.format(
+                        first_row_number + 1, first_row_number + len(rows)
+                    )
+                )
+            objs_delete = [
+                obj.get('id', None) for obj in dataset.dict
+                if int(obj.get('deleted', 0)) == 1
+            ]
+            return self.delete_objs(objs_delete, model_resource._meta.model)
+
+    @contextmanager
+    def open_source(self, options):
+        """
+        Open CSV file (or member of zip archive) as text.
+        """
+        encoding = options.get('encoding')
+        if options.get('zip_member'):
+            with zipfile.ZipFile(options.get('source')) as z:
+                with z.open(options['zip_member']) as member:
+                    yield io.TextIOWrapper(
+                        member, encoding=encoding, newline=''
+                    )
+        else:
+            with open(
+                options.get('source'), encoding=encoding, newline=''
+            ) as csv_file:
+                yield csv_file
+
     def from_file(self, options):
+        """
+        Import file in chunks - file is read (streamed) chunk by chunk and
+        every chunk is imported in separate transaction.
+        """
         if not options.get('model_name'):
             raise CommandError('You must select a model')
         csv.register_dialect(
@@ -130,59 +319,73 @@ class Command(BaseCommand):
             delimiter=str(options['delimiter'])
         )
         settings.REMOVE_ID_FROM_IMPORT = options.get('skipid')
+        source = options.get('zip_member') or options.get('source')
         self.stdout.write('Import {} resource from {}'.format(
             options.get('model_name'),
-            options.get('source')
+            source
         ))
-        with open(options.get('source')) as csv_file:
-            reader_kwargs = {}
-            reader = csv.reader(
-                csv_file,
-                dialect='RalphImporter',
-                **reader_kwargs
-            )
-            csv_data = list(reader)
-            headers, csv_body = csv_data[0], csv_data[1:]
-            model_resource = get_resource(options.get('model_name'))
-            current_count = model_resource._meta.model.objects.count()
-            dataset = tablib.Dataset(*csv_body, headers=headers)
-            objs_delete = [
-                obj.get('id', None) for obj in dataset.dict
-                if int(obj.get('deleted', 0)) == 1
-            ]
-            result = model_resource.import_data(dataset, dry_run=False)
-            if result.has_errors():
-                for idx, row in enumerate(result.rows):
-                    for error in row.errors:
-                        error_msg = '\n'.join([
-                            'line_number: {}'.format(idx + 1),
-                            'error message: {}'.format(error.error),
-                            'row data: {}'.format(
-                                list(zip(headers, dataset[idx]))
-                            ),
-                            '',
-                        ])
-                        self.stderr.write(error_msg)
-                    if row.errors:
-                        break
-            after_import_count = model_resource._meta.model.objects.count()
-            if len(csv_body) != after_import_count - current_count:
-                self.stderr.write('Some of records were not imported')
-            else:
+        model_resource = get_resource(options.get('model_name'))
+        current_count = model_resource._meta.model.objects.count()
+        # None - whole file in single chunk
+        chunk_size = options.get('chunk_size') or None
+        imported = deleted = 0
+        start = time.perf_counter()
+        with self.open_source(options) as csv_file:
+            reader = csv.reader(csv_file, dialect='RalphImporter')
+            headers = next(reader)
+            row_number = self.checkpoint.get(source)
+            if row_number:
+                self.stdout.write('Resuming after row {}'.format(row_number))
+                for _ in islice(reader, row_number):
+                    pass
+            while True:
+                rows = list(islice(reader, chunk_size))
+                if not rows:
+                    break
+                chunk_start = time.perf_counter()
+                deleted += self.import_chunk(
+                    model_resource, headers, rows, row_number
+                )
+                row_number += len(rows)
+                imported += len(rows)
+                self.checkpoint.set(source, row_number)
+                chunk_time = time.perf_counter() - chunk_start
                 self.stdout.write(
-                    '{} rows were imported'.format(len(csv_body))
+                    'Rows {}-{} imported in {:.2f}s ({:.0f} rows/s)'.format(
+                        row_number - len(rows) + 1, row_number, chunk_time,
+                        len(rows) / chunk_time
+                    )
                 )
-            deleted = self.delete_objs(objs_delete, model_resource._meta.model)
-            self.stdout.write('{} deleted\n'.format(deleted))
-            self.stdout.write('Done\n')
+        total_time = time.perf_counter() - start
+        after_import_count = model_resource._meta.model.objects.count()
+        if imported != after_import_count - current_count:
+            self.stderr.write('Some of records were not imported')
+        else:
+            self.stdout.write('{} rows were imported'.format(imported))
+        self.stdout.write(
+            '{} rows processed in {:.2f}s ({:.0f} rows/s)'.format(
+                imported, total_time,
+                imported / total_time if total_time else 0
+            )
+        )
+        self.stdout.write('{} deleted\n'.format(deleted))
+        self.stdout.write('Done\n')
 
-    def handle(self, *args, **options):
+    def setup(self, options):
         if options.get('map_imported_id_to_new_id'):
             settings.MAP_IMPORTED_ID_TO_NEW_ID = True
         settings.CHECK_IP_HOSTNAME_ON_SAVE = False
-        if options.get('type') == 'dir':
-            self.from_dir(options)
-        elif options.get('type') == 'zip':
-            self.from_zip(options)
-        else:
-            self.from_file(options)
+        self.checkpoint = ImportCheckpoint(options.get('checkpoint'))
+
+    def handle(self, *args, **options):
+        self.setup(options)
+        # mappings of imported objects are loaded once for all chunks (and
+        # files)
+        with imported_objects_cache():
+            if options.get('type') == 'dir':
+                self.from_dir(options)
+            elif options.get('type') == 'zip':
+                self.from_zip(options)
+            else:
+                self.from_file(options)
+        self.checkpoint.remove()
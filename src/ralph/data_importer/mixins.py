@@ -1,16 +1,29 @@
 # -*- coding: utf-8 -*-
+import logging
 from collections import OrderedDict
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
 from import_export import fields, widgets
 
+from ralph.back_office.models import BackOfficeAsset
+from ralph.data_center.models.networks import reconcile_ip_addresses
+from ralph.data_center.models.physical import DataCenterAsset
+from ralph.data_importer.cache import (
+    get_imported_objects_cache,
+    imported_objects_cache
+)
 from ralph.data_importer.models import ImportedObjects
 from ralph.data_importer.widgets import (
+    BaseObjectManyToManyWidget,
+    BaseObjectWidget,
     ExportForeignKeyStrWidget,
-    ExportManyToManyStrWidget
+    ExportManyToManyStrWidget,
+    ImportedForeignKeyWidget
 )
 
+logger = logging.getLogger(__name__)
+
 
 class ImportForeignKeyMeta(type):
     def __new__(cls, name, bases, attrs):
@@ -56,7 +69,39 @@ class ImportForeignKeyMeta(type):
 
 class ImportForeignKeyMixin(object):
 
-    """ImportForeignKeyMixin class for django import-export resources."""
+    """ImportForeignKeyMixin class for django import-export resources.
+
+    Mappings of imported objects are resolved and saved using cache of
+    imported objects (mappings of models referenced by resource are
+    preloaded).
+    """
+
+    def get_imported_models(self):
+        """
+        Return models which imported objects mappings are used by widgets
+        of resource.
+        """
+        imported_models = set()
+        for field in self.get_fields():
+            if isinstance(field.widget, ImportedForeignKeyWidget):
+                if settings.MAP_IMPORTED_ID_TO_NEW_ID:
+                    imported_models.add(field.widget.model)
+            elif isinstance(
+                field.widget, (BaseObjectWidget, BaseObjectManyToManyWidget)
+            ):
+                imported_models.update([BackOfficeAsset, DataCenterAsset])
+        return imported_models
+
+    def import_data(self, dataset, dry_run=False, *args, **kwargs):
+        with imported_objects_cache() as cache:
+            cache.preload(self.get_imported_models())
+            result = super().import_data(dataset, dry_run, *args, **kwargs)
+            # objects are rolled back on dry run or when import failed
+            if dry_run or result.has_errors():
+                cache.discard()
+            else:
+                cache.flush()
+        return result
 
     def get_or_init_instance(self, instance_loader, row):
         self.old_object_pk = row.get('id', None)
@@ -70,9 +115,52 @@ class ImportForeignKeyMixin(object):
 
     def after_save_instance(self, instance, dry_run):
         if not dry_run and self.old_object_pk:
+            cache = get_imported_objects_cache()
+            if cache is not None:
+                cache.add(self._meta.model, self.old_object_pk, instance.pk)
+                return
             content_type = ContentType.objects.get_for_model(self._meta.model)
             ImportedObjects.objects.update_or_create(
                 content_type=content_type,
                 old_object_pk=self.old_object_pk,
                 defaults={'object_pk': instance.pk}
             )
+
+
+class ImportIPAddressesMixin(object):
+
+    """
+    Import IP addresses of base objects (comma separated) from `ip_addresses`
+    column (resource should define such field, without attribute).
+
+    Addresses of all imported rows are assigned at once, after whole dataset
+    is imported.
+    """
+
+    def import_data(self, dataset, dry_run=False, *args, **kwargs):
+        self._ip_assignments = {}
+        result = super().import_data(dataset, dry_run, *args, **kwargs)
+        if not dry_run and not result.has_errors() and self._ip_assignments:
+            reconciliation = reconcile_ip_addresses(self._ip_assignments)
+            for conflict in reconciliation.conflicts:
+                logger.warning(
+                    'Cannot assign IP %s to %s - it is already in use by '
+                    'another object (%s)', conflict.address,
+                    conflict.base_object_id, conflict.owner_id
+                )
+        return result
+
+    def import_obj(self, obj, data, dry_run):
+        super().import_obj(obj, data, dry_run)
+        self._ip_addresses = data.get('ip_addresses')
+
+    def after_save_instance(self, instance, dry_run):
+        super().after_save_instance(instance, dry_run)
+        if self._ip_addresses is not None:
+            self._ip_assignments[instance.pk] = [
+                address.strip() for address in self._ip_addresses.split(',')
+                if address.strip()
+            ]
+
+    def dehydrate_ip_addresses(self, obj):
+        return ','.join(obj.ip_addresses)
@@ -11,7 +11,8 @@ from ralph.back_office.models import (
 from ralph.data_center.models import networks, physical
 from ralph.data_importer.mixins import (
     ImportForeignKeyMeta,
-    ImportForeignKeyMixin
+    ImportForeignKeyMixin,
+    ImportIPAddressesMixin
 )
 from ralph.data_importer.widgets import (
     AssetServiceEnvWidget,
@@ -201,7 +202,7 @@ class IPAddressResource(RalphModelResource):
         model = networks.IPAddress
 
 
-class DataCenterAssetResource(RalphModelResource):
+class DataCenterAssetResource(ImportIPAddressesMixin, RalphModelResource):
     parent = fields.Field(
         column_name='parent',
         attribute='parent',
@@ -232,6 +233,7 @@ class DataCenterAssetResource(RalphModelResource):
         attribute='management_ip',
         widget=NullStringWidget(),
     )
+    ip_addresses = fields.Field(column_name='ip_addresses')
 
     class Meta:
         model = physical.DataCenterAsset
@@ -240,7 +242,7 @@ class DataCenterAssetResource(RalphModelResource):
             'rack__server_room__data_center',
         )
         prefetch_related = (
-            'tags',
+            'tags', 'ipaddress_set',
         )
         exclude = ('content_type', 'asset_ptr', 'baseobject_ptr', 'connections')
 
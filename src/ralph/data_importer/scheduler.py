@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+Scheduling of import of multiple files (`NN_model.csv`, ex. from Ralph 2
+export).
+
+Files are imported in order of their numeric prefixes, but file has to wait
+only for (previous) files of models it's related to (by foreign key,
+many-to-many or inheritance) - independent files (ex. regions, warehouses
+and manufacturers) could be imported at the same time.
+"""
+import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.db import connections
+
+ImportFile = namedtuple('ImportFile', ['sort', 'model_name', 'name'])
+
+
+def get_import_files(names):
+    """
+    Return files (sorted by numeric prefix) to import from CSV file names.
+    """
+    import_files = []
+    for name in names:
+        base_name = os.path.basename(name)
+        if not base_name.endswith('.csv'):
+            continue
+        file_name = os.path.splitext(base_name)[0].split('_')
+        import_files.append(ImportFile(
+            sort=int(file_name[0]), model_name=file_name[1], name=name,
+        ))
+    return sorted(import_files, key=lambda import_file: import_file.sort)
+
+
+def _get_related_models(model):
+    """
+    Return models referenced by (forward) relations of the model or None if
+    model could reference any model (generic relation).
+    """
+    related_models = set()
+    for field in model._meta.get_fields():
+        if isinstance(field, GenericForeignKey):
+            return None
+        if field.is_relation and not field.auto_created:
+            related_models.add(field.related_model)
+    return related_models
+
+
+def _is_related(model, other_model, related_models):
+    if related_models is None:
+        return True
+    return any(
+        issubclass(model, other) or issubclass(other, model)
+        for other in related_models | {other_model}
+    )
+
+
+def get_dependencies(import_files, get_model):
+    """
+    Build dependencies graph of imported files.
+
+    Returns:
+        dict with file as a key and set of files, which have to be imported
+        before it, as a value
+    """
+    related_models = {}
+    for import_file in import_files:
+        model = get_model(import_file.model_name)
+        if model not in related_models:
+            related_models[model] = _get_related_models(model)
+    dependencies = {}
+    for import_file in import_files:
+        model = get_model(import_file.model_name)
+        dependencies[import_file] = {
+            previous for previous in import_files
+            if previous.sort < import_file.sort and _is_related(
+                get_model(previous.model_name), model, related_models[model]
+            )
+        }
+    return dependencies
+
+
+def run_import(dependencies, import_func, workers=1):
+    """
+    Call `import_func` for every file (after files it depends on).
+
+    When more than one worker is used, independent files are imported in
+    separate processes (each with its own database connection).
+    """
+    if workers <= 1:
+        for import_file in sorted(dependencies, key=lambda f: f.sort):
+            import_func(import_file)
+        return
+    # connection can't be shared with forked processes
+    connections.close_all()
+    done = set()
+    pending = dict(dependencies)
+    running = {}
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        while pending or running:
+            for import_file, required in list(pending.items()):
+                if required <= done:
+                    del pending[import_file]
+                    future = executor.submit(import_func, import_file)
+                    running[future] = import_file
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                import_file = running.pop(future)
+                # error of file import stops whole import (files which are
+                # already running are finished)
+                if future.exception() is not None:
+                    for other in running:
+                        other.cancel()
+                    raise future.exception()
+                done.add(import_file)
@@ -1,24 +1,54 @@
+import json
 import os
+import shutil
+import tempfile
+import zipfile
+from io import StringIO
+from multiprocessing import Pool
 
+import tablib
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 from django.core import management
-from django.test import TestCase
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 
 from ralph.accounts.models import Region
 from ralph.assets.models.assets import (
     AssetModel,
     Environment,
+    Manufacturer,
     Service,
     ServiceEnvironment
 )
 from ralph.assets.models.choices import ObjectModelType
 from ralph.back_office.models import BackOfficeAsset, Warehouse
+from ralph.data_center.models.networks import IPAddress
 from ralph.data_center.models.physical import DataCenter, Rack, ServerRoom
-from ralph.data_center.tests.factories import DataCenterFactory
+from ralph.data_center.tests.factories import (
+    DataCenterAssetFactory,
+    DataCenterFactory
+)
+from ralph.data_importer.cache import (
+    get_imported_objects_cache,
+    imported_objects_cache
+)
 from ralph.data_importer.management.commands import importer
 from ralph.data_importer.models import ImportedObjects
-from ralph.data_importer.resources import AssetModelResource
+from ralph.data_importer.resources import (
+    AssetModelResource,
+    DataCenterAssetResource
+)
+
+
+def _set_checkpoints(path, process_number):
+    """
+    Save checkpoints of many files (in separate process).
+    """
+    checkpoint = importer.ImportCheckpoint(path)
+    for i in range(20):
+        checkpoint.set('{}_{}.csv'.format(process_number, i), i)
 
 
 class DataImporterTestCase(TestCase):
@@ -303,3 +333,189 @@ class DataImporterTestCase(TestCase):
         self.assertTrue(Warehouse.objects.filter(
             name="From zip London"
         ).exists())
+
+    def test_import_ip_addresses(self):
+        dc_asset = DataCenterAssetFactory()
+        IPAddress.objects.create(address='10.0.0.1', base_object=dc_asset)
+        dataset = tablib.Dataset(
+            [dc_asset.pk, '10.0.0.2, 10.0.0.3'],
+            headers=['id', 'ip_addresses']
+        )
+        result = DataCenterAssetResource().import_data(dataset)
+        self.assertFalse(result.has_errors())
+        self.assertEqual(
+            set(dc_asset.ip_addresses), {'10.0.0.2', '10.0.0.3'}
+        )
+        self.assertIsNone(
+            IPAddress.objects.get(address='10.0.0.1').base_object
+        )
+
+    def _write_warehouses_csv(self, path, names):
+        with open(path, 'w') as f:
+            f.write('id,name\n')
+            for idx, name in enumerate(names, start=101):
+                f.write('{},{}\n'.format(idx, name))
+
+    def test_importer_command_in_chunks_with_checkpoint(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        warehouse_csv = os.path.join(tmp_dir, 'warehouses.csv')
+        checkpoint = os.path.join(tmp_dir, 'checkpoint.json')
+        # duplicated name in second chunk
+        self._write_warehouses_csv(
+            warehouse_csv, ['W1', 'W2', 'W3', 'W1', 'W5']
+        )
+        with self.assertRaises(management.CommandError):
+            management.call_command(
+                'importer', warehouse_csv, type='file',
+                model_name='Warehouse', chunk_size=2, checkpoint=checkpoint,
+                stdout=StringIO(), stderr=StringIO(),
+            )
+        # first chunk is committed, second one is rolled back
+        self.assertTrue(Warehouse.objects.filter(name='W2').exists())
+        self.assertFalse(Warehouse.objects.filter(name='W3').exists())
+        with open(checkpoint) as f:
+            self.assertEqual(json.load(f), {'warehouses.csv': 2})
+
+        self._write_warehouses_csv(
+            warehouse_csv, ['W1', 'W2', 'W3', 'W4', 'W5']
+        )
+        stdout = StringIO()
+        management.call_command(
+            'importer', warehouse_csv, type='file',
+            model_name='Warehouse', chunk_size=2, checkpoint=checkpoint,
+            stdout=stdout,
+        )
+        self.assertIn('Resuming after row 2', stdout.getvalue())
+        self.assertIn('Rows 5-5 imported', stdout.getvalue())
+        self.assertEqual(
+            Warehouse.objects.filter(
+                name__in=['W1', 'W2', 'W3', 'W4', 'W5']
+            ).count(),
+            5
+        )
+        self.assertFalse(os.path.exists(checkpoint))
+
+    @override_settings(MAP_IMPORTED_ID_TO_NEW_ID=True)
+    def test_import_resolves_imported_objects_from_cache(self):
+        manufacturer = Manufacturer.objects.create(name='manufacturer_1')
+        ImportedObjects.objects.create(
+            content_type=ContentType.objects.get_for_model(Manufacturer),
+            object_pk=manufacturer.pk,
+            old_object_pk=7
+        )
+        dataset = tablib.Dataset(
+            *[
+                [
+                    old_pk, 'model_{}'.format(old_pk), 7,
+                    ObjectModelType.data_center.id
+                ]
+                for old_pk in range(11, 21)
+            ],
+            headers=['id', 'name', 'manufacturer', 'type']
+        )
+        with CaptureQueriesContext(connection) as queries:
+            result = AssetModelResource().import_data(dataset)
+        self.assertFalse(result.has_errors())
+        # mappings are preloaded and saved at once (instead of queries for
+        # every row)
+        imported_objects_queries = [
+            query for query in queries.captured_queries
+            if ImportedObjects._meta.db_table in query['sql']
+        ]
+        self.assertEqual(len(imported_objects_queries), 5)
+        self.assertEqual(
+            AssetModel.objects.filter(manufacturer=manufacturer).count(), 10
+        )
+        self.assertEqual(
+            ImportedObjects.get_object_from_old_pk(AssetModel, 15).name,
+            'model_15'
+        )
+
+    def test_imported_objects_cache_flush(self):
+        warehouse = Warehouse.objects.get(name='warehouse_1')
+        new_warehouse = Warehouse.objects.create(name='warehouse_2')
+        with imported_objects_cache() as cache:
+            cache.preload([Warehouse])
+            cache.add(Warehouse, 1, new_warehouse.pk)
+            cache.add(Warehouse, 2, warehouse.pk)
+            self.assertEqual(
+                cache.get_object_pk(Warehouse, 1), new_warehouse.pk
+            )
+            cache.flush()
+        self.assertEqual(
+            ImportedObjects.get_object_from_old_pk(Warehouse, 1),
+            new_warehouse
+        )
+        self.assertEqual(
+            ImportedObjects.get_object_from_old_pk(Warehouse, 2), warehouse
+        )
+
+    def test_imported_objects_cache_discard(self):
+        with imported_objects_cache() as cache:
+            cache.preload([Warehouse])
+            cache.add(Warehouse, 2, 1234)
+            cache.discard()
+            self.assertIsNone(cache.get_object_pk(Warehouse, 2))
+            cache.flush()
+        self.assertFalse(ImportedObjects.objects.filter(
+            old_object_pk=2,
+            content_type=ContentType.objects.get_for_model(Warehouse)
+        ).exists())
+
+    def test_imported_objects_cache_get_not_preloaded_mapping(self):
+        warehouse = Warehouse.objects.get(name='warehouse_1')
+        with imported_objects_cache() as cache:
+            cache.preload([Warehouse])
+            self.assertIsNone(cache.get_object_pk(Warehouse, 3))
+            # imported (ex. by another process) after preload
+            ImportedObjects.objects.create(
+                content_type=ContentType.objects.get_for_model(Warehouse),
+                object_pk=warehouse.pk,
+                old_object_pk=3
+            )
+            self.assertEqual(cache.get_object_pk(Warehouse, 3), warehouse.pk)
+
+    def test_imported_objects_cache_memoize_skips_none(self):
+        with imported_objects_cache() as cache:
+            self.assertIsNone(cache.memoize('key', lambda: None))
+            self.assertEqual(cache.memoize('key', lambda: 1), 1)
+            self.assertEqual(cache.memoize('key', lambda: 2), 1)
+
+    def test_imported_objects_cache_new(self):
+        with imported_objects_cache() as cache:
+            with imported_objects_cache() as inner_cache:
+                self.assertIs(inner_cache, cache)
+            with imported_objects_cache(new=True) as new_cache:
+                self.assertIsNot(new_cache, cache)
+                self.assertIs(get_imported_objects_cache(), new_cache)
+            self.assertIs(get_imported_objects_cache(), cache)
+
+
+class ImporterSourceTest(SimpleTestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+
+    def test_open_source_zip_member(self):
+        zip_path = os.path.join(self.tmp_dir, 'import.zip')
+        with zipfile.ZipFile(zip_path, 'w') as z:
+            z.writestr('01_Warehouse.csv', 'id,name\n1,Kraków\n')
+        options = {
+            'source': zip_path,
+            'zip_member': '01_Warehouse.csv',
+            'encoding': 'utf-8',
+        }
+        with importer.Command().open_source(options) as csv_file:
+            self.assertEqual(csv_file.read(), 'id,name\n1,Kraków\n')
+
+    def test_checkpoint_is_saved_by_many_processes(self):
+        path = os.path.join(self.tmp_dir, 'checkpoint.json')
+        with Pool(4) as pool:
+            pool.starmap(_set_checkpoints, [(path, i) for i in range(4)])
+        # every process reads checkpoint under lock, so no row is lost
+        checkpoint = importer.ImportCheckpoint(path)
+        self.assertEqual(len(checkpoint.rows), 4 * 20)
+        self.assertEqual(checkpoint.get('/tmp/extracted/3_19.csv'), 19)
+        checkpoint.remove()
+        self.assertEqual(os.listdir(self.tmp_dir), [])
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+import shutil
+import tempfile
+from functools import partial
+
+from django.apps import apps
+from django.test import SimpleTestCase
+
+from ralph.data_importer.scheduler import (
+    get_dependencies,
+    get_import_files,
+    run_import
+)
+
+
+def _get_model(model_name):
+    return {
+        model._meta.model_name: model for model in apps.get_models()
+    }[model_name.lower()]
+
+
+def _import_file(tmp_dir, import_file):
+    """
+    Fake import (run in worker process) - save names of files imported
+    before this one.
+    """
+    with open(os.path.join(tmp_dir, import_file.name), 'w') as f:
+        json.dump(os.listdir(tmp_dir), f)
+
+
+def _fail_import(import_file):
+    if import_file.model_name == 'AssetModel':
+        raise ValueError(import_file.name)
+
+
+class ImportSchedulerTest(SimpleTestCase):
+    def setUp(self):
+        self.import_files = get_import_files([
+            '04_BackOfficeAsset.csv', '01_Region.csv', '01_Warehouse.csv',
+            '02_Category.csv', '03_AssetModel.csv', '05_Asset.csv',
+            'README.txt',
+        ])
+        self.files = {f.model_name: f for f in self.import_files}
+
+    def test_get_import_files(self):
+        self.assertEqual(
+            [(f.sort, f.model_name) for f in self.import_files],
+            [
+                (1, 'Region'), (1, 'Warehouse'), (2, 'Category'),
+                (3, 'AssetModel'), (4, 'BackOfficeAsset'), (5, 'Asset'),
+            ]
+        )
+
+    def test_get_dependencies(self):
+        dependencies = get_dependencies(self.import_files, _get_model)
+        self.assertEqual(dependencies[self.files['Region']], set())
+        self.assertEqual(dependencies[self.files['Category']], set())
+        self.assertEqual(
+            dependencies[self.files['AssetModel']],
+            {self.files['Category']}
+        )
+        self.assertEqual(
+            dependencies[self.files['BackOfficeAsset']],
+            {
+                self.files['Region'], self.files['Warehouse'],
+                self.files['AssetModel']
+            }
+        )
+        # asset is base of back office asset
+        self.assertIn(
+            self.files['BackOfficeAsset'], dependencies[self.files['Asset']]
+        )
+        self.assertNotIn(
+            self.files['Region'], dependencies[self.files['Asset']]
+        )
+
+    def test_run_import_in_order(self):
+        dependencies = get_dependencies(self.import_files, _get_model)
+        imported = []
+        run_import(dependencies, imported.append)
+        self.assertEqual(imported, self.import_files)
+
+    def test_run_import_in_parallel_after_dependencies(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        dependencies = get_dependencies(self.import_files, _get_model)
+        run_import(dependencies, partial(_import_file, tmp_dir), workers=3)
+        self.assertCountEqual(
+            os.listdir(tmp_dir), [f.name for f in self.import_files]
+        )
+        for import_file, required in dependencies.items():
+            with open(os.path.join(tmp_dir, import_file.name)) as f:
+                imported_before = json.load(f)
+            self.assertTrue(
+                {f.name for f in required} <= set(imported_before)
+            )
+
+    def test_run_import_in_parallel_raises_error_of_file_import(self):
+        dependencies = get_dependencies(self.import_files, _get_model)
+        with self.assertRaisesRegex(ValueError, '03_AssetModel.csv'):
+            run_import(dependencies, _fail_import, workers=2)
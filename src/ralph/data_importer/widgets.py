@@ -8,39 +8,37 @@ from import_export import widgets
 from ralph.assets.models.assets import ServiceEnvironment
 from ralph.back_office.models import BackOfficeAsset
 from ralph.data_center.models.physical import DataCenterAsset
+from ralph.data_importer.cache import get_imported_objects_cache
 from ralph.data_importer.models import ImportedObjects
 
 logger = logging.getLogger(__name__)
 
 
-def get_imported_obj(model, old_pk):
-    """Get imported object from old primary key.
+def get_imported_object_pk(model, old_pk):
+    """Get primary key of imported object from old primary key.
+
+    Mapping is resolved using cache of running import (if any).
 
     :param model: Django model
     :param old_pk: Old primary key
 
-    :return: ContentType, ImportedObjects
-    :rtype: tuple
+    :return: primary key of imported object or None
     """
-    content_type = ContentType.objects.get_for_model(model)
-    imported_obj = ImportedObjects.objects.filter(
-        content_type=content_type,
-        old_object_pk=str(old_pk)
-    ).first()
-
-    if not imported_obj:
-        msg = (
-            "Record with pk {pk} not found for model {model} "
-            "of '{content_type}'"
-        )
+    cache = get_imported_objects_cache()
+    if cache is not None:
+        object_pk = cache.get_object_pk(model, old_pk)
+    else:
+        object_pk = ImportedObjects.objects.filter(
+            content_type=ContentType.objects.get_for_model(model),
+            old_object_pk=str(old_pk)
+        ).values_list('object_pk', flat=True).first()
+
+    if object_pk is None:
+        msg = "Record with pk {pk} not found for model {model}"
         logger.warning(
-            msg.format(
-                pk=str(old_pk),
-                model=model._meta.model_name,
-                content_type=content_type,
-            )
+            msg.format(pk=str(old_pk), model=model._meta.model_name)
         )
-    return content_type, imported_obj
+    return object_pk
 
 
 class UserWidget(widgets.ForeignKeyWidget):
@@ -99,6 +97,16 @@ class BaseObjectManyToManyWidget(widgets.ManyToManyWidget):
         if not value:
             return self.model.objects.none()
         ids = value.split(self.separator)
+        cache = get_imported_objects_cache()
+        if cache is not None:
+            base_object_ids = [
+                cache.get_object_pk(model, old_pk)
+                for model in (BackOfficeAsset, DataCenterAsset)
+                for old_pk in ids
+            ]
+            return self.model.objects.filter(pk__in=[
+                pk for pk in base_object_ids if pk is not None
+            ])
         content_types = ContentType.objects.get_for_models(
             BackOfficeAsset,
             DataCenterAsset,
@@ -137,12 +145,10 @@ class BaseObjectWidget(widgets.ForeignKeyWidget):
         if not model:
             return None
 
-        content_type, imported_obj = get_imported_obj(model, asset_id)
+        object_pk = get_imported_object_pk(model, asset_id)
 
-        if imported_obj:
-            result = model.objects.filter(
-                pk=imported_obj.object_pk
-            ).first()
+        if object_pk is not None:
+            result = model.objects.filter(pk=object_pk).first()
 
         if result:
             return result.baseobject_ptr
@@ -157,11 +163,9 @@ class ImportedForeignKeyWidget(widgets.ForeignKeyWidget):
         result = None
         if value:
             if settings.MAP_IMPORTED_ID_TO_NEW_ID:
-                content_type, imported_obj = get_imported_obj(
-                    self.model, value
-                )
-                if imported_obj:
-                    value = imported_obj.object_pk
+                object_pk = get_imported_object_pk(self.model, value)
+                if object_pk is not None:
+                    value = object_pk
             result = self.model.objects.filter(pk=value).first()
         return result
 
@@ -181,6 +185,14 @@ class AssetServiceEnvWidget(widgets.ForeignKeyWidget):
     def clean(self, value):
         if not value:
             return None
+        cache = get_imported_objects_cache()
+        if cache is not None:
+            return cache.memoize(
+                (ServiceEnvironment, value), lambda: self._get(value)
+            )
+        return self._get(value)
+
+    def _get(self, value):
         try:
             if value.isdigit():
                 value = ServiceEnvironment.objects.get(pk=value)
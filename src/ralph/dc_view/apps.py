@@ -9,3 +9,4 @@ class DCViewConfig(RalphAppConfig):
     def ready(self):
         super().ready()
         from ralph.dc_view.views.ui import DataCenterView  # Noqa
+        from ralph.dc_view import occupancy  # Noqa
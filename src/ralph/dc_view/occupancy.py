@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+"""
+Occupancy of all racks in data center (free and used U, number of PDUs and
+power consumption of assets).
+
+Occupancy is calculated for all racks of data center at once (with constant
+number of queries) and cached per data center. Cache is invalidated when
+rack, data center asset or rack accessory is changed in a way which could
+affect occupancy (ex. position, rack or model is changed).
+
+Invalidation is seen by other processes only when cache is shared between
+them (ex. Redis), so with process local cache (default) occupancy is cached
+only for `PROCESS_LOCAL_CACHE_TIMEOUT` seconds.
+"""
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Case, Count, IntegerField, Sum, When
+
+from ralph.data_center.models.choices import Orientation
+from ralph.data_center.models.physical import (
+    DataCenterAsset,
+    Rack,
+    RackAccessory,
+    ServerRoom
+)
+from ralph.helpers import get_cache_timeout
+from ralph.lib.state_tracker import StateTracker
+
+CACHE_KEY = 'dc_view_occupancy_{}'
+
+# fields of models affecting occupancy
+OCCUPANCY_FIELDS = {
+    DataCenterAsset: (
+        'rack_id', 'position', 'orientation', 'model_id', 'slot_no',
+    ),
+    RackAccessory: ('rack_id', 'position'),
+    Rack: ('server_room_id', 'max_u_height'),
+}
+
+
+def _calculate_occupancy(data_center_id):
+    racks = Rack.objects.filter(
+        server_room__data_center_id=data_center_id
+    ).values_list('id', 'max_u_height')
+    rack_filter = {'rack__server_room__data_center_id': data_center_id}
+    accessories = defaultdict(list)
+    for rack_id, position in RackAccessory.objects.filter(
+        **rack_filter
+    ).values_list('rack_id', 'position'):
+        accessories[rack_id].append((position,))
+    dc_assets = defaultdict(list)
+    for rack_id, position, height in Rack.get_root_assets_queryset().filter(
+        **rack_filter
+    ).values_list('rack_id', 'position', 'model__height_of_device'):
+        dc_assets[rack_id].append((position, height))
+    summary = {
+        row['rack_id']: row
+        for row in DataCenterAsset.objects.filter(**rack_filter).values(
+            'rack_id'
+        ).annotate(
+            pdus=Sum(Case(
+                When(
+                    orientation__in=(Orientation.left, Orientation.right),
+                    position=0,
+                    then=1,
+                ),
+                default=0,
+                output_field=IntegerField(),
+            )),
+            power_consumption=Sum('model__power_consumption'),
+            assets=Count('id'),
+        )
+    }
+    occupancy = {}
+    for rack_id, max_u_height in racks:
+        free_u = Rack.calculate_free_u(
+            max_u_height, accessories[rack_id], dc_assets[rack_id]
+        )
+        rack_summary = summary.get(rack_id, {})
+        occupancy[rack_id] = {
+            'free_u': free_u,
+            'used_u': max_u_height - free_u,
+            'pdus': rack_summary.get('pdus') or 0,
+            'power_consumption': rack_summary.get('power_consumption') or 0,
+            'assets': rack_summary.get('assets') or 0,
+        }
+    return occupancy
+
+
+def get_racks_occupancy(data_center_id):
+    """
+    Return (cached) occupancy of racks in data center.
+
+    Returns:
+        dict with rack id as a key and dict with `free_u`, `used_u`, `pdus`,
+        `power_consumption` and `assets` (count) as a value
+    """
+    key = CACHE_KEY.format(data_center_id)
+    occupancy = cache.get(key)
+    if occupancy is None:
+        occupancy = _calculate_occupancy(data_center_id)
+        # occupancy is invalidated by signals - timeout is a safety net for
+        # changes made without them (ex. queryset update) and for processes
+        # not seeing invalidation (when cache is not shared)
+        cache.set(
+            key, occupancy,
+            get_cache_timeout(settings.DC_VIEW_OCCUPANCY_TIMEOUT)
+        )
+    return occupancy
+
+
+def invalidate_racks_occupancy(data_center_ids):
+    cache.delete_many([
+        CACHE_KEY.format(data_center_id)
+        for data_center_id in data_center_ids
+        if data_center_id is not None
+    ])
+
+
+def _get_data_center_ids(model, states):
+    # first field of state is rack (or server room for rack)
+    ids = {state[0] for state in states}
+    if model is Rack:
+        queryset = ServerRoom.objects.filter(pk__in=ids).values_list(
+            'data_center_id', flat=True
+        )
+    else:
+        queryset = Rack.objects.filter(pk__in=ids).values_list(
+            'server_room__data_center_id', flat=True
+        )
+    return set(queryset)
+
+
+def occupancy_changed_handler(sender, old_state, new_state):
+    invalidate_racks_occupancy(_get_data_center_ids(
+        sender, [state for state in (old_state, new_state) if state]
+    ))
+
+
+occupancy_tracker = StateTracker(
+    'dc_view_occupancy', OCCUPANCY_FIELDS, occupancy_changed_handler
+)
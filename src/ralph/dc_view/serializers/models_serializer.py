@@ -113,9 +113,12 @@ class DataCenterAssetSerializer(DataCenterAssetSerializerBase):
     # )
 
     def get_asset_extras(self, obj):
-        extras = AssetExtra.objects.select_related('parent').filter(
-            parent=obj
-        ) or []
+        # extras could be prefetched for many assets at once
+        extras = getattr(obj, 'prefetched_asset_extras', None)
+        if extras is None:
+            extras = AssetExtra.objects.select_related('content_type').filter(
+                parent=obj
+            )
         output = []
         for i in extras:
             output.append({'remarks': i.remarks, 'content': i.content, 'content_type': str(i.content_type)})
@@ -202,8 +205,24 @@ class RackSerializer(AdminLinkMixin, RackBaseSerializer):
         fields = RackBaseSerializer.Meta.fields + ('rack_admin_url',)
 
 
+class DCRackSerializer(RackSerializer):
+    """
+    Rack with its occupancy (free U etc.) taken from `occupancy` passed in
+    serializer context (see `ralph.dc_view.occupancy`).
+    """
+    class Meta(RackSerializer.Meta):
+        fields = tuple(
+            field for field in RackSerializer.Meta.fields if field != 'free_u'
+        )
+
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        data.update(self.context['occupancy'].get(obj.id, {}))
+        return data
+
+
 class DCSerializer(AdminLinkMixin, serializers.ModelSerializer):
-    rack_set = RackSerializer(many=True)
+    rack_set = DCRackSerializer(many=True)
     admin_link = serializers.SerializerMethodField('admin_link')
     server_rooms = ServerRoomtSerializer(many=True)
 
@@ -1,9 +1,14 @@
 import json
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from rest_framework.test import APIClient
 
+from ralph.assets.models.assets import AssetExtra
 from ralph.assets.models.choices import ObjectModelType
 from ralph.assets.tests.factories import (
     DataCenterAssetModelFactory,
@@ -19,6 +24,7 @@ from ralph.data_center.tests.factories import (
     RackFactory,
     ServerRoomFactory
 )
+from ralph.dc_view.occupancy import get_racks_occupancy
 from ralph.dc_view.serializers.models_serializer import (
     TYPE_ACCESSORY,
     TYPE_ASSET
@@ -120,7 +126,8 @@ class TestRestAssetInfoPerRack(TestCase):
                     'orientation': 'front',
                     'remarks': '',
                     'service': 'Service1',
-                    'url': self.asset_1.get_absolute_url()
+                    'url': self.asset_1.get_absolute_url(),
+                    'asset_extras': [],
                 },
                 {
                     '_type': TYPE_ACCESSORY,
@@ -141,3 +148,162 @@ class TestRestAssetInfoPerRack(TestCase):
             ]
         }
         self.assertEqual(returned_json, expected_json)
+
+    def _get_rack_queries_count(self):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get('/api/rack/{0}/'.format(self.rack_1.id))
+        self.assertEqual(response.status_code, 200)
+        return len(context.captured_queries)
+
+    def test_get_queries_count_does_not_depend_on_rack_fill(self):
+        self.rack_1.max_u_height = 48
+        self.rack_1.save()
+        queries_count = self._get_rack_queries_count()
+
+        blade_model = DataCenterAssetModelFactory(
+            type=ObjectModelType.data_center, has_parent=True
+        )
+        for position in range(2, 10):
+            chassis = DataCenterAssetFactory(
+                rack=self.rack_1, position=position, slot_no='',
+            )
+            AssetExtra.objects.create(parent=chassis, content='extra')
+            for slot_no in ('1', '3'):
+                DataCenterAssetFactory(
+                    rack=self.rack_1, parent=chassis, model=blade_model,
+                    slot_no=slot_no, position=position,
+                )
+        self.assertEqual(self._get_rack_queries_count(), queries_count)
+
+    def test_get_children_and_extras(self):
+        blade_model = DataCenterAssetModelFactory(
+            type=ObjectModelType.data_center, has_parent=True
+        )
+        blade = DataCenterAssetFactory(
+            rack=self.rack_1, parent=self.asset_1, model=blade_model,
+            slot_no='2', position=1,
+        )
+        AssetExtra.objects.create(parent=self.asset_1, content='extra')
+        returned_json = json.loads(
+            self.client.get(
+                '/api/rack/{0}/'.format(self.rack_1.id)
+            ).content.decode()
+        )
+        asset = returned_json['devices'][0]
+        self.assertEqual(
+            [child['id'] for child in asset['children']], [blade.id, 0]
+        )
+        self.assertEqual(
+            [extra['content'] for extra in asset['asset_extras']], ['extra']
+        )
+
+
+class TestDataCenterRacksOccupancy(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_model().objects.create_superuser(
+            'test', 'test@test.test', 'test'
+        )
+        self.client = APIClient()
+        self.client.login(username='test', password='test')
+        self.server_room = ServerRoomFactory()
+        self.data_center = self.server_room.data_center
+        self.asset_model = DataCenterAssetModelFactory(
+            type=ObjectModelType.data_center,
+            height_of_device=2,
+            power_consumption=100,
+        )
+        self.rack = self._create_rack()
+
+    def _create_rack(self):
+        rack = RackFactory(server_room=self.server_room, max_u_height=10)
+        self.asset = DataCenterAssetFactory(
+            rack=rack, position=1, slot_no='', model=self.asset_model,
+        )
+        DataCenterAssetFactory(
+            rack=rack, position=0, orientation=Orientation.left,
+            model=self.asset_model,
+        )
+        RackAccessoryFactory(
+            rack=rack, position=5, orientation=Orientation.front,
+            accessory=AccessoryFactory(),
+        )
+        return rack
+
+    def _get_racks(self):
+        response = self.client.get(
+            '/api/data_center/{}/'.format(self.data_center.id)
+        )
+        self.assertEqual(response.status_code, 200)
+        return {rack['id']: rack for rack in response.data['rack_set']}
+
+    def test_racks_occupancy(self):
+        rack = self._get_racks()[self.rack.id]
+        self.assertEqual(rack['free_u'], self.rack.get_free_u())
+        self.assertEqual(rack['free_u'], 7)
+        self.assertEqual(rack['used_u'], 3)
+        self.assertEqual(rack['pdus'], 1)
+        self.assertEqual(rack['assets'], 2)
+        self.assertEqual(rack['power_consumption'], 200)
+
+    def test_queries_count_does_not_depend_on_racks_count(self):
+        with CaptureQueriesContext(connection) as context:
+            self._get_racks()
+        queries_count = len(context.captured_queries)
+        for _ in range(5):
+            self._create_rack()
+        with CaptureQueriesContext(connection) as context:
+            racks = self._get_racks()
+        self.assertEqual(len(racks), 6)
+        self.assertEqual(len(context.captured_queries), queries_count)
+
+    def test_occupancy_cached(self):
+        get_racks_occupancy(self.data_center.id)
+        with self.assertNumQueries(0):
+            get_racks_occupancy(self.data_center.id)
+        # change not related to occupancy doesn't invalidate it
+        self.asset.hostname = 'new-hostname'
+        self.asset.save()
+        with self.assertNumQueries(0):
+            get_racks_occupancy(self.data_center.id)
+
+    @override_settings(
+        DC_VIEW_OCCUPANCY_TIMEOUT=3600, PROCESS_LOCAL_CACHE_TIMEOUT=30
+    )
+    def test_occupancy_timeout_limited_when_cache_not_shared(self):
+        with patch('ralph.dc_view.occupancy.cache') as cache_mock:
+            cache_mock.get.return_value = None
+            get_racks_occupancy(self.data_center.id)
+        self.assertEqual(cache_mock.set.call_args[0][2], 30)
+
+    @override_settings(
+        DC_VIEW_OCCUPANCY_TIMEOUT=3600, PROCESS_LOCAL_CACHE_TIMEOUT=30
+    )
+    def test_occupancy_timeout_not_limited_when_cache_shared(self):
+        with patch('ralph.dc_view.occupancy.cache') as cache_mock, patch(
+            'ralph.helpers.is_cache_shared', return_value=True
+        ):
+            cache_mock.get.return_value = None
+            get_racks_occupancy(self.data_center.id)
+        self.assertEqual(cache_mock.set.call_args[0][2], 3600)
+
+    def test_occupancy_invalidated_on_change(self):
+        get_racks_occupancy(self.data_center.id)
+        self.asset.position = 10
+        self.asset.save()
+        # asset is now partially outside of rack
+        self.assertEqual(
+            get_racks_occupancy(self.data_center.id)[self.rack.id]['free_u'],
+            8
+        )
+        other_rack = RackFactory(server_room=self.server_room)
+        self.asset.rack = other_rack
+        self.asset.save()
+        occupancy = get_racks_occupancy(self.data_center.id)
+        self.assertEqual(occupancy[self.rack.id]['free_u'], 9)
+        self.assertEqual(occupancy[self.rack.id]['assets'], 1)
+        self.asset.delete()
+        self.assertEqual(
+            get_racks_occupancy(self.data_center.id)[other_rack.id]['assets'],
+            0
+        )
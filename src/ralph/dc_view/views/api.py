@@ -1,8 +1,16 @@
+from django.db.models import Prefetch
 from django.http import Http404
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from ralph.data_center.models.physical import DataCenter, Rack, RackAccessory
+from ralph.assets.models.assets import AssetExtra
+from ralph.data_center.models.physical import (
+    DataCenter,
+    DataCenterAsset,
+    Rack,
+    RackAccessory
+)
+from ralph.dc_view.occupancy import get_racks_occupancy
 from ralph.dc_view.serializers.models_serializer import (
     DataCenterAssetSerializer,
     DCSerializer,
@@ -22,10 +30,24 @@ class DCAssetsView(APIView):
             raise Http404
 
     def _get_assets(self, rack):
-        return DataCenterAssetSerializer(
-            rack.get_root_assets(),
-            many=True
-        ).data
+        # children (blade servers) and extras of all assets are fetched with
+        # single query each, so number of queries doesn't depend on rack fill
+        assets = rack.get_root_assets().select_related(
+            'service_env__service'
+        ).prefetch_related(
+            Prefetch(
+                'children',
+                queryset=DataCenterAsset.get_related_assets_queryset(
+                ).select_related('service_env__service'),
+                to_attr='prefetched_related_assets',
+            ),
+            Prefetch(
+                'children',
+                queryset=AssetExtra.objects.select_related('content_type'),
+                to_attr='prefetched_asset_extras',
+            ),
+        )
+        return DataCenterAssetSerializer(assets, many=True).data
 
     def _get_rack_data(self, rack):
         return RackSerializer(rack).data
@@ -81,6 +103,7 @@ class DCRacksAPIView(APIView):
         :param data_center_id int: data_center id
         :returns list: list of informations about racks in given data center
         """
-        return Response(
-            DCSerializer(self.get_object(data_center_id)).data
-        )
+        data_center = self.get_object(data_center_id)
+        return Response(DCSerializer(data_center, context={
+            'occupancy': get_racks_occupancy(data_center.id),
+        }).data)
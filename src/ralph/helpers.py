@@ -1,5 +1,14 @@
+import time
+
+from django.conf import settings
 from django.http import HttpResponse
 
+# cache backends keeping data in memory of a single process
+PROCESS_LOCAL_CACHE_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
 
 def add_request_to_form(form_class, request):
     form_class._request = request
@@ -32,3 +41,55 @@ def generate_pdf_response(pdf_data, file_name):
         file_name,
     )
     return response
+
+
+def is_cache_shared(alias='default'):
+    """
+    Return True if cache is shared between processes (ex. Redis), so changes
+    (invalidations) made by one process are seen by all others.
+    """
+    backend = settings.CACHES[alias]['BACKEND']
+    return backend not in PROCESS_LOCAL_CACHE_BACKENDS
+
+
+def get_cache_timeout(timeout, alias='default'):
+    """
+    Return `timeout` if cache is shared between processes, otherwise (ex.
+    default local memory cache) limit it to `PROCESS_LOCAL_CACHE_TIMEOUT`.
+    Data invalidated by signals in one process is stale in other processes
+    until it expires, so it can't be kept for long in not shared cache.
+    """
+    if is_cache_shared(alias):
+        return timeout
+    return min(timeout, settings.PROCESS_LOCAL_CACHE_TIMEOUT)
+
+
+class Timer(object):
+    """
+    Context manager measuring time elapsed inside it (in seconds, available
+    as `elapsed` after exit). When `name` and `stream` (ex. stdout of
+    command) are given, elapsed time is written to the stream.
+
+    Example:
+    >>> with Timer('build index', self.stdout):
+    ...     index = NetworkIndex(networks)
+    >>> with Timer() as timer:
+    ...     call_command('importer', path)
+    >>> timer.elapsed
+    12.3
+    """
+    def __init__(self, name=None, stream=None):
+        self.name = name
+        self.stream = stream
+        self.elapsed = None
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.elapsed = time.perf_counter() - self._start
+        if self.stream is not None and exc_type is None:
+            self.stream.write('  {:<40} {:.3f}s'.format(
+                self.name, self.elapsed
+            ))
@@ -1,8 +1,7 @@
 """Low-level network utilities, silently returning empty answers in place of
 domain-related exceptions."""
 
-
-import socket
+from ralph.lib.network import resolver
 
 # moved from old ralph's source code
 # OLD_PATH: ralph/util/network.py
@@ -12,9 +11,10 @@ def hostname(ip, reverse=False):
     """hostname(ip) -> 'hostname'
 
     `ip` may be a string or ipaddr.IPAddress instance.
-    If no hostname known, returns None."""
-    try:
-        result = socket.gethostbyaddr(str(ip))
-        return result[0] if not reverse else result[2][0]
-    except socket.error:
-        return None
+    If no hostname known, returns None.
+
+    Lookups are cached and timed out (see `ralph.lib.network.resolver`)."""
+    dns_resolver = resolver.get_resolver()
+    if reverse:
+        return dns_resolver.address(ip)
+    return dns_resolver.hostname(ip)
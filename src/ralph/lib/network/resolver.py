@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+"""
+Cached DNS resolution with timeouts.
+
+Lookups (`socket.gethostbyaddr`) are run in bounded thread pool, so single
+slow lookup could not block the caller longer than the timeout. Results
+(including negative ones) are cached in-process and in shared (Django)
+cache.
+"""
+import logging
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+
+class DNSResolver(object):
+    """
+    Resolver of DNS queries with in-process and shared TTL cache.
+
+    Result of query is `(hostname, aliases, addresses)` tuple (as returned
+    by `socket.gethostbyaddr`) or empty tuple if query could not be resolved.
+    """
+    cache_key = 'ralph_dns_{}'
+
+    def __init__(
+        self, lookup=socket.gethostbyaddr, timeout=2, max_workers=10,
+        cache_timeout=3600, negative_cache_timeout=300, max_cache_size=10000,
+    ):
+        self._lookup = lookup
+        self.timeout = timeout
+        self.max_workers = max_workers
+        self.cache_timeout = cache_timeout
+        self.negative_cache_timeout = negative_cache_timeout
+        self.max_cache_size = max_cache_size
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._local_cache = {}
+        self._lock = threading.Lock()
+
+    def _get_cached(self, query):
+        with self._lock:
+            result, expires = self._local_cache.get(query, (None, 0))
+        if expires > time.monotonic():
+            return result
+        result = cache.get(self.cache_key.format(query))
+        if result is not None:
+            self._set_local_cached(query, tuple(result))
+        return result
+
+    def _set_local_cached(self, query, result):
+        timeout = (
+            self.cache_timeout if result else self.negative_cache_timeout
+        )
+        with self._lock:
+            if len(self._local_cache) >= self.max_cache_size:
+                self._local_cache.clear()
+            self._local_cache[query] = (result, time.monotonic() + timeout)
+        return timeout
+
+    def _set_cached(self, query, result):
+        timeout = self._set_local_cached(query, result)
+        cache.set(self.cache_key.format(query), result, timeout)
+
+    def _query(self, query):
+        try:
+            return tuple(self._lookup(query))
+        except (socket.error, UnicodeError):
+            return ()
+
+    def lookup_many(self, queries):
+        """
+        Resolve queries (concurrently).
+
+        Returns:
+            dict with query as a key and result as a value (`None` if lookup
+            timed out)
+        """
+        results = {}
+        pending = []
+        for query in set(map(str, queries)):
+            result = self._get_cached(query)
+            if result is None:
+                pending.append(query)
+            else:
+                results[query] = result
+        # every lookup is given `timeout` seconds - at most `max_workers`
+        # lookups are run at once
+        for index in range(0, len(pending), self.max_workers):
+            futures = {
+                query: self._executor.submit(self._query, query)
+                for query in pending[index:index + self.max_workers]
+            }
+            deadline = time.monotonic() + self.timeout
+            for query, future in futures.items():
+                try:
+                    result = future.result(
+                        timeout=max(0, deadline - time.monotonic())
+                    )
+                except TimeoutError:
+                    logger.warning('DNS lookup of {} timed out'.format(query))
+                    result = None
+                else:
+                    self._set_cached(query, result)
+                results[query] = result
+        return results
+
+    def lookup(self, query):
+        return self.lookup_many([query])[str(query)]
+
+    def hostname(self, ip):
+        """
+        Return hostname of IP address (or None, if not known).
+        """
+        result = self.lookup(ip)
+        return result[0] if result else None
+
+    def address(self, hostname):
+        """
+        Return IP address of hostname (or None, if not known).
+        """
+        result = self.lookup(hostname)
+        return result[2][0] if result and result[2] else None
+
+    def hostnames(self, ips):
+        """
+        Return dict with IP address as a key and its hostname (or None, if not
+        known) as a value.
+        """
+        return {
+            ip: result[0] if result else None
+            for ip, result in self.lookup_many(ips).items()
+        }
+
+
+_resolver = None
+
+
+def get_resolver():
+    """
+    Return (process-wide) resolver configured in settings.
+    """
+    global _resolver
+    if _resolver is None:
+        _resolver = DNSResolver(
+            timeout=getattr(settings, 'DNS_RESOLVER_TIMEOUT', 2),
+            max_workers=getattr(settings, 'DNS_RESOLVER_WORKERS', 10),
+            cache_timeout=getattr(settings, 'DNS_CACHE_TIMEOUT', 3600),
+            negative_cache_timeout=getattr(
+                settings, 'DNS_NEGATIVE_CACHE_TIMEOUT', 300
+            ),
+        )
+    return _resolver
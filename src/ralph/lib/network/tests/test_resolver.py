@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import socket
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import override_settings, TestCase
+
+from ralph.data_center.models.networks import (
+    IPAddress,
+    reconcile_ip_addresses,
+    resolve_ip_hostnames
+)
+from ralph.data_center.tests.factories import DataCenterAssetFactory
+from ralph.lib import network
+from ralph.lib.network.resolver import DNSResolver
+
+
+class FakeLookup(object):
+    """
+    Fake `socket.gethostbyaddr` resolving 10.0.0.x to hostx.local.
+    """
+    def __init__(self, delay=0):
+        self.delay = delay
+        self.queries = []
+
+    def __call__(self, query):
+        self.queries.append(query)
+        time.sleep(self.delay)
+        if query.startswith('10.0.0.'):
+            host_no = query.rsplit('.', 1)[1]
+            return ('host{}.local'.format(host_no), [], [query])
+        if query.startswith('host'):
+            host_no = query[4:].split('.')[0]
+            return (query, [], ['10.0.0.{}'.format(host_no)])
+        raise socket.herror('Unknown host')
+
+
+class DNSResolverTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lookup = FakeLookup()
+        self.resolver = DNSResolver(lookup=self.lookup)
+
+    def test_hostname(self):
+        self.assertEqual(self.resolver.hostname('10.0.0.1'), 'host1.local')
+        self.assertEqual(self.resolver.address('host2.local'), '10.0.0.2')
+        self.assertIsNone(self.resolver.hostname('192.168.0.1'))
+
+    def test_lookups_are_cached(self):
+        self.resolver.hostname('10.0.0.1')
+        self.resolver.hostname('192.168.0.1')
+        self.resolver.hostname('10.0.0.1')
+        self.resolver.hostname('192.168.0.1')
+        self.assertEqual(self.lookup.queries, ['10.0.0.1', '192.168.0.1'])
+
+    def test_lookups_are_shared_between_processes(self):
+        self.resolver.hostname('10.0.0.1')
+        # another resolver (ex. in another process) uses shared cache
+        lookup = FakeLookup()
+        resolver = DNSResolver(lookup=lookup)
+        self.assertEqual(resolver.hostname('10.0.0.1'), 'host1.local')
+        self.assertEqual(lookup.queries, [])
+
+    def test_lookup_timeout(self):
+        resolver = DNSResolver(lookup=FakeLookup(delay=0.2), timeout=0.01)
+        self.assertIsNone(resolver.hostname('10.0.0.1'))
+        # timed out lookup is not cached
+        self.assertIsNone(resolver._get_cached('10.0.0.1'))
+
+    def test_hostnames_are_resolved_concurrently(self):
+        resolver = DNSResolver(lookup=FakeLookup(delay=0.1), max_workers=10)
+        start = time.monotonic()
+        hostnames = resolver.hostnames(
+            ['10.0.0.{}'.format(i) for i in range(10)]
+        )
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(hostnames['10.0.0.5'], 'host5.local')
+
+
+@override_settings(CHECK_IP_HOSTNAME_ON_SAVE=True)
+class IPAddressHostnameTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.lookup = FakeLookup()
+        patcher = mock.patch(
+            'ralph.lib.network.resolver.get_resolver',
+            return_value=DNSResolver(lookup=self.lookup)
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_network_hostname(self):
+        self.assertEqual(network.hostname('10.0.0.1'), 'host1.local')
+        self.assertEqual(
+            network.hostname('host1.local', reverse=True), '10.0.0.1'
+        )
+
+    def test_hostname_resolved_on_save(self):
+        ip = IPAddress.objects.create(address='10.0.0.1')
+        self.assertEqual(ip.hostname, 'host1.local')
+
+    @override_settings(CHECK_IP_HOSTNAME_DEFERRED=True)
+    def test_hostname_resolved_in_deferred_mode(self):
+        ips = [
+            IPAddress.objects.create(address='10.0.0.{}'.format(i))
+            for i in range(1, 4)
+        ]
+        reconcile_ip_addresses({DataCenterAssetFactory(): ['10.0.0.4']})
+        IPAddress.objects.create(address='192.168.0.1')
+        self.assertEqual(self.lookup.queries, [])
+        self.assertFalse(
+            IPAddress.objects.filter(hostname__isnull=False).exists()
+        )
+
+        self.assertEqual(resolve_ip_hostnames(chunk_size=2), 4)
+
+        ips[0].refresh_from_db()
+        self.assertEqual(ips[0].hostname, 'host1.local')
+        self.assertEqual(
+            IPAddress.objects.get(address='10.0.0.4').hostname, 'host4.local'
+        )
+        self.assertIsNone(
+            IPAddress.objects.get(address='192.168.0.1').hostname
+        )
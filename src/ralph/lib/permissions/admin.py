@@ -1,5 +1,6 @@
 # -*- coding: utf-8 -*-
 import logging
+from collections import defaultdict
 from copy import deepcopy
 
 from django import forms
@@ -109,6 +110,9 @@ class PermissionsPerObjectFormMixin(RequestFormMixin):
         Check if user has permission to save chosen related models
         (ex. ForeignKeys).
         """
+        # collect values of all related fields to check permissions to them
+        # using single query for every related model
+        values = defaultdict(list)
         for field_name, field in self.fields.items():
             value = []
             if (
@@ -118,12 +122,17 @@ class PermissionsPerObjectFormMixin(RequestFormMixin):
                 value = self.cleaned_data.get(field_name)
                 if value and not isinstance(value, (list, tuple, QuerySet)):
                     value = [value]
-            if field_name in self.fields and value:
-                for obj in value:
-                    if not obj.has_permission_to_object(self._user):
-                        self.add_error(field_name, ValidationError(
-                            "You don't have permissions to select this value"
-                        ))
+            if value:
+                values[field.queryset.model].append((field_name, value))
+        for model, fields_values in values.items():
+            permitted = model.filter_permitted(self._user, [
+                obj.pk for _, value in fields_values for obj in value
+            ])
+            for field_name, value in fields_values:
+                if any(obj.pk not in permitted for obj in value):
+                    self.add_error(field_name, ValidationError(
+                        "You don't have permissions to select this value"
+                    ))
 
     def clean(self):
         super().clean()
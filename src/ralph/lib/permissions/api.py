@@ -4,12 +4,18 @@ Django Rest Framework Mixins to use with permissions per field and per object.
 """
 from collections import OrderedDict
 
+from django.core.exceptions import ValidationError as DjangoValidationError
 from django.utils.translation import ugettext_lazy as _
 from rest_framework.compat import get_model_name
 from rest_framework.exceptions import ValidationError
 from rest_framework.fields import empty
 from rest_framework.filters import BaseFilterBackend
 from rest_framework.permissions import IsAuthenticated as DRFIsAuthenticated
+from rest_framework.relations import (
+    MANY_RELATION_KWARGS,
+    ManyRelatedField,
+    PrimaryKeyRelatedField
+)
 
 from ralph.lib.permissions import PermByFieldMixin, PermissionsForObjectMixin
 
@@ -118,10 +124,48 @@ class PermissionsPerFieldSerializerMixin(object):
         return result
 
 
+class PermittedManyRelatedField(ManyRelatedField):
+    """
+    Many related field checking permissions to all passed objects at once
+    (using `filter_permitted`) instead of fetching every object separately.
+    """
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+        child = self.child_relation
+        queryset = child.get_queryset()
+        model = queryset.model
+        pks = []
+        for pk in data:
+            try:
+                pks.append(model._meta.pk.to_python(pk))
+            except (TypeError, DjangoValidationError):
+                child.fail('incorrect_type', data_type=type(pk).__name__)
+        permitted = model.filter_permitted(self.context['request'].user, pks)
+        objects = queryset.in_bulk(permitted) if permitted else {}
+        for pk in pks:
+            if pk not in objects:
+                child.fail('does_not_exist', pk_value=pk)
+        return [objects[pk] for pk in pks]
+
+
+class PermittedPrimaryKeyRelatedField(PrimaryKeyRelatedField):
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs.keys():
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return PermittedManyRelatedField(**list_kwargs)
+
+
 class RelatedObjectsPermissionsSerializerMixin(object):
     """
     Apply permission validation on object level for related fields
-    (ex. foreign keys or many to many fields).
+    (ex. foreign keys or many to many fields). Permissions to objects of
+    many to many fields are checked using single query.
 
     This class should be used as a mixin to
     `rest_framework.serializers.BaseSerializer` subclasses.
@@ -140,6 +184,9 @@ class RelatedObjectsPermissionsSerializerMixin(object):
                 self.context['request'].user, queryset
             )
             field_kwargs['queryset'] = queryset
+            # permissions to many related objects are checked at once
+            if field_class is PrimaryKeyRelatedField:
+                field_class = PermittedPrimaryKeyRelatedField
         return field_class, field_kwargs
 
 
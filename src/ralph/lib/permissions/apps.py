@@ -1,7 +1,10 @@
 # -*- coding: utf-8 -*-
 from django.apps import AppConfig
-from django.db.models.signals import post_migrate
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.db.models.signals import m2m_changed, post_delete, post_migrate
 
+from ralph.lib.permissions.models import field_permissions_changed_handler
 from ralph.lib.permissions.views import update_extra_view_permissions
 
 
@@ -11,3 +14,16 @@ class PermissionAppConfig(AppConfig):
 
     def ready(self):
         post_migrate.connect(update_extra_view_permissions)
+        user_model = get_user_model()
+        for through in (
+            user_model.groups.through,
+            user_model.user_permissions.through,
+            Group.permissions.through,
+        ):
+            m2m_changed.connect(
+                field_permissions_changed_handler, sender=through
+            )
+        for model in (Group, Permission):
+            post_delete.connect(
+                field_permissions_changed_handler, sender=model
+            )
@@ -1,4 +1,6 @@
 import operator
+import threading
+import weakref
 
 from django.db import models
 from django.db.models.base import ModelBase
@@ -27,6 +29,88 @@ def get_perm_key(action, class_name, field_name):
     return '{}_{}_{}_field'.format(action, class_name, field_name)
 
 
+# version of field permissions; cached permissions (attached to user object)
+# computed for older version are discarded
+_field_permissions_version = 0
+FIELD_PERMISSIONS_CACHE_ATTR = '_field_permissions_cache'
+# Django's permissions caches attached to user object
+DJANGO_PERMISSIONS_CACHE_ATTRS = (
+    '_perm_cache', '_user_perm_cache', '_group_perm_cache',
+)
+# user objects (alive, ex. `request.user`) with cached permissions - their
+# caches are cleared when permissions of any group change; objects are kept
+# by id, since users are compared by primary key
+_users_with_cached_permissions = weakref.WeakValueDictionary()
+_users_lock = threading.Lock()
+
+
+def _clear_permissions_cache(user, attrs):
+    for attr in attrs:
+        try:
+            delattr(user, attr)
+        except AttributeError:
+            pass
+
+
+def invalidate_field_permissions_cache(user=None):
+    """
+    Invalidate cached permissions by field.
+
+    When user is passed, only cache attached to this user object is cleared
+    (including Django's permissions cache), otherwise cache of every user is
+    invalidated (ex. when permissions of group has changed) - Django's
+    permissions cache of every alive user object with cached permissions is
+    cleared as well.
+    """
+    global _field_permissions_version
+    if user is not None:
+        _clear_permissions_cache(
+            user,
+            (FIELD_PERMISSIONS_CACHE_ATTR,) + DJANGO_PERMISSIONS_CACHE_ATTRS
+        )
+        return
+    _field_permissions_version += 1
+    with _users_lock:
+        users = list(_users_with_cached_permissions.values())
+    for cached_user in users:
+        _clear_permissions_cache(cached_user, DJANGO_PERMISSIONS_CACHE_ATTRS)
+
+
+def _get_field_permissions_cache(user):
+    """
+    Return (mutable) field permissions matrix attached to user object.
+
+    Matrix is a dict with (model, action) as a key and set of fields to which
+    user has access as a value. Since `request.user` is created for every
+    request, matrix lives as long as a single request.
+    """
+    version, cache = getattr(user, FIELD_PERMISSIONS_CACHE_ATTR, (None, None))
+    if version != _field_permissions_version:
+        if version is None:
+            with _users_lock:
+                _users_with_cached_permissions[id(user)] = user
+        else:
+            # permissions has changed since matrix was computed
+            _clear_permissions_cache(user, DJANGO_PERMISSIONS_CACHE_ATTRS)
+        cache = {}
+        setattr(
+            user, FIELD_PERMISSIONS_CACHE_ATTR,
+            (_field_permissions_version, cache)
+        )
+    return cache
+
+
+def field_permissions_changed_handler(sender, instance=None, **kwargs):
+    """
+    Signal handler invalidating cached permissions by field when user's groups
+    or permissions (or group's permissions) has changed.
+    """
+    from django.contrib.auth import get_user_model
+    if isinstance(instance, get_user_model()):
+        invalidate_field_permissions_cache(instance)
+    invalidate_field_permissions_cache()
+
+
 class user_permission(object):  # noqa
     """
     Decorator for functions which should validate if user has all rights to
@@ -138,6 +222,7 @@ class PermissionsBase(ModelBase):
         )
         new_class.add_to_class('_permissions', permissions)
         cls._init_meta_permissions(cls, new_class)
+        cls._init_field_perm_keys(cls, new_class)
         return new_class
 
     def _init_blacklist(cls, permissions, bases):
@@ -170,6 +255,25 @@ class PermissionsBase(ModelBase):
                 _('Can change {} field').format(field.verbose_name)
             ))
 
+    def _init_field_perm_keys(cls, new_class):
+        """
+        Precompute full permission names (with app label) for every field and
+        action to not build them on every permission check.
+        """
+        class_name = new_class._meta.model_name
+        app_label = new_class._meta.app_label
+        new_class._field_perm_keys = {
+            action: {
+                field.name: '{}.{}'.format(
+                    app_label, get_perm_key(action, class_name, field.name)
+                )
+                for field in (
+                    new_class._meta.fields + new_class._meta.many_to_many
+                )
+            }
+            for action in ('view', 'change')
+        }
+
     def _init_object_permissions(cls, permissions, bases, apply_bases=True):
         has_access = getattr(permissions, 'has_access', user_permission())
         if apply_bases:
@@ -207,20 +311,54 @@ class PermByFieldMixin(models.Model, metaclass=PermissionsBase):
         :rtype: bool
         """
         # TODO: if it's m2m field, check on the other side
-        perm_key = get_perm_key(
-            action,
-            cls._meta.model_name,
-            field_name
-        )
-        perm = user.has_perm(
-            '{}.{}'.format(cls._meta.app_label, perm_key)
-        )
+        if (
+            field_name in cls._field_perm_keys.get(action, {}) and
+            field_name not in cls._permissions.blacklist
+        ):
+            return field_name in cls._get_allowed_fields(user, action)
+        return cls._has_perm_to_field(field_name, user, action)
+
+    @classmethod
+    def _has_perm_to_field(cls, field_name, user, action='change'):
+        """
+        Check (without cache) if the user has the permission to the field.
+        """
+        try:
+            perm_key = cls._field_perm_keys[action][field_name]
+        except KeyError:
+            perm_key = '{}.{}'.format(
+                cls._meta.app_label,
+                get_perm_key(action, cls._meta.model_name, field_name)
+            )
+        perm = user.has_perm(perm_key)
         # If the user does not have rights to view,
         # but has the right to change he can view the field
         if action == 'view' and not perm:
-            return cls.has_access_to_field(field_name, user, action='change')
+            return cls._has_perm_to_field(field_name, user, action='change')
         return perm
 
+    @classmethod
+    def _get_allowed_fields(cls, user, action='change'):
+        """
+        Return (cached) frozenset of fields names to which user has
+        permission.
+        """
+        cache = _get_field_permissions_cache(user)
+        try:
+            return cache[(cls, action)]
+        except KeyError:
+            pass
+        blacklist = cls._permissions.blacklist
+        result = cache[(cls, action)] = frozenset(
+            field.name
+            for field in (cls._meta.fields + cls._meta.many_to_many)
+            if (
+                field.name not in blacklist and
+                cls._has_perm_to_field(field.name, user, action)
+            )
+        )
+        return result
+
     @classmethod
     def allowed_fields(cls, user, action='change'):
         """
@@ -238,20 +376,10 @@ class PermByFieldMixin(models.Model, metaclass=PermissionsBase):
         :param action: permission action (change/view)
         :type action: str
 
-        :return: List of field names
-        :rtype: list
+        :return: Set of field names
+        :rtype: set
         """
-        result = []
-        blacklist = cls._permissions.blacklist
-
-        for field in (cls._meta.fields + cls._meta.many_to_many):
-            if (
-                field.name not in blacklist and
-                cls.has_access_to_field(field.name, user, action)
-            ):
-                result.append(field.name)
-
-        return set(result)
+        return set(cls._get_allowed_fields(user, action))
 
     class Meta:
         abstract = True
@@ -264,13 +392,35 @@ class PermissionsForObjectMixin(models.Model, metaclass=PermissionsBase):
         """
         Check if user has all rights to single object.
         """
-        user_perms = self._permissions.has_access(user)
-        if not user_perms:
-            return True
-        return self._default_manager.filter(
+        return self.pk in self.filter_permitted(user, [self.pk])
+
+    @classmethod
+    def filter_permitted(cls, user, pks):
+        """
+        Return subset of passed primary keys of objects to which user has
+        access. Every object is checked using single query.
+
+        :Example:
+
+            >> Article.filter_permitted(user, [1, 2, 3])
+            {1, 3}
+
+        :param user: User object
+        :type user: django User object
+        :param pks: primary keys of objects to check
+        :type pks: iterable
+
+        :return: Set of primary keys
+        :rtype: set
+        """
+        pks = {cls._meta.pk.to_python(pk) for pk in pks}
+        user_perms = cls._permissions.has_access(user)
+        if not user_perms or not pks:
+            return pks
+        return set(cls._default_manager.filter(
             user_perms,
-            pk=self.pk
-        ).exists()
+            pk__in=pks
+        ).values_list('pk', flat=True))
 
     @classmethod
     def _get_objects_for_user(cls, user, queryset=None):
@@ -5,15 +5,18 @@ from django.contrib.auth.models import Permission
 from django.contrib.contenttypes.models import ContentType
 from django.core.urlresolvers import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APIRequestFactory, APITestCase
 
 from ralph.lib.permissions.tests._base import PermissionsTestMixin
-from ralph.lib.permissions.tests.models import Foo
+from ralph.lib.permissions.tests.api import LibrarySerializer
+from ralph.lib.permissions.tests.models import Foo, Library
 
 
 class PermissionsForObjectTests(PermissionsTestMixin, APITestCase):
     def setUp(self):
         self._create_users_and_articles()
+        self.user1.is_staff = True
+        self.user1.save()
 
     def test_filter_objects_list_should_return_only_visible_by_user(self):
         url = reverse('test-api:article-list')
@@ -34,6 +37,51 @@ class PermissionsForObjectTests(PermissionsTestMixin, APITestCase):
         response = self.client.get(url, format='json')
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_add_many_related_objects_when_user_has_permissions(self):
+        url = reverse('test-api:library-list')
+        self.client.force_authenticate(self.user1)
+        data = {
+            'lead_article': self.article_1.id,
+            'articles': [
+                self.article_1.id, self.long_article.id,
+                self.long_article_2.id
+            ],
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        library = Library.objects.get(pk=response.data['id'])
+        self.assertCountEqual(
+            library.articles.values_list('pk', flat=True), data['articles']
+        )
+
+    def test_add_many_related_objects_when_user_doesnt_have_permissions(self):  # noqa
+        url = reverse('test-api:library-list')
+        self.client.force_authenticate(self.user1)
+        data = {
+            'lead_article': self.article_1.id,
+            'articles': [self.article_1.id, self.article_2.id],
+        }
+        response = self.client.post(url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn(str(self.article_2.id), response.data['articles'][0])
+
+    def test_many_related_objects_permissions_checked_at_once(self):
+        request = APIRequestFactory().get('/')
+        request.user = self.user1
+        articles = [self.article_1, self.long_article, self.long_article_2]
+        serializer = LibrarySerializer(context={'request': request})
+        with self.assertNumQueries(2):
+            # queries:
+            # select permitted articles
+            # select articles
+            result = serializer.fields['articles'].to_internal_value(
+                [article.id for article in articles]
+            )
+        self.assertEqual(
+            [article.pk for article in result],
+            [article.pk for article in articles]
+        )
+
 
 class PermissionsPerFieldTests(PermissionsTestMixin, APITestCase):
     def setUp(self):
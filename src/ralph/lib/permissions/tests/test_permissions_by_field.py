@@ -1,5 +1,5 @@
 from django.contrib.auth import get_user_model
-from django.contrib.auth.models import Permission
+from django.contrib.auth.models import Group, Permission
 from django.test import RequestFactory, TestCase
 
 from ralph.assets.models.assets import AssetModel
@@ -115,3 +115,42 @@ class PermissionsByFieldTestCase(TestCase):
             'manufacturer',
             fields_list
         )
+
+    def test_allowed_fields_cached_per_user(self):
+        user = get_user_model().objects.get(pk=self.user.pk)
+        self.asset_model.allowed_fields(user, action='change')
+        with self.assertNumQueries(0):
+            for field in ['name', 'type', 'height_of_device']:
+                self.asset_model.has_access_to_field(field, user, 'change')
+                self.asset_model.has_access_to_field(field, user, 'view')
+            self.asset_model.allowed_fields(user, action='view')
+
+    def test_allowed_fields_cache_invalidated_on_permissions_change(self):
+        user = get_user_model().objects.get(pk=self.user.pk)
+        self.assertNotIn(
+            'name', self.asset_model.allowed_fields(user, action='change')
+        )
+        user.user_permissions.add(
+            Permission.objects.get(codename='change_assetmodel_name_field')
+        )
+        self.assertIn(
+            'name', self.asset_model.allowed_fields(user, action='change')
+        )
+
+    def test_allowed_fields_cache_invalidated_on_group_change(self):
+        user = get_user_model().objects.get(pk=self.user.pk)
+        group = Group.objects.create(name='test')
+        user.groups.add(group)
+        self.assertNotIn(
+            'name', self.asset_model.allowed_fields(user, action='change')
+        )
+        group.permissions.add(
+            Permission.objects.get(codename='change_assetmodel_name_field')
+        )
+        # Django's permissions cache of user object is cleared too
+        self.assertTrue(
+            user.has_perm('assets.change_assetmodel_name_field')
+        )
+        self.assertIn(
+            'name', self.asset_model.allowed_fields(user, action='change')
+        )
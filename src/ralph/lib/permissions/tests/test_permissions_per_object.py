@@ -132,6 +132,18 @@ class TestPermissionsPerObject(PermissionsTestMixin, TestCase):
             count
         )
 
+    def test_filter_permitted(self):
+        pks = [self.article_1.pk, self.article_2.pk, self.article_3.pk]
+        with self.assertNumQueries(1):
+            permitted = Article.filter_permitted(self.user3, pks)
+        self.assertEqual(permitted, {self.article_3.pk})
+
+    def test_filter_permitted_for_superuser(self):
+        pks = [self.article_1.pk, self.article_2.pk, self.article_3.pk]
+        with self.assertNumQueries(0):
+            permitted = Article.filter_permitted(self.superuser, pks)
+        self.assertEqual(permitted, set(pks))
+
     def test_get_object_for_superuser(self):
         self.assertEqual(
             Article._get_objects_for_user(self.superuser).count(),
@@ -178,3 +190,19 @@ class TestPermissionsPerObjectForm(PermissionsTestMixin, TestCase):
         self.assertEqual(form.errors, {
             'articles': ["You don't have permissions to select this value"]
         })
+
+    def test_related_objects_permissions_checked_at_once(self):
+        form = self.SampleForm({
+            'lead_article': self.article_1.id,
+            'articles': [
+                self.article_1.id, self.long_article.id,
+                self.long_article_2.id
+            ]
+        }, _user=self.user1)
+        with self.assertNumQueries(4):
+            # queries:
+            # select lead article
+            # select articles
+            # select permitted articles (of both fields)
+            # check if lead article exists (model validation)
+            self.assertTrue(form.is_valid())
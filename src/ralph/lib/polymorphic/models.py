@@ -12,22 +12,63 @@ Example:
         <Model3: model3L test>
     ]
 """
-from itertools import groupby
+from collections import OrderedDict
 
 from django.contrib.contenttypes.models import ContentType
 from django.db import models
+from django.db.models.signals import post_migrate
+
+
+# ContentType id -> model class, cached for whole process
+_content_type_models = {}
+
+
+def get_content_type_models(content_types_ids):
+    """
+    Return mapping ContentType id -> model class for given ids. Model is
+    `None` if content type doesn't exist.
+
+    Models are cached for whole process - content types missing in the
+    cache are fetched using single query (not existing ones are not
+    cached).
+    """
+    missing = [
+        content_type_id for content_type_id in content_types_ids
+        if content_type_id not in _content_type_models
+    ]
+    if missing:
+        for content_type in ContentType.objects.filter(pk__in=missing):
+            _content_type_models[content_type.pk] = content_type.model_class()
+    return {
+        content_type_id: _content_type_models.get(content_type_id)
+        for content_type_id in content_types_ids
+    }
+
+
+def clear_content_type_models_cache(**kwargs):
+    """
+    Clear cached models of content types (content types could be created
+    again with different ids, ex. when database is flushed).
+    """
+    _content_type_models.clear()
+
+
+post_migrate.connect(clear_content_type_models_cache)
 
 
 class PolymorphicQuerySet(models.QuerySet):
     _polymorphic_select_related = {}
     _polymorphic_prefetch_related = {}
+    # number of base rows resolved to descendants at once
+    _polymorphic_chunk_size = 1000
 
     def iterator(self):
         """
         Override iterator:
-            - Iterate for all objects and collected ID
-            - For each ContentType generates additional queryset
-            - Returns iterator with different models
+            - Iterate over (pk, content type) of base objects in chunks
+            - For each chunk and ContentType generates additional queryset
+            - Returns iterator with different models, keeping the ordering
+              of base queryset
         """
         # if this is final-level model, don't check for descendants - just
         # return original queryset result
@@ -35,40 +76,52 @@ class PolymorphicQuerySet(models.QuerySet):
             yield from super().iterator()
             return
 
-        result = []
-        content_types_ids = set()
-        select_related = None
-        if self.query.select_related:
-            select_related = self.query.select_related
-            self.query.select_related = False
-        order_by = self.query.order_by
-
-        for obj in super().iterator():
-            content_types_ids.add(obj.content_type_id)
-            result.append((
-                obj.content_type_id, obj.pk)
-            )
-        result = groupby(result, lambda x: x[0])
-
-        content_type_model_map = {
-            ct.id: ct.model_class() for ct in ContentType.objects.filter(
-                pk__in=list(content_types_ids)
-            )
-        }
-        # result_query = []
-        for k, v in result:
-            model = content_type_model_map[k]
+        # fetch only pk and content type of base objects - descendants are
+        # fetched separately (with their own select_related) anyway
+        base_query = self.query.clone()
+        base_query.select_related = False
+        base_queryset = models.QuerySet(
+            model=self.model, query=base_query, using=self._db
+        ).values_list('pk', 'content_type_id')
+
+        chunk = []
+        for row in base_queryset.iterator():
+            chunk.append(row)
+            if len(chunk) >= self._polymorphic_chunk_size:
+                yield from self._resolve_descendants(chunk)
+                chunk = []
+        if chunk:
+            yield from self._resolve_descendants(chunk)
+
+    def _resolve_descendants(self, chunk):
+        """
+        Fetch descendant objects for chunk of (pk, content type id) pairs
+        (one query per content type) and yield them in the chunk order.
+        """
+        pks_by_content_type = OrderedDict()
+        for pk, content_type_id in chunk:
+            pks_by_content_type.setdefault(content_type_id, []).append(pk)
+        content_type_models = get_content_type_models(
+            pks_by_content_type.keys()
+        )
+        objects = {}
+        for content_type_id, pks in pks_by_content_type.items():
+            model = content_type_models[content_type_id]
+            if model is None:
+                continue
             polymorphic_models = getattr(model, '_polymorphic_models', [])
             if polymorphic_models and model not in polymorphic_models:
-                model_query = model.objects.filter(pk__in=[i[1] for i in v])
+                model_query = model.objects.filter(pk__in=pks)
                 model_name = model._meta.object_name
                 # first check if select_related/prefetch_related is present for
                 # this model to not trigger selecting/prefetching all related
                 # or reset select_related accidentally
                 # see https://docs.djangoproject.com/en/1.8/ref/models/querysets/#select-related  # noqa
                 # for details
-                if select_related:
-                    model_query.query.select_related = select_related.copy()
+                if self.query.select_related:
+                    model_query.query.select_related = (
+                        self.query.select_related.copy()
+                    )
 
                 if self._polymorphic_select_related.get(model_name):
                     model_query = model_query.select_related(
@@ -78,10 +131,15 @@ class PolymorphicQuerySet(models.QuerySet):
                     model_query = model_query.prefetch_related(
                         *self._polymorphic_prefetch_related[model_name]
                     )
-                if order_by:
-                    model_query = model_query.order_by(*order_by)
                 for obj in model_query:
-                    yield obj
+                    objects[obj.pk] = obj
+        for pk, _ in chunk:
+            try:
+                yield objects[pk]
+            except KeyError:
+                # object was deleted in the meantime or it's not
+                # a polymorphic descendant
+                continue
 
     def _clone(self, *args, **kwargs):
         clone = super()._clone(*args, **kwargs)
@@ -91,6 +149,7 @@ class PolymorphicQuerySet(models.QuerySet):
         clone._polymorphic_prefetch_related = (
             self._polymorphic_prefetch_related.copy()
         )
+        clone._polymorphic_chunk_size = self._polymorphic_chunk_size
         return clone
 
     def polymorphic_select_related(self, **kwargs):
@@ -120,6 +179,18 @@ class PolymorphicQuerySet(models.QuerySet):
         obj._polymorphic_prefetch_related = kwargs
         return obj
 
+    def polymorphic_chunk_size(self, chunk_size):
+        """
+        Set number of base objects resolved to descendants at once (this
+        bounds the number of objects held in memory during iteration).
+        Usage:
+
+        >>> MyBaseModel.polymorphic_objects.polymorphic_chunk_size(500)
+        """
+        obj = self._clone()
+        obj._polymorphic_chunk_size = chunk_size
+        return obj
+
 
 class PolymorphicBase(models.base.ModelBase):
 
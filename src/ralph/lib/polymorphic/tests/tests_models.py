@@ -1,8 +1,13 @@
 # -*- coding: utf-8 -*-
 from django.contrib.contenttypes.models import ContentType
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 
-from ralph.lib.polymorphic.models import Polymorphic
+from ralph.lib.polymorphic.models import (
+    clear_content_type_models_cache,
+    Polymorphic
+)
 from ralph.lib.polymorphic.tests.models import (
     PolymorphicModelBaseTest,
     PolymorphicModelTest,
@@ -30,6 +35,17 @@ class PolymorphicTestCase(TestCase):
             another_related=cls.sth_related,
         )
 
+    def setUp(self):
+        clear_content_type_models_cache()
+
+    def _get_content_types_queries(self, queryset):
+        with CaptureQueriesContext(connection) as context:
+            list(queryset)
+        return [
+            query for query in context.captured_queries
+            if ContentType._meta.db_table in query['sql']
+        ]
+
     def test_polymorphic_metaclass(self):
         self.assertIn(
             Polymorphic, list(getattr(self.pol_1, '_polymorphic_models'))
@@ -66,6 +82,50 @@ class PolymorphicTestCase(TestCase):
         self.assertIn('PolymorphicModelTest: {}'.format(self.pol_1.pk), result)
         self.assertIn('PolymorphicModelTest2: {}'.format(self.pol_3.pk), result)
 
+    def test_polymorphic_queryset_content_types_fetched_once(self):
+        PolymorphicModelTest.objects.create(name='Pol0')
+        queryset = PolymorphicModelBaseTest.polymorphic_objects.polymorphic_chunk_size(2).order_by('-name')  # noqa
+        with self.assertNumQueries(5):
+            # queries:
+            # select PolymorphicModelBaseTest
+            # select content types (chunk 1)
+            # select PolymorphicModelTest2 (chunk 1: pol3)
+            # select PolymorphicModelTest (chunk 1: pol2)
+            # select PolymorphicModelTest (chunk 2: pol1, pol0 - content
+            # type found in chunk 1)
+            list(queryset.all())
+        # content types are cached for whole process
+        self.assertEqual(self._get_content_types_queries(queryset.all()), [])
+
+    def test_polymorphic_queryset_chunks(self):
+        queryset = PolymorphicModelBaseTest.polymorphic_objects.polymorphic_chunk_size(2).order_by('name')  # noqa
+        with self.assertNumQueries(5):
+            # queries:
+            # select PolymorphicModelBaseTest
+            # select content types (chunk 1)
+            # select PolymorphicModelTest (chunk 1: pol1, pol2)
+            # select content types (chunk 2 - not found in chunk 1)
+            # select PolymorphicModelTest2 (chunk 2: pol3)
+            result = list(queryset.all())
+        self.assertEqual(result, [self.pol_1, self.pol_2, self.pol_3])
+        with self.assertNumQueries(3):
+            # queries:
+            # select PolymorphicModelBaseTest
+            # select PolymorphicModelTest (chunk 1: pol1, pol2)
+            # select PolymorphicModelTest2 (chunk 2: pol3)
+            result = list(queryset.all())
+        self.assertEqual(result, [self.pol_1, self.pol_2, self.pol_3])
+        self.assertEqual(self._get_content_types_queries(queryset.all()), [])
+
+    def test_polymorphic_queryset_keeps_global_ordering(self):
+        pol_4 = PolymorphicModelTest.objects.create(name='Pol4')
+        result = list(
+            PolymorphicModelBaseTest.polymorphic_objects.polymorphic_chunk_size(2).order_by('-name')  # noqa
+        )
+        self.assertEqual(result, [pol_4, self.pol_3, self.pol_2, self.pol_1])
+        self.assertIsInstance(result[0], PolymorphicModelTest)
+        self.assertIsInstance(result[1], PolymorphicModelTest2)
+
     def test_polymorphic_queryset_with_select_related(self):
         with self.assertNumQueries(4):
             # queries:
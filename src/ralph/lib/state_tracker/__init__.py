@@ -0,0 +1,3 @@
+from ralph.lib.state_tracker.tracker import StateTracker
+
+__all__ = ['StateTracker']
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+from django.db.models.signals import post_init
+from django.test import TestCase
+
+from ralph.lib.state_tracker import StateTracker
+from ralph.tests.models import Car, Manufacturer
+
+changes = []
+year_changes = []
+
+name_tracker = StateTracker(
+    'test_name', {Car: ('name', 'manufacturer_id')},
+    lambda sender, old, new: changes.append((sender, old, new))
+)
+year_tracker = StateTracker(
+    'test_year', {Car: ('year',)},
+    lambda sender, old, new: year_changes.append((old, new))
+)
+
+
+class StateTrackerTest(TestCase):
+    def setUp(self):
+        self.manufacturer = Manufacturer.objects.create(
+            name='Fiat', country='Italy'
+        )
+        self.car = Car.objects.create(
+            name='126p', year=1973, manufacturer=self.manufacturer
+        )
+        del changes[:]
+        del year_changes[:]
+
+    def test_created(self):
+        Car.objects.create(
+            name='Panda', year=1980, manufacturer=self.manufacturer
+        )
+        self.assertEqual(
+            changes, [(Car, None, ('Panda', self.manufacturer.pk))]
+        )
+        self.assertEqual(year_changes, [(None, (1980,))])
+
+    def test_changed(self):
+        car = Car.objects.get(pk=self.car.pk)
+        car.name = 'Maluch'
+        car.save()
+        self.assertEqual(changes, [(
+            Car,
+            ('126p', self.manufacturer.pk),
+            ('Maluch', self.manufacturer.pk)
+        )])
+        self.assertEqual(year_changes, [])
+
+    def test_not_changed(self):
+        car = Car.objects.get(pk=self.car.pk)
+        car.save()
+        self.assertEqual(changes, [])
+
+    def test_changed_twice_compares_with_last_saved_state(self):
+        car = Car.objects.get(pk=self.car.pk)
+        car.year = 1974
+        car.save()
+        car.save()
+        car.year = 1975
+        car.save()
+        self.assertEqual(
+            year_changes, [((1973,), (1974,)), ((1974,), (1975,))]
+        )
+
+    def test_deleted(self):
+        car = Car.objects.get(pk=self.car.pk)
+        car.delete()
+        self.assertEqual(
+            changes, [(Car, ('126p', self.manufacturer.pk), None)]
+        )
+
+    def test_deferred_fields_are_not_fetched(self):
+        with self.assertNumQueries(1):
+            Car.objects.only('pk').get(pk=self.car.pk)
+
+    def test_single_post_init_receiver_per_model(self):
+        self.assertEqual(len(post_init._live_receivers(Car)), 1)
@@ -0,0 +1,74 @@
+# -*- coding: utf-8 -*-
+"""
+Tracking of changes of (selected) fields of model instances.
+
+State (values of tracked fields) of instance is saved when it's initialized
+and compared with the current one when instance is saved, so handler is
+called only when tracked fields were changed. Every model has single
+`post_init` receiver saving states of all its trackers (`post_init` is sent
+for every fetched object, so it has to be cheap).
+"""
+from collections import OrderedDict
+
+from django.db.models.signals import post_delete, post_init, post_save
+
+STATES_ATTR = '_tracked_states'
+# model -> trackers of its fields
+_trackers = {}
+
+
+def _save_states(sender, instance, **kwargs):
+    setattr(instance, STATES_ATTR, {
+        tracker.name: tracker.get_state(instance)
+        for tracker in _trackers[sender].values()
+    })
+
+
+class StateTracker(object):
+    """
+    Call `handler(sender, old_state, new_state)` when tracked fields of
+    instance are changed - `old_state` is None for created instance and
+    `new_state` is None for deleted one.
+
+    Args:
+        name: unique name of tracker
+        fields: dict with model as a key and tuple of tracked fields
+            (attnames) as a value
+        handler: function called when tracked fields are changed
+    """
+    def __init__(self, name, fields, handler):
+        self.name = name
+        self.fields = fields
+        self.handler = handler
+        for model in fields:
+            if model not in _trackers:
+                _trackers[model] = OrderedDict()
+                post_init.connect(_save_states, sender=model)
+            _trackers[model][name] = self
+            post_save.connect(self._saved, sender=model, weak=False)
+            post_delete.connect(self._deleted, sender=model, weak=False)
+
+    def get_state(self, instance):
+        # deferred fields are not fetched
+        return tuple(
+            instance.__dict__.get(field)
+            for field in self.fields[instance.__class__]
+        )
+
+    def _update_state(self, instance):
+        states = instance.__dict__.setdefault(STATES_ATTR, {})
+        old_state = states.get(self.name)
+        states[self.name] = new_state = self.get_state(instance)
+        return old_state, new_state
+
+    def _saved(self, sender, instance, created, **kwargs):
+        old_state, new_state = self._update_state(instance)
+        if created:
+            old_state = None
+        elif old_state == new_state:
+            return
+        self.handler(sender, old_state, new_state)
+
+    def _deleted(self, sender, instance, **kwargs):
+        old_state, _ = self._update_state(instance)
+        self.handler(sender, old_state, None)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from rest_framework import serializers
+
+from ralph.api import RalphAPISerializer, RalphAPIViewSet, router
+from ralph.lib.transitions.models import TransitionJob, TransitionJobObject
+
+
+class TransitionJobObjectSerializer(RalphAPISerializer):
+    class Meta:
+        model = TransitionJobObject
+        fields = ('object_id', 'status', 'reason')
+
+
+class TransitionJobSerializer(RalphAPISerializer):
+    job_objects = TransitionJobObjectSerializer(many=True, read_only=True)
+    transition = serializers.StringRelatedField()
+    is_running = serializers.BooleanField(read_only=True)
+    timings = serializers.DictField(read_only=True)
+    # there is no API endpoint for attachments - only id is returned
+    # (attachment could be downloaded using `serve_attachment` view)
+    attachment = serializers.PrimaryKeyRelatedField(read_only=True)
+
+    class Meta:
+        model = TransitionJob
+        fields = (
+            'id', 'url', 'transition', 'status', 'is_running', 'created',
+            'started', 'finished', 'reason', 'timings', 'attachment',
+            'job_objects',
+        )
+
+
+class TransitionJobViewSet(RalphAPIViewSet):
+    """
+    Status of (asynchronous) transition jobs - could be polled until job is
+    not running anymore.
+    """
+    queryset = TransitionJob.objects.select_related('transition')
+    serializer_class = TransitionJobSerializer
+    prefetch_related = ['job_objects']
+    http_method_names = ['get', 'options', 'head']
+
+
+router.register(r'transition-jobs', TransitionJobViewSet)
+urlpatterns = []
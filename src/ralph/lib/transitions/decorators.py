@@ -16,6 +16,17 @@ def transition_action(method=None, **kwargs):
         func.precondition = kwargs.get('precondition', lambda instances: {})
         func.disable_save_object = kwargs.get('disable_save_object', False)
         func.only_one_action = kwargs.get('only_one_action', False)
+        # set to False if action doesn't modify fields of instances (ex. it
+        # only generates report) - then instances could be saved in bulk
+        func.modifies_instances = kwargs.get('modifies_instances', True)
+        # fields of instances modified by action - when every action
+        # specifies them and model allows updating them in bulk (see
+        # `transition_bulk_update_fields`), instances are saved using bulk
+        # UPDATE (instead of calling `save` on every instance)
+        func.updated_fields = kwargs.get('updated_fields', [])
+        # called with instances and (cleaned) data of action form fields -
+        # raise `ValidationError` to show error in transition form
+        func.form_validation = kwargs.get('form_validation', None)
         setattr(func, TRANSITION_ATTR_TAG, True)
 
         @wraps(func)
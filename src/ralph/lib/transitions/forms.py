@@ -86,4 +86,4 @@ class TransitionForm(forms.ModelForm):
 
     class Meta:
         model = Transition
-        fields = ['name', 'source', 'target', 'actions']
+        fields = ['name', 'source', 'target', 'actions', 'async_execution']
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+"""
+Asynchronous (background) execution of transitions.
+
+Transition job is enqueued in RQ queue (named by
+`RALPH_TRANSITIONS_QUEUE` setting) and processed by RQ worker. When queue is
+not configured, job is processed in-process (synchronously), which is useful
+for development and tests.
+
+Objects of job are processed in chunks (of `RALPH_TRANSITIONS_JOB_CHUNK_SIZE`
+objects), every chunk in separate transaction, and status of objects is
+updated after every chunk, so progress of job could be polled.
+"""
+import logging
+from collections import OrderedDict
+
+from django.apps import apps
+from django.conf import settings
+from django.db import models, transaction
+from django.http import HttpRequest
+from redis import Redis
+from rq import Queue
+
+from ralph.admin.helpers import get_content_type_for_model
+from ralph.lib.external_services.conf import get_redis_connection_params
+from ralph.lib.transitions.exceptions import TransitionNotAllowedError
+from ralph.lib.transitions.models import (
+    run_field_transition,
+    TransitionJob,
+    TransitionJobObject
+)
+
+logger = logging.getLogger(__name__)
+
+
+class InProcessQueue(object):
+    """
+    Queue running enqueued function immediately (in the current process).
+    Implements subset of `rq.Queue` interface used by transitions.
+    """
+    def enqueue(self, func, *args, **kwargs):
+        func(*args, **kwargs)
+
+
+def get_transitions_queue():
+    queue_name = getattr(settings, 'RALPH_TRANSITIONS_QUEUE', None)
+    if not queue_name:
+        return InProcessQueue()
+    return Queue(
+        name=queue_name,
+        connection=Redis(**get_redis_connection_params()),
+    )
+
+
+class _ObjectsReference(object):
+    """
+    Reference to model instance (or queryset) from transition form data.
+
+    Only primary keys are stored, so job data could be safely pickled (and
+    objects are fetched again by worker).
+    """
+    def __init__(self, model, pks, many):
+        self.model = '{}.{}'.format(
+            model._meta.app_label, model._meta.model_name
+        )
+        self.pks = pks
+        self.many = many
+
+    def resolve(self):
+        model = apps.get_model(self.model)
+        if self.many:
+            return model._default_manager.filter(pk__in=self.pks)
+        return model._default_manager.get(pk=self.pks[0])
+
+
+def _serialize_data(data):
+    """
+    Replace model instances and querysets in (cleaned) form data by
+    references to them.
+    """
+    result = {}
+    for key, value in data.items():
+        if isinstance(value, models.Model):
+            value = _ObjectsReference(value._meta.model, [value.pk], False)
+        elif isinstance(value, models.QuerySet):
+            value = _ObjectsReference(
+                value.model, list(value.values_list('pk', flat=True)), True
+            )
+        result[key] = value
+    return result
+
+
+def _deserialize_data(data):
+    return {
+        key: value.resolve() if isinstance(value, _ObjectsReference) else value
+        for key, value in data.items()
+    }
+
+
+def enqueue_transition(instances, transition, data, user):
+    """
+    Create transition job for instances and enqueue it.
+
+    Notice that job is saved (and committed) before it's enqueued, so it
+    should not be called inside atomic block when using RQ queue (worker
+    could not see the job otherwise).
+
+    :return: TransitionJob object
+    """
+    with transaction.atomic():
+        job = TransitionJob.objects.create(
+            transition=transition,
+            content_type=get_content_type_for_model(instances[0]._meta.model),
+            user=user,
+        )
+        TransitionJobObject.objects.bulk_create([
+            TransitionJobObject(job=job, object_id=instance.pk)
+            for instance in instances
+        ])
+    get_transitions_queue().enqueue(
+        run_transition_job, job.pk, _serialize_data(data)
+    )
+    return job
+
+
+def _get_request(user):
+    """
+    Return request-like object passed to transition actions.
+    """
+    request = HttpRequest()
+    request.user = user
+    return request
+
+
+def _get_chunks(transition, instances):
+    """
+    Split instances into chunks processed one by one. Transition with
+    actions returning attachment (ex. release report of all objects) is run
+    for all instances at once.
+    """
+    chunk_size = settings.RALPH_TRANSITIONS_JOB_CHUNK_SIZE
+    if any(
+        getattr(action, 'return_attachment', False)
+        for action in transition.get_pure_actions(instances[0])
+    ):
+        chunk_size = len(instances)
+    for index in range(0, len(instances), chunk_size):
+        yield instances[index:index + chunk_size]
+
+
+def _run_chunk(job, instances, data):
+    """
+    Run transition for chunk of job objects and update their status.
+
+    :return: `(reason, result)` tuple - reason of failure (`None` when
+        transition succeeded) and `TransitionResult` (`None` when transition
+        was not run)
+    """
+    object_ids = [instance.pk for instance in instances]
+    job.start_objects(object_ids)
+    try:
+        result = run_field_transition(
+            instances=instances,
+            transition_obj_or_name=job.transition,
+            field=job.transition.model.field_name,
+            data=data,
+            request=_get_request(job.user),
+            transition_job=job,
+        )
+    except TransitionNotAllowedError as e:
+        job.fail_objects(object_ids, reason=e.message, objects_reasons={
+            instance.pk: ', '.join(map(str, errors))
+            for instance, errors in e.errors.items()
+        })
+        return e.message, None
+    except Exception as e:
+        logger.exception(e)
+        job.fail_objects(object_ids, reason=str(e))
+        return str(e), None
+    if result.status:
+        job.finish_objects(object_ids)
+        return None, result
+    reason = 'Error during performing actions'
+    job.fail_objects(object_ids, reason=reason)
+    return reason, result
+
+
+def run_transition_job(job_id, data):
+    """
+    Run transition for objects assigned to the job (called by worker).
+
+    Failure of one chunk doesn't stop processing of next chunks - job is
+    marked as failed (with reason of first failure) when all of them are
+    processed.
+    """
+    job = TransitionJob.objects.select_related(
+        'transition__model', 'content_type', 'user'
+    ).get(pk=job_id)
+    if job.transition is None:
+        job.fail(reason='Transition does not exist')
+        return
+    job.start()
+    model = job.content_type.model_class()
+    object_ids = list(job.job_objects.values_list('object_id', flat=True))
+    instances = list(
+        model._default_manager.filter(pk__in=object_ids).order_by('pk')
+    )
+    missing_ids = set(object_ids) - {instance.pk for instance in instances}
+    if missing_ids:
+        job.fail(
+            reason='Some objects do not exist',
+            objects_reasons={pk: 'object does not exist' for pk in missing_ids}
+        )
+        return
+    data = _deserialize_data(data)
+    reasons = []
+    attachment = None
+    timings = OrderedDict()
+    for chunk in _get_chunks(job.transition, instances):
+        reason, result = _run_chunk(job, chunk, data)
+        if reason:
+            reasons.append(reason)
+        if result is not None:
+            attachment = result.attachment or attachment
+            for phase, duration in result.timings.items():
+                timings[phase] = timings.get(phase, 0) + duration
+    if reasons:
+        job.fail(reason=reasons[0], timings=timings)
+    else:
+        job.finish(attachment=attachment, timings=timings)
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.conf import settings
+import django_extensions.db.fields.json
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attachments', '0003_auto_20160121_1346'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('transitions', '0004_auto_20160127_1119'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TransitionJob',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('created', models.DateTimeField(verbose_name='date created', auto_now_add=True)),
+                ('modified', models.DateTimeField(verbose_name='last modified', auto_now=True)),
+                ('status', models.PositiveIntegerField(default=1, choices=[(1, 'queued'), (2, 'started'), (3, 'finished'), (4, 'failed')])),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('reason', models.TextField(blank=True, default='')),
+                ('timings', django_extensions.db.fields.json.JSONField()),
+                ('attachment', models.ForeignKey(blank=True, null=True, to='attachments.Attachment')),
+                ('content_type', models.ForeignKey(to='contenttypes.ContentType')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='TransitionJobObject',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('object_id', models.IntegerField(db_index=True)),
+                ('status', models.PositiveIntegerField(default=1, choices=[(1, 'queued'), (2, 'started'), (3, 'finished'), (4, 'failed')])),
+                ('reason', models.TextField(blank=True, default='')),
+                ('job', models.ForeignKey(related_name='job_objects', to='transitions.TransitionJob')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='transition',
+            name='async_execution',
+            field=models.BooleanField(verbose_name='run asynchronously', default=False, help_text='Run transition in the background (recommended for transitions with long-running actions or executed on many objects)'),
+        ),
+        migrations.AddField(
+            model_name='transitionjob',
+            name='transition',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='transitions.Transition'),
+        ),
+        migrations.AddField(
+            model_name='transitionjob',
+            name='user',
+            field=models.ForeignKey(to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddField(
+            model_name='transitionshistory',
+            name='transition_job',
+            field=models.ForeignKey(blank=True, null=True, related_name='histories', to='transitions.TransitionJob'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='transitionjobobject',
+            unique_together=set([('job', 'object_id')]),
+        ),
+    ]
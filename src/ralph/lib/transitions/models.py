@@ -3,9 +3,12 @@
 import inspect
 import logging
 import operator
-from collections import defaultdict
+import time
+from collections import defaultdict, OrderedDict
+from contextlib import contextmanager
 
 import reversion
+from dj.choices import Choices
 from django import forms
 from django.conf import settings
 from django.contrib.auth.models import Permission
@@ -20,7 +23,8 @@ from django.db.models.signals import (
     pre_save
 )
 from django.dispatch import receiver
-from django.utils.functional import curry
+from django.utils import timezone
+from django.utils.functional import cached_property, curry
 from django.utils.text import slugify
 from django.utils.translation import ugettext_lazy as _
 from django_extensions.db.fields.json import JSONField
@@ -44,14 +48,46 @@ logger = logging.getLogger(__name__)
 
 
 TRANSITION_ORIGINAL_STATUS = (0, 'Keep orginal status')
+# number of instances updated in single query (when their values differ)
+BULK_UPDATE_CHUNK_SIZE = 500
 
 
 class CycleError(Exception):
     pass
 
 
+class TransitionResult(tuple):
+    """
+    Result of transition. It could be unpacked as `(status, attachment)`.
+    Additionally it contains timings (in seconds) of every phase of
+    transition in `timings` attribute.
+    """
+    def __new__(cls, status, attachment, timings=None):
+        obj = super().__new__(cls, (status, attachment))
+        obj.timings = timings if timings is not None else OrderedDict()
+        return obj
+
+    @property
+    def status(self):
+        return self[0]
+
+    @property
+    def attachment(self):
+        return self[1]
+
+
+@contextmanager
+def _measure_time(timings, phase):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0) + time.perf_counter() - start
+
+
 def _generate_transition_history(
-    instance, transition, user, attachment, history_kwargs, action_names, field
+    instance, transition, user, attachment, history_kwargs, action_names, field,
+    transition_job=None
 ):
     """Return history object (without saving it) based on parameters."""
     field_value = getattr(instance, field, None)
@@ -78,7 +114,8 @@ def _generate_transition_history(
         kwargs=history_kwargs,
         actions=action_names,
         source=source,
-        target=target
+        target=target,
+        transition_job=transition_job,
     )
 
 
@@ -166,7 +203,7 @@ def _check_instances_for_transition(instances, transition):
     """
     errors = defaultdict(list)
     for instance in instances:
-        if instance.status not in [int(s) for s in transition.source]:
+        if instance.status not in transition.source_set:
             errors[instance].append(_('wrong source status'))
 
     for func in transition.get_pure_actions(instances[0]):
@@ -239,20 +276,140 @@ def _order_actions_by_requirements(actions, instance):
         yield actions_by_name[action]
 
 
+def _can_bulk_update(instances, runned_funcs, field, target):
+    """
+    Check if instances could be saved using bulk UPDATE (without calling
+    `save` on every instance, so without `pre_save` and `post_save` signals).
+
+    Model has to opt in by listing fields which could be updated in bulk in
+    `transition_bulk_update_fields` - transition field and all fields
+    updated by actions have to be listed there (every action has to either
+    not modify instances or specify fields it updates). Additionally model
+    could disallow bulk update for particular transition using
+    `can_bulk_update_transition(field, target)` classmethod.
+    """
+    model = instances[0]._meta.model
+    bulk_update_fields = set(
+        getattr(model, 'transition_bulk_update_fields', ())
+    )
+    if field not in bulk_update_fields:
+        return False
+    for func in runned_funcs:
+        if not getattr(func, 'modifies_instances', True):
+            continue
+        updated_fields = getattr(func, 'updated_fields', None)
+        if not updated_fields or not bulk_update_fields.issuperset(
+            updated_fields
+        ):
+            return False
+    can_bulk_update_transition = getattr(
+        model, 'can_bulk_update_transition', None
+    )
+    return (
+        can_bulk_update_transition is None or
+        can_bulk_update_transition(field, target)
+    )
+
+
+def _get_updated_fields(model, runned_funcs):
+    updated_fields = []
+    for func in runned_funcs:
+        for field_name in getattr(func, 'updated_fields', []):
+            field = model._meta.get_field(field_name)
+            if field not in updated_fields:
+                updated_fields.append(field)
+    return updated_fields
+
+
+def _bulk_update_instances(instances, field, target, updated_fields=()):
+    """
+    Update status (and auto_now fields) of all instances using single query
+    and add them to current revision.
+
+    Fields updated by actions are updated too - value which is the same for
+    all instances is set directly, different values are set using
+    `CASE WHEN` (in chunks of instances).
+    """
+    model = instances[0]._meta.model
+    update_kwargs = {}
+    if target is not None:
+        update_kwargs[field] = target
+    now = timezone.now()
+    for model_field in model._meta.fields:
+        if getattr(model_field, 'auto_now', False):
+            update_kwargs[model_field.attname] = now
+    varying_fields = []
+    for updated_field in updated_fields:
+        values = {
+            getattr(instance, updated_field.attname) for instance in instances
+        }
+        if len(values) == 1:
+            update_kwargs[updated_field.attname] = values.pop()
+        else:
+            varying_fields.append(updated_field)
+    if varying_fields:
+        for index in range(0, len(instances), BULK_UPDATE_CHUNK_SIZE):
+            chunk = instances[index:index + BULK_UPDATE_CHUNK_SIZE]
+            chunk_kwargs = update_kwargs.copy()
+            for varying_field in varying_fields:
+                output_field = (
+                    varying_field.rel.get_related_field()
+                    if varying_field.rel else varying_field
+                )
+                chunk_kwargs[varying_field.attname] = models.Case(
+                    *[
+                        models.When(pk=instance.pk, then=models.Value(
+                            getattr(instance, varying_field.attname),
+                            output_field=output_field,
+                        ))
+                        for instance in chunk
+                    ],
+                    output_field=output_field
+                )
+            model._default_manager.filter(
+                pk__in=[instance.pk for instance in chunk]
+            ).update(**chunk_kwargs)
+    elif update_kwargs:
+        model._default_manager.filter(
+            pk__in=[instance.pk for instance in instances]
+        ).update(**update_kwargs)
+    for instance in instances:
+        for attname, value in update_kwargs.items():
+            setattr(instance, attname, value)
+    revision_manager = reversion.default_revision_manager
+    if revision_manager.is_registered(model):
+        adapter = revision_manager.get_adapter(model)
+        db = reversion.revision_context_manager.get_db()
+        for instance in instances:
+            reversion.revision_context_manager.add_to_context(
+                revision_manager, instance,
+                curry(adapter.get_version_data, instance, db)
+            )
+
+
 @transaction.atomic
 def run_field_transition(
-    instances, transition_obj_or_name, field, data={}, **kwargs
+    instances, transition_obj_or_name, field, data={}, transition_job=None,
+    **kwargs
 ):
     """
     Execute all actions assigned to the selected transition.
+
+    Returns `TransitionResult` - `(status, attachment)` tuple with timings
+    of every phase of transition.
+
+    When transition is run by `TransitionJob` (asynchronously), pass it as
+    `transition_job` to link created history with the job.
     """
+    timings = OrderedDict()
     first_instance = instances[0]
-    _check_type_instances(instances)
-    transition = _check_and_get_transition(
-        first_instance, transition_obj_or_name, field
-    )
-    _check_instances_for_transition(instances, transition)
-    _check_action_with_instances(instances, transition)
+    with _measure_time(timings, 'check'):
+        _check_type_instances(instances)
+        transition = _check_and_get_transition(
+            first_instance, transition_obj_or_name, field
+        )
+        _check_instances_for_transition(instances, transition)
+        _check_action_with_instances(instances, transition)
     attachment = None
     action_names = []
     runned_funcs = []
@@ -276,10 +433,11 @@ def run_field_transition(
             if key.startswith(action.name)
         })
         try:
-            result = func(instances=instances, **defaults)
+            with _measure_time(timings, 'action_{}'.format(action.name)):
+                result = func(instances=instances, **defaults)
         except Exception as e:
             logger.exception(e)
-            return False, None
+            return TransitionResult(False, None, timings)
 
         runned_funcs.append(func)
         action_names.append(str(getattr(
@@ -289,29 +447,53 @@ def run_field_transition(
         )))
         if isinstance(result, Attachment):
             attachment = result
+    target = int(transition.target)
+    if target == TRANSITION_ORIGINAL_STATUS[0]:
+        target = None
     history_list = []
-    for instance in instances:
-        if not int(transition.target) == TRANSITION_ORIGINAL_STATUS[0]:
-            setattr(instance, field, int(transition.target))
-        history_kwargs = _get_history_dict(data, instance, runned_funcs)
-        history_kwargs.update(func_history_kwargs[instance.pk])
-        history_list.append(_generate_transition_history(
-            instance=instance,
-            transition=transition,
-            user=kwargs['request'].user,
-            attachment=attachment,
-            history_kwargs=history_kwargs,
-            action_names=action_names,
-            field=field
-        ))
-        if not disable_save_object:
-            with transaction.atomic(), reversion.create_revision():
-                instance.save()
-                reversion.set_comment('Transition {}'.format(transition))
-                reversion.set_user(kwargs['request'].user)
+    with _measure_time(timings, 'history'):
+        # history of form data is the same for every instance - resolve it
+        # (with related objects) only once
+        base_history_kwargs = _get_history_dict(
+            data, first_instance, runned_funcs
+        )
+        for instance in instances:
+            if target is not None:
+                setattr(instance, field, target)
+            history_kwargs = base_history_kwargs.copy()
+            history_kwargs.update(func_history_kwargs[instance.pk])
+            history_list.append(_generate_transition_history(
+                instance=instance,
+                transition=transition,
+                user=kwargs['request'].user,
+                attachment=attachment,
+                history_kwargs=history_kwargs,
+                action_names=action_names,
+                field=field,
+                transition_job=transition_job,
+            ))
+    if not disable_save_object:
+        with _measure_time(timings, 'save'), reversion.create_revision():
+            if _can_bulk_update(instances, runned_funcs, field, target):
+                _bulk_update_instances(
+                    instances, field, target,
+                    _get_updated_fields(first_instance, runned_funcs)
+                )
+            else:
+                for instance in instances:
+                    instance.save()
+            reversion.set_comment('Transition {}'.format(transition))
+            reversion.set_user(kwargs['request'].user)
     if history_list:
-        TransitionsHistory.objects.bulk_create(history_list)
-    return True, attachment
+        with _measure_time(timings, 'history'):
+            TransitionsHistory.objects.bulk_create(history_list)
+    logger.info('Transition {} for {} objects finished: {}'.format(
+        transition, len(instances), ', '.join(
+            '{}: {:.3f}s'.format(phase, duration)
+            for phase, duration in timings.items()
+        )
+    ))
+    return TransitionResult(True, attachment, timings)
 
 
 def get_available_transitions_for_field(instance, field, user=None):
@@ -328,7 +510,7 @@ def get_available_transitions_for_field(instance, field, user=None):
         # check if source field value is in values available for this transition
         # and if user has rights to execute this transition
         if (
-            getattr(instance, field) in [int(s) for s in transition.source] and
+            getattr(instance, field) in transition.source_set and
             _check_user_perm_for_transition(user, transition)
         ):
             result.append(transition)
@@ -375,6 +557,14 @@ class Transition(models.Model):
     source = JSONField()
     target = models.CharField(max_length=50)
     actions = models.ManyToManyField('Action')
+    async_execution = models.BooleanField(
+        verbose_name=_('run asynchronously'),
+        default=False,
+        help_text=_(
+            'Run transition in the background (recommended for transitions '
+            'with long-running actions or executed on many objects)'
+        ),
+    )
 
     class Meta:
         unique_together = ('name', 'model')
@@ -383,6 +573,13 @@ class Transition(models.Model):
     def __str__(self):
         return self.name
 
+    @cached_property
+    def source_set(self):
+        """
+        Source values of the transition (parsed once per transition object).
+        """
+        return frozenset(int(s) for s in self.source)
+
     @property
     def permission_info(self):
         return {
@@ -429,6 +626,141 @@ class Action(models.Model):
         return cls.objects.filter(content_type=content_type)
 
 
+def _lazy_choices(choices_cls):
+    """
+    Return choices of `choices_cls` with lazily translated labels (this module
+    is imported before apps registry is ready, when labels can't be
+    translated yet).
+    """
+    return choices_cls(item=lambda choice: (choice.id, _(choice.raw)))
+
+
+class TransitionJobStatus(Choices):
+    _ = Choices.Choice
+
+    queued = _("queued")
+    started = _("started")
+    finished = _("finished")
+    failed = _("failed")
+
+
+class TransitionJob(TimeStampMixin):
+    """
+    Asynchronous (background) execution of transition.
+    """
+    transition = models.ForeignKey(
+        Transition, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    content_type = models.ForeignKey(ContentType)
+    user = models.ForeignKey(settings.AUTH_USER_MODEL)
+    status = models.PositiveIntegerField(
+        choices=_lazy_choices(TransitionJobStatus),
+        default=TransitionJobStatus.queued.id,
+    )
+    started = models.DateTimeField(null=True, blank=True)
+    finished = models.DateTimeField(null=True, blank=True)
+    attachment = models.ForeignKey(Attachment, blank=True, null=True)
+    reason = models.TextField(blank=True, default='')
+    timings = JSONField()
+
+    class Meta:
+        app_label = 'transitions'
+
+    def __str__(self):
+        return '{} #{}'.format(self.transition, self.pk)
+
+    @property
+    def is_running(self):
+        return self.status in (
+            TransitionJobStatus.queued.id, TransitionJobStatus.started.id
+        )
+
+    def _set_status(self, status, reason='', **kwargs):
+        self.status = status
+        self.reason = reason
+        for key, value in kwargs.items():
+            setattr(self, key, value)
+        self.save()
+
+    def start(self):
+        self._set_status(
+            TransitionJobStatus.started.id, started=timezone.now()
+        )
+
+    def _set_objects_status(self, object_ids, status, **kwargs):
+        self.job_objects.filter(object_id__in=object_ids).update(
+            status=status, **kwargs
+        )
+
+    def start_objects(self, object_ids):
+        self._set_objects_status(object_ids, TransitionJobStatus.started.id)
+
+    def finish_objects(self, object_ids):
+        self._set_objects_status(object_ids, TransitionJobStatus.finished.id)
+
+    def fail_objects(self, object_ids, reason='', objects_reasons=None):
+        """
+        Mark objects as failed. Objects listed in `objects_reasons` (dict with
+        object id as a key and reason as a value) are marked as failed with
+        particular reason, other objects are marked as failed with general
+        `reason`.
+        """
+        objects_reasons = objects_reasons or {}
+        for object_id, object_reason in objects_reasons.items():
+            self._set_objects_status(
+                [object_id], TransitionJobStatus.failed.id,
+                reason=object_reason
+            )
+        self._set_objects_status(
+            set(object_ids) - set(objects_reasons),
+            TransitionJobStatus.failed.id, reason=reason
+        )
+
+    def finish(self, attachment=None, timings=None):
+        self._set_status(
+            TransitionJobStatus.finished.id,
+            finished=timezone.now(),
+            attachment=attachment,
+            timings=timings or {},
+        )
+
+    def fail(self, reason='', objects_reasons=None, timings=None):
+        """
+        Mark job as failed. Objects which are not processed yet are marked as
+        failed too (see `fail_objects`).
+        """
+        self._set_status(
+            TransitionJobStatus.failed.id, reason=reason,
+            finished=timezone.now(), timings=timings or {},
+        )
+        self.fail_objects(
+            list(self.job_objects.exclude(status__in=(
+                TransitionJobStatus.finished.id, TransitionJobStatus.failed.id
+            )).values_list('object_id', flat=True)),
+            reason=reason, objects_reasons=objects_reasons,
+        )
+
+
+class TransitionJobObject(models.Model):
+    """
+    Progress and outcome of transition job for single object.
+    """
+    job = models.ForeignKey(TransitionJob, related_name='job_objects')
+    object_id = models.IntegerField(db_index=True)
+    status = models.PositiveIntegerField(
+        choices=_lazy_choices(TransitionJobStatus),
+        default=TransitionJobStatus.queued.id,
+    )
+    reason = models.TextField(blank=True, default='')
+
+    class Meta:
+        app_label = 'transitions'
+        unique_together = ('job', 'object_id')
+
+    def __str__(self):
+        return '{}: {}'.format(self.job, self.object_id)
+
+
 class TransitionsHistory(TimeStampMixin):
 
     content_type = models.ForeignKey(ContentType)
@@ -440,6 +772,9 @@ class TransitionsHistory(TimeStampMixin):
     attachment = models.ForeignKey(Attachment, blank=True, null=True)
     kwargs = JSONField()
     actions = JSONField()
+    transition_job = models.ForeignKey(
+        TransitionJob, blank=True, null=True, related_name='histories'
+    )
 
     class Meta:
         app_label = 'transitions'
@@ -9,10 +9,11 @@ from ralph.lib.transitions.models import (
     update_models_attrs,
 )
 
+from ralph.tests.mixins import TemporaryMediaRootMixin
 from ralph.tests.models import Order
 
 
-class TransitionTestCase(TestCase):
+class TransitionTestCase(TemporaryMediaRootMixin, TestCase):
     @classmethod
     def setUpClass(cls):
         super().setUpClass()
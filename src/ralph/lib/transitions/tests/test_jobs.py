@@ -0,0 +1,214 @@
+# -*- coding: utf-8 -*-
+import pickle
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+from ralph.lib.transitions import jobs
+from ralph.lib.transitions.jobs import (
+    enqueue_transition,
+    get_transitions_queue,
+    InProcessQueue
+)
+from ralph.lib.transitions.models import (
+    TransitionJob,
+    TransitionJobStatus,
+    TransitionsHistory
+)
+from ralph.lib.transitions.tests import TransitionTestCase
+from ralph.tests.models import Foo, Order, OrderStatus
+
+
+class PicklingQueue(InProcessQueue):
+    """
+    Queue passing arguments through pickle (like RQ does).
+    """
+    def enqueue(self, func, *args, **kwargs):
+        args, kwargs = pickle.loads(pickle.dumps((args, kwargs)))
+        return super().enqueue(func, *args, **kwargs)
+
+
+class TransitionJobTest(TransitionTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = get_user_model().objects.create_user(
+            username='test1',
+            password='password',
+        )
+
+    def _prepare_transition(self, source=OrderStatus.new.id, actions=None):
+        _, transition, _ = self._create_transition(
+            model=Order, name='prepare',
+            source=[source], target=OrderStatus.to_send.id,
+            actions=actions or ['pack']
+        )
+        return transition
+
+    def _get_objects_statuses(self, job):
+        return list(job.job_objects.order_by('object_id').values_list(
+            'status', flat=True
+        ))
+
+    @override_settings(RALPH_TRANSITIONS_QUEUE='')
+    def test_in_process_queue_when_queue_not_configured(self):
+        self.assertIsInstance(get_transitions_queue(), InProcessQueue)
+
+    def test_enqueue_transition_finishes_job(self):
+        orders = [Order.objects.create() for _ in range(3)]
+        transition = self._prepare_transition()
+        job = enqueue_transition(orders, transition, {}, self.user)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, TransitionJobStatus.finished.id)
+        self.assertFalse(job.is_running)
+        self.assertIsNotNone(job.started)
+        self.assertIsNotNone(job.finished)
+        self.assertIn('action_pack', job.timings)
+        self.assertEqual(
+            set(job.job_objects.values_list('status', flat=True)),
+            {TransitionJobStatus.finished.id}
+        )
+        self.assertEqual(
+            Order.objects.filter(status=OrderStatus.to_send.id).count(), 3
+        )
+        self.assertEqual(
+            set(TransitionsHistory.objects.filter(
+                transition_job=job
+            ).values_list('object_id', flat=True)),
+            {order.pk for order in orders}
+        )
+
+    @mock.patch.object(jobs, 'get_transitions_queue', PicklingQueue)
+    def test_enqueue_transition_pickles_objects_references(self):
+        orders = [Order.objects.create() for _ in range(2)]
+        foos = [Foo.objects.create(bar='foo{}'.format(i)) for i in range(3)]
+        transition = self._prepare_transition()
+        data = {
+            'foo': foos[0],
+            'foos': Foo.objects.filter(pk__in=[f.pk for f in foos[1:]]),
+            'comment': 'test',
+        }
+        with mock.patch.object(
+            jobs, 'run_field_transition', wraps=jobs.run_field_transition
+        ) as run_field_transition_mock:
+            job = enqueue_transition(orders, transition, data, self.user)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, TransitionJobStatus.finished.id)
+        job_data = run_field_transition_mock.call_args[1]['data']
+        self.assertEqual(job_data['foo'], foos[0])
+        self.assertCountEqual(job_data['foos'], foos[1:])
+        self.assertEqual(job_data['comment'], 'test')
+
+    def test_enqueue_transition_not_allowed_fails_job(self):
+        allowed = Order.objects.create(status=OrderStatus.to_send.id)
+        not_allowed = Order.objects.create(status=OrderStatus.new.id)
+        transition = self._prepare_transition(source=OrderStatus.to_send.id)
+        job = enqueue_transition(
+            [allowed, not_allowed], transition, {}, self.user
+        )
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, TransitionJobStatus.failed.id)
+        self.assertIn('is not allowed', job.reason)
+        job_object = job.job_objects.get(object_id=not_allowed.pk)
+        self.assertEqual(job_object.status, TransitionJobStatus.failed.id)
+        self.assertNotEqual(job_object.reason, job.reason)
+        not_allowed.refresh_from_db()
+        self.assertEqual(not_allowed.status, OrderStatus.new.id)
+
+    @override_settings(RALPH_TRANSITIONS_JOB_CHUNK_SIZE=2)
+    def test_job_objects_status_updated_after_every_chunk(self):
+        orders = [Order.objects.create() for _ in range(5)]
+        transition = self._prepare_transition(actions=['send_notification'])
+        statuses = []
+        original_run_field_transition = jobs.run_field_transition
+
+        def run_field_transition(**kwargs):
+            statuses.append(
+                self._get_objects_statuses(kwargs['transition_job'])
+            )
+            return original_run_field_transition(**kwargs)
+
+        with mock.patch.object(
+            jobs, 'run_field_transition', side_effect=run_field_transition
+        ):
+            job = enqueue_transition(orders, transition, {}, self.user)
+        job.refresh_from_db()
+
+        queued = TransitionJobStatus.queued.id
+        started = TransitionJobStatus.started.id
+        finished = TransitionJobStatus.finished.id
+        self.assertEqual(statuses, [
+            [started, started, queued, queued, queued],
+            [finished, finished, started, started, queued],
+            [finished, finished, finished, finished, started],
+        ])
+        self.assertEqual(job.status, finished)
+        self.assertEqual(self._get_objects_statuses(job), [finished] * 5)
+
+    @override_settings(RALPH_TRANSITIONS_JOB_CHUNK_SIZE=2)
+    def test_failed_chunk_does_not_stop_job(self):
+        orders = [Order.objects.create() for _ in range(5)]
+        orders[2].status = OrderStatus.sended.id
+        orders[2].save()
+        transition = self._prepare_transition(actions=['send_notification'])
+        job = enqueue_transition(orders, transition, {}, self.user)
+        job.refresh_from_db()
+
+        finished = TransitionJobStatus.finished.id
+        failed = TransitionJobStatus.failed.id
+        self.assertEqual(job.status, failed)
+        self.assertIn('is not allowed', job.reason)
+        self.assertEqual(
+            self._get_objects_statuses(job),
+            [finished, finished, failed, failed, finished]
+        )
+        self.assertEqual(
+            Order.objects.filter(status=OrderStatus.to_send.id).count(), 4
+        )
+
+    def test_transition_could_be_deleted_after_job(self):
+        transition = self._prepare_transition()
+        job = enqueue_transition(
+            [Order.objects.create()], transition, {}, self.user
+        )
+        transition.delete()
+        job = TransitionJob.objects.get(pk=job.pk)
+        self.assertIsNone(job.transition)
+        self.assertEqual(job.status, TransitionJobStatus.finished.id)
+
+    def test_enqueue_transition_missing_object_fails_job(self):
+        orders = [Order.objects.create() for _ in range(2)]
+        transition = self._prepare_transition()
+        deleted_pk = orders[1].pk
+        orders[1].delete()
+        orders[1].pk = deleted_pk
+        job = enqueue_transition(orders, transition, {}, self.user)
+        job.refresh_from_db()
+
+        self.assertEqual(job.status, TransitionJobStatus.failed.id)
+        self.assertEqual(
+            job.job_objects.get(object_id=deleted_pk).reason,
+            'object does not exist'
+        )
+
+    def test_transition_job_api(self):
+        orders = [Order.objects.create() for _ in range(2)]
+        transition = self._prepare_transition()
+        job = enqueue_transition(orders, transition, {}, self.user)
+        superuser = get_user_model().objects.create_superuser(
+            'root', 'root@ralph.local', 'password'
+        )
+        client = APIClient()
+        client.force_authenticate(superuser)
+        response = client.get(
+            reverse('transitionjob-detail', args=(job.pk,)), format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'finished')
+        self.assertFalse(response.data['is_running'])
+        self.assertEqual(len(response.data['job_objects']), 2)
@@ -1,7 +1,12 @@
 # -*- coding: utf-8 -*-
+from unittest.mock import patch
+
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Permission
+from django.db import connection
+from django.db.models.signals import post_save
 from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
 
 from ralph.lib.transitions import transition_action
 from ralph.lib.transitions.exceptions import (
@@ -158,6 +163,79 @@ class TransitionsTest(TransitionTestCase):
         )
         self.assertFalse(result)
 
+    def test_transition_result_contains_timings(self):
+        order = Order.objects.create()
+        _, transition, _ = self._create_transition(
+            model=order, name='prepare',
+            source=[OrderStatus.new.id], target=OrderStatus.to_send.id,
+            actions=['pack']
+        )
+        result = run_field_transition(
+            [order], transition, request=self.request, field='status'
+        )
+        status, attachment = result
+        self.assertTrue(status)
+        self.assertEqual(result.status, status)
+        self.assertEqual(result.attachment, attachment)
+        self.assertEqual(
+            list(result.timings.keys()),
+            ['check', 'action_pack', 'history', 'save']
+        )
+
+    def test_transition_bulk_update_status(self):
+        orders = [Order.objects.create() for _ in range(5)]
+        _, transition, _ = self._create_transition(
+            model=orders[0], name='prepare',
+            source=[OrderStatus.new.id], target=OrderStatus.to_send.id,
+            actions=['pack']
+        )
+        # actions don't modify instances, so status is saved with single
+        # update for all orders
+        with CaptureQueriesContext(connection) as ctx:
+            run_field_transition(
+                orders, transition, request=self.request, field='status'
+            )
+        updates = [
+            q for q in ctx.captured_queries
+            if 'UPDATE "tests_order"' in q['sql']
+        ]
+        self.assertEqual(len(updates), 1)
+        self.assertEqual(
+            Order.objects.filter(status=OrderStatus.to_send.id).count(), 5
+        )
+        for order in orders:
+            self.assertEqual(order.status, OrderStatus.to_send.id)
+
+    def test_transition_saves_instances_when_model_does_not_allow_bulk_update(self):  # noqa
+        orders = [Order.objects.create() for _ in range(3)]
+        _, transition, _ = self._create_transition(
+            model=orders[0], name='prepare',
+            source=[OrderStatus.new.id], target=OrderStatus.to_send.id,
+            actions=['pack']
+        )
+        saved = []
+
+        def order_saved(sender, instance, **kwargs):
+            saved.append(instance.pk)
+
+        post_save.connect(order_saved, sender=Order)
+        self.addCleanup(post_save.disconnect, order_saved, sender=Order)
+        with patch.object(Order, 'transition_bulk_update_fields', ()):
+            run_field_transition(
+                orders, transition, request=self.request, field='status'
+            )
+        # receivers are called for every instance
+        self.assertCountEqual(saved, [order.pk for order in orders])
+        self.assertEqual(
+            Order.objects.filter(status=OrderStatus.to_send.id).count(), 3
+        )
+
+    def test_transition_source_set(self):
+        transition = Transition(source=[str(OrderStatus.new.id), 2])
+        self.assertEqual(
+            transition.source_set, frozenset([OrderStatus.new.id, 2])
+        )
+
     def test_forbidden_transition(self):
         order = Order.objects.create()
         transition = Transition.objects.create(
@@ -1,8 +1,10 @@
+from contextlib import ExitStack
 from copy import deepcopy
 
 from django import forms
 from django.contrib import messages
 from django.core.urlresolvers import reverse
+from django.db import connections, transaction
 from django.db.models.loading import get_model
 from django.http import (
     HttpResponseBadRequest,
@@ -16,7 +18,9 @@ from django.utils.translation import ugettext_lazy as _
 from ralph.admin.mixins import RalphTemplateView
 from ralph.admin.sites import ralph_site
 from ralph.admin.widgets import AutocompleteWidget
+from ralph.lib.permissions.models import PermissionsForObjectMixin
 from ralph.lib.transitions.exceptions import TransitionNotAllowedError
+from ralph.lib.transitions.jobs import enqueue_transition
 from ralph.lib.transitions.models import (
     _check_instances_for_transition,
     run_field_transition,
@@ -34,6 +38,16 @@ class TransitionViewMixin(object):
             return False, e
         return True, None
 
+    def _objects_are_permitted(self, user):
+        """
+        Check if user has access to every object passed to transition (using
+        single query for all objects).
+        """
+        if not issubclass(self.model, PermissionsForObjectMixin):
+            return True
+        pks = {obj.pk for obj in self.objects}
+        return self.model.filter_permitted(user, pks) == pks
+
     def collect_actions(self, transition):
         names = transition.actions.values_list('name', flat=True).all()
         actions = [getattr(self.obj, name) for name in names]
@@ -84,6 +98,23 @@ class TransitionViewMixin(object):
     def dispatch(self, request, *args, **kwargs):
         if not hasattr(self, 'transition'):
             return HttpResponseBadRequest()
+        if self.transition.async_execution:
+            return self._dispatch(request, *args, **kwargs)
+        with self._atomic_request():
+            return self._dispatch(request, *args, **kwargs)
+
+    def _atomic_request(self):
+        """
+        Restore atomic requests (disabled in `as_view`) for synchronous
+        transitions.
+        """
+        stack = ExitStack()
+        for conn in connections.all():
+            if conn.settings_dict['ATOMIC_REQUESTS']:
+                stack.enter_context(transaction.atomic(using=conn.alias))
+        return stack
+
+    def _dispatch(self, request, *args, **kwargs):
         if not request.user.has_perm(
             '{}.{}'.format(
                 self.transition.permission_info['content_type'].app_label,
@@ -91,6 +122,8 @@ class TransitionViewMixin(object):
             )
         ):
             return HttpResponseForbidden()
+        if not self._objects_are_permitted(request.user):
+            return HttpResponseForbidden()
         self.actions, self.return_attachment = self.collect_actions(self.transition)  # noqa
         if not len(self.form_fields_from_actions):
             return self.run_and_redirect(request, *args, **kwargs)
@@ -115,9 +148,34 @@ class TransitionViewMixin(object):
 
     def form_invalid(self, form):
         context = self.get_context_data()
+        if form is not None:
+            # keep errors added outside of form validation
+            context['form'] = form
         return self.render_to_response(context)
 
+    @classmethod
+    def as_view(cls, **initkwargs):
+        # asynchronous job has to be committed before it's enqueued, so the
+        # request can't be atomic in such case (atomic request is restored
+        # in `dispatch` for synchronous transitions)
+        return transaction.non_atomic_requests(super().as_view(**initkwargs))
+
+    def _run_async(self, form=None):
+        job = enqueue_transition(
+            instances=self.objects,
+            transition=self.transition,
+            data=form.cleaned_data if form else {},
+            user=self.request.user,
+        )
+        messages.success(self.request, _(
+            'Transition has been scheduled to run in the background '
+            '(job #%(job_id)s)'
+        ) % {'job_id': job.pk})
+        return HttpResponseRedirect(self.get_success_url())
+
     def form_valid(self, form=None):
+        if self.transition.async_execution:
+            return self._run_async(form)
         status, attachment = run_field_transition(
             instances=self.objects,
             transition_obj_or_name=self.transition,
@@ -178,11 +236,32 @@ class TransitionViewMixin(object):
             return not_valid
 
         form = self.get_form()
-        if form.is_valid():
+        if form.is_valid() and self._actions_form_is_valid(form):
             return self.form_valid(form)
         else:
             return self.form_invalid(form)
 
+    def _actions_form_is_valid(self, form):
+        """
+        Validate data of actions form fields against all objects (ex. check
+        if there is enough free licences for all of them).
+        """
+        for action in self.actions:
+            form_validation = getattr(action, 'form_validation', None)
+            if not form_validation:
+                continue
+            prefix = '{}__'.format(action.__name__)
+            data = {
+                key[len(prefix):]: value
+                for key, value in form.cleaned_data.items()
+                if key.startswith(prefix)
+            }
+            try:
+                form_validation(self.objects, data)
+            except forms.ValidationError as e:
+                form.add_error(None, e)
+        return form.is_valid()
+
     def get_success_url(self):
         raise NotImplementedError()
 
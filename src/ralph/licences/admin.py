@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
+from django.contrib.admin import SimpleListFilter
 from django.utils.translation import ugettext_lazy as _
 
 from ralph.admin import RalphAdmin, RalphTabularInline, register
@@ -49,6 +50,24 @@ class LicenceUserView(RalphDetailViewAdmin):
     inlines = [LicenceUserInline]
 
 
+class FreeLicencesFilter(SimpleListFilter):
+
+    title = _('free')
+    parameter_name = 'free'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('yes', _('has free licences')),
+            ('no', _('fully used')),
+        )
+
+    def queryset(self, request, queryset):
+        if self.value() in ('yes', 'no'):
+            # queryset comes from `objects_used_free` manager
+            queryset = queryset.filter_free(free=self.value() == 'yes')
+        return queryset
+
+
 @register(Licence)
 class LicenceAdmin(
     AttachmentsMixin,
@@ -71,7 +90,7 @@ class LicenceAdmin(
         'niw', 'sn', 'remarks', 'software', 'property_of',
         'licence_type', 'valid_thru', 'order_no', 'invoice_no', 'invoice_date',
         'budget_info', 'manufacturer', 'region', 'office_infrastructure',
-        ('tags', TagsListFilter)
+        FreeLicencesFilter, ('tags', TagsListFilter)
     ]
     date_hierarchy = 'created'
     list_display = [
@@ -75,7 +75,7 @@ class LicenceTypeViewSet(RalphAPIViewSet):
 
 
 class LicenceViewSet(RalphAPIViewSet):
-    queryset = Licence.objects.all()
+    queryset = Licence.objects_used_free.all()
     serializer_class = LicenceSerializer
     select_related = ['region', 'manufacturer', 'office_infrastructure']
     prefetch_related = [
@@ -83,6 +83,16 @@ class LicenceViewSet(RalphAPIViewSet):
         'baseobjectlicence_set__base_object',
     ]
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        # `free=1` - licences which could be assigned, `free=0` - fully used
+        free = self.request.query_params.get('free')
+        if free is not None:
+            queryset = queryset.filter_free(
+                free=free.lower() in ('1', 'true', 'yes')
+            )
+        return queryset
+
 
 class LicenceUserViewSet(RalphAPIViewSet):
     queryset = LicenceUser.objects.all()
@@ -3,7 +3,6 @@
 from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
-from django.db.models import Sum
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 
@@ -56,38 +55,65 @@ class Software(PermByFieldMixin, NamedMixin, models.Model):
         verbose_name_plural = _('software categories')
 
 
-class LicencesUsedFreeManager(models.Manager):
+def _get_used_licences_queries():
+    """
+    Return subqueries calculating licences used by users and base objects.
+    """
+    # Coalesce is used here to provide default value for Sum (in other
+    # case None value is returned)
+    # read https://code.djangoproject.com/ticket/10929 for more info
+    # about default value for Sum
+    id_column = Licence.baseobject_ptr.field.column
+
+    user_quantity_field = Licence.users.through._meta.get_field('quantity')
+    user_licence_field = Licence.users.through._meta.get_field('licence')
+    user_count_query = _SELECT_USED_LICENCES_QUERY.format(
+        assignment_table=Licence.users.through._meta.db_table,
+        quantity_column=user_quantity_field.db_column or user_quantity_field.column,  # noqa
+        licence_id_column=user_licence_field.db_column or user_licence_field.column,  # noqa
+        licence_table=Licence._meta.db_table,
+        id_column=id_column,
+    )
+
+    base_object_quantity_field = Licence.base_objects.through._meta.get_field('quantity')  # noqa
+    base_object_licence_field = Licence.base_objects.through._meta.get_field('licence')  # noqa
+    base_object_count_query = _SELECT_USED_LICENCES_QUERY.format(
+        assignment_table=Licence.base_objects.through._meta.db_table,
+        quantity_column=base_object_quantity_field.db_column or base_object_quantity_field.column,  # noqa
+        licence_id_column=base_object_licence_field.db_column or base_object_licence_field.column,  # noqa
+        licence_table=Licence._meta.db_table,
+        id_column=id_column,
+    )
+    return user_count_query, base_object_count_query
+
+
+class LicencesUsedFreeQuerySet(models.QuerySet):
+    def filter_free(self, free=True):
+        """
+        Filter licences which could be assigned (`free` > 0) or, when `free`
+        is False, licences which are fully used - in database.
+        """
+        number_bought_field = Licence._meta.get_field('number_bought')
+        return self.extra(where=[
+            '{}.{} {} ({}) + ({})'.format(
+                Licence._meta.db_table, number_bought_field.column,
+                '>' if free else '<=',
+                *_get_used_licences_queries()
+            )
+        ])
+
+
+class LicencesUsedFreeManager(
+    models.Manager.from_queryset(LicencesUsedFreeQuerySet)
+):
     def get_queryset(self):
         """
         Use subqueries in select to calculate licences used by users and
         base objects.
         """
-        # Coalesce is used here to provide default value for Sum (in other
-        # case None value is returned)
-        # read https://code.djangoproject.com/ticket/10929 for more info
-        # about default value for Sum
-        id_column = Licence.baseobject_ptr.field.column
-
-        user_quantity_field = Licence.users.through._meta.get_field('quantity')
-        user_licence_field = Licence.users.through._meta.get_field('licence')
-        user_count_query = _SELECT_USED_LICENCES_QUERY.format(
-            assignment_table=Licence.users.through._meta.db_table,
-            quantity_column=user_quantity_field.db_column or user_quantity_field.column,  # noqa
-            licence_id_column=user_licence_field.db_column or user_licence_field.column,  # noqa
-            licence_table=Licence._meta.db_table,
-            id_column=id_column,
-        )
-
-        base_object_quantity_field = Licence.base_objects.through._meta.get_field('quantity')  # noqa
-        base_object_licence_field = Licence.base_objects.through._meta.get_field('licence')  # noqa
-        base_object_count_query = _SELECT_USED_LICENCES_QUERY.format(
-            assignment_table=Licence.base_objects.through._meta.db_table,
-            quantity_column=base_object_quantity_field.db_column or base_object_quantity_field.column,  # noqa
-            licence_id_column=base_object_licence_field.db_column or base_object_licence_field.column,  # noqa
-            licence_table=Licence._meta.db_table,
-            id_column=id_column,
+        user_count_query, base_object_count_query = (
+            _get_used_licences_queries()
         )
-
         return super().get_queryset().extra(
             select={
                 'user_count': user_count_query,
@@ -213,14 +239,10 @@ class Licence(Regionalizable, AdminAbsoluteUrlMixin, BaseObject):
             # try use fields from objects_used_free manager
             return (self.user_count or 0) + (self.baseobject_count or 0)
         except AttributeError:
-            base_objects_qs = self.base_objects.through.objects.filter(
-                licence=self
-            )
-            users_qs = self.users.through.objects.filter(licence=self)
-
-            def get_sum(qs):
-                return qs.aggregate(sum=Sum('quantity'))['sum'] or 0
-            return sum(map(get_sum, [base_objects_qs, users_qs]))
+            # both counts are calculated in single query
+            return sum(Licence.objects_used_free.filter(
+                pk=self.pk
+            ).values_list('user_count', 'baseobject_count').get())
     used._permission_field = 'number_bought'
 
     @cached_property
@@ -232,11 +254,8 @@ class Licence(Regionalizable, AdminAbsoluteUrlMixin, BaseObject):
 
     @classmethod
     def get_autocomplete_queryset(cls):
-        # filter by ids of licences which could be assigned (are not fully
-        # used)
-        return cls.objects_used_free.filter(
-            pk__in=[l.id for l in cls.objects_used_free.all() if l.free > 0]
-        )
+        # licences which could be assigned (are not fully used)
+        return cls.objects_used_free.filter_free()
 
 
 class BaseObjectLicence(models.Model):
@@ -28,6 +28,24 @@ class LicenceAPITests(RalphAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data['count'], Licence.objects.count())
 
+    def test_get_licence_list_filter_by_free(self):
+        self.licence1.number_bought = 1
+        self.licence1.save()
+        url = reverse('licence-list') + '?free=0'
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [licence['id'] for licence in response.data['results']],
+            [self.licence1.id]
+        )
+        url = reverse('licence-list') + '?free=1'
+        response = self.client.get(url, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCountEqual(
+            [licence['id'] for licence in response.data['results']],
+            [self.licence2.id, self.licence3.id]
+        )
+
     def test_get_licence_with_user_details(self):
         url = reverse('licence-detail', args=(self.licence1.id,))
         response = self.client.get(url, format='json')
@@ -65,3 +65,28 @@ class BaseObjectLicenceTest(ClientMixin, TestCase):
         self.assertContains(
             response, 'Asset region is in a different region than licence.'
         )
+
+
+class LicenceAdminFreeFilterTest(ClientMixin, TestCase):
+
+    def setUp(self):  # noqa
+        super().setUp()
+        self.login_as_user()
+        self.licence_free = LicenceFactory(number_bought=2)
+        self.licence_used = LicenceFactory(number_bought=1)
+        BaseObjectLicence.objects.create(
+            licence=self.licence_used, base_object=BackOfficeAssetFactory()
+        )
+
+    def test_free_filter(self):
+        for value, licence in (
+            ('yes', self.licence_free), ('no', self.licence_used)
+        ):
+            response = self.client.get(
+                reverse('admin:licences_licence_changelist'),
+                {'free': value}
+            )
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(
+                list(response.context['cl'].queryset), [licence]
+            )
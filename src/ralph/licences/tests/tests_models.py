@@ -39,7 +39,7 @@ class LicenceTest(RalphTestCase):
         self.bo_asset = BackOfficeAssetFactory()
 
     def test_get_autocomplete_queryset(self):
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             self.assertCountEqual(
                 Licence.get_autocomplete_queryset().values_list(
                     'pk', flat=True
@@ -54,10 +54,33 @@ class LicenceTest(RalphTestCase):
         LicenceUser.objects.create(
             user=self.user_1, licence=self.licence_1, quantity=2
         )
-        with self.assertNumQueries(2):
+        with self.assertNumQueries(1):
             self.assertCountEqual(
                 Licence.get_autocomplete_queryset().values_list(
                     'pk', flat=True
                 ),
                 [self.licence_2.pk]
             )
+
+    def test_filter_free(self):
+        LicenceUser.objects.create(
+            user=self.user_1, licence=self.licence_2, quantity=1
+        )
+        self.assertCountEqual(
+            Licence.objects_used_free.filter_free(free=False).values_list(
+                'pk', flat=True
+            ),
+            [self.licence_2.pk]
+        )
+
+    def test_used_without_annotations(self):
+        BaseObjectLicence.objects.create(
+            base_object=self.bo_asset, licence=self.licence_1, quantity=1,
+        )
+        LicenceUser.objects.create(
+            user=self.user_1, licence=self.licence_1, quantity=1
+        )
+        licence = Licence.objects.get(pk=self.licence_1.pk)
+        with self.assertNumQueries(1):
+            self.assertEqual(licence.used, 2)
+        self.assertEqual(licence.free, 1)
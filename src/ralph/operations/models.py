@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
+from time import monotonic
+
 from dj.choices import Choices
 from django.conf import settings
 from django.db import models
-from django.db.models.signals import post_migrate
+from django.db.models.signals import post_delete, post_migrate, post_save
 from django.dispatch import receiver
 from django.utils.translation import ugettext_lazy as _
 from mptt.models import MPTTModel, TreeForeignKey
@@ -25,6 +27,23 @@ class OperationStatus(Choices):
     closed = _('closed')
 
 
+# operation type id -> set of ids of its subtree (including itself), cached
+# for whole process - replaced as a whole (never modified in place) together
+# with generation (of invalidation) it was built in and its expiration time
+_descendants_ids = (None, None, {})
+# incremented when operation type is changed in this process
+_descendants_ids_generation = 0
+
+
+def invalidate_descendants_ids_cache():
+    """
+    Invalidate subtrees of operation types cached by this process. Other
+    processes see changes after `OPERATION_TYPES_CACHE_TIMEOUT` seconds.
+    """
+    global _descendants_ids_generation
+    _descendants_ids_generation += 1
+
+
 class OperationType(MPTTModel, NamedMixin, models.Model):
     parent = TreeForeignKey(
         'self',
@@ -50,6 +69,43 @@ class OperationType(MPTTModel, NamedMixin, models.Model):
         failure = _('failure')
         hardware_failure = _('hardware failure')
 
+    @classmethod
+    def get_descendants_ids(cls, pk):
+        """
+        Return (cached) ids of operation type and all of its descendants.
+
+        Subtrees of all operation types are calculated at once (using single
+        query) from MPTT bounds. They're cached by process and calculated
+        again when operation type is changed (in this process) or after
+        `OPERATION_TYPES_CACHE_TIMEOUT` seconds, so changes made by other
+        processes are seen too.
+        """
+        global _descendants_ids
+        # generation is read before tree, so changes made in the meantime
+        # will cause rebuild next time
+        generation = _descendants_ids_generation
+        now = monotonic()
+        cached_generation, expires, descendants_ids = _descendants_ids
+        if cached_generation != generation or expires <= now:
+            nodes = list(cls._default_manager.values_list(
+                'id', 'tree_id', 'lft', 'rght'
+            ))
+            descendants_ids = {
+                node_id: frozenset(
+                    other_id
+                    for other_id, other_tree_id, other_lft, other_rght in nodes
+                    if other_tree_id == tree_id and
+                    lft <= other_lft and other_rght <= rght
+                )
+                for node_id, tree_id, lft, rght in nodes
+            }
+            _descendants_ids = (
+                generation,
+                now + settings.OPERATION_TYPES_CACHE_TIMEOUT,
+                descendants_ids,
+            )
+        return descendants_ids.get(int(pk), frozenset())
+
 
 class Operation(AdminAbsoluteUrlMixin, TaggableMixin, models.Model):
     type = TreeForeignKey(OperationType, verbose_name=_('type'))
@@ -104,8 +160,9 @@ class OperationDescendantManager(models.Manager):
 
     def get_queryset(self, *args, **kwargs):
         queryset = super().get_queryset(*args, **kwargs)
-        root = OperationType.objects.get(pk=self._descendants_of)
-        return queryset.filter(type__in=root.get_descendants(include_self=True))
+        return queryset.filter(
+            type__in=OperationType.get_descendants_ids(self._descendants_of)
+        )
 
 
 class Change(Operation):
@@ -144,3 +201,10 @@ def rebuild_handler(sender, **kwargs):
     # post_migrate is called after each app's migrations
     if sender.name == 'ralph.' + OperationType._meta.app_label:
         OperationType.objects.rebuild()
+        invalidate_descendants_ids_cache()
+
+
+@receiver(post_save, sender=OperationType)
+@receiver(post_delete, sender=OperationType)
+def invalidate_descendants_ids(sender, **kwargs):
+    invalidate_descendants_ids_cache()
@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+from unittest.mock import patch
+
+from django.test import TestCase
+from django.test.utils import override_settings
+
+from ralph.operations.models import (
+    Change,
+    Failure,
+    invalidate_descendants_ids_cache,
+    Operation,
+    OperationStatus,
+    OperationType
+)
+
+
+class OperationDescendantManagerTest(TestCase):
+    def setUp(self):
+        self.failure_type = OperationType.objects.get(
+            pk=OperationType.choices.failure
+        )
+        self.hardware_failure = Operation.objects.create(
+            title='hardware failure', status=OperationStatus.opened,
+            type_id=OperationType.choices.hardware_failure,
+        )
+        self.change = Operation.objects.create(
+            title='change', status=OperationStatus.opened,
+            type_id=OperationType.choices.change,
+        )
+
+    def test_descendants_ids(self):
+        descendants_ids = OperationType.get_descendants_ids(
+            OperationType.choices.failure
+        )
+        self.assertIn(OperationType.choices.failure.id, descendants_ids)
+        self.assertIn(
+            OperationType.choices.hardware_failure.id, descendants_ids
+        )
+        self.assertNotIn(OperationType.choices.change.id, descendants_ids)
+
+    def test_manager_filter_by_type_without_extra_queries(self):
+        # warm up cache
+        OperationType.get_descendants_ids(OperationType.choices.failure)
+        with self.assertNumQueries(1):
+            self.assertEqual(
+                list(Failure.objects.all()), [self.hardware_failure]
+            )
+        with self.assertNumQueries(1):
+            self.assertEqual(list(Change.objects.all()), [self.change])
+
+    def test_cache_invalidated_when_operation_type_is_added(self):
+        OperationType.get_descendants_ids(OperationType.choices.failure)
+        disk_failure_type = OperationType.objects.create(
+            name='disk failure', parent=self.failure_type
+        )
+        disk_failure = Operation.objects.create(
+            title='disk failure', status=OperationStatus.opened,
+            type=disk_failure_type,
+        )
+        self.assertCountEqual(
+            Failure.objects.all(), [self.hardware_failure, disk_failure]
+        )
+
+    @override_settings(OPERATION_TYPES_CACHE_TIMEOUT=60)
+    def test_cache_rebuilt_after_timeout(self):
+        invalidate_descendants_ids_cache()
+        with patch('ralph.operations.models.monotonic', return_value=1000):
+            with self.assertNumQueries(1):
+                OperationType.get_descendants_ids(
+                    OperationType.choices.failure
+                )
+        with patch('ralph.operations.models.monotonic', return_value=1059):
+            with self.assertNumQueries(0):
+                OperationType.get_descendants_ids(
+                    OperationType.choices.failure
+                )
+        # changes made by other processes are seen after timeout
+        with patch('ralph.operations.models.monotonic', return_value=1060):
+            with self.assertNumQueries(1):
+                OperationType.get_descendants_ids(
+                    OperationType.choices.failure
+                )
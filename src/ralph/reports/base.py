@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
-import uuid
+from collections import defaultdict, OrderedDict
+from itertools import count as counter
+
+# sequential ids of nodes (unique within process)
+_node_ids = counter()
 
 
 class ReportNode(object):
@@ -11,11 +15,14 @@ class ReportNode(object):
         self.count = count
         self.parent = parent
         self.children = []
+        # the first child with the name
+        self.children_by_name = {}
         self.link = link
-        self.uid = "n{}".format(uuid.uuid1())
+        self.uid = "n{}".format(next(_node_ids))
 
     def add_child(self, child):
         self.children.append(child)
+        self.children_by_name.setdefault(child.name, child)
         child.parent = self
 
     def add_to_count(self, count):
@@ -44,42 +51,93 @@ class ReportNode(object):
 
 class ReportContainer(list):
     """Container for nodes. This class provides few helpful methods to
-    manipulate on node set."""
-    def get(self, name):
-        return next((node for node in self if node.name == name), None)
+    manipulate on node set.
+
+    Nodes are indexed by name within their parent (roots within container),
+    and roots and leaves are maintained when nodes are added, so building
+    report is linear in number of nodes. Nodes have to be added by `add` or
+    `get_or_create` (parent is always added before its children)."""
+    def __init__(self):
+        super().__init__()
+        self._roots = []
+        # the first root with the name
+        self._roots_by_name = {}
+        self._leaves = OrderedDict()
+
+    def _add_node(self, name, parent=None):
+        node = ReportNode(name)
+        self.append(node)
+        self._leaves[node.uid] = node
+        if parent is None:
+            self._roots.append(node)
+            self._roots_by_name.setdefault(name, node)
+        else:
+            parent.add_child(node)
+            self._leaves.pop(parent.uid, None)
+        return node
+
+    def get(self, name, parent=None):
+        """Return node with name among children of parent (or among roots,
+        if parent is not passed)."""
+        if parent is None:
+            return self._roots_by_name.get(name)
+        return parent.children_by_name.get(name)
 
-    def get_or_create(self, name):
-        node = self.get(name)
+    def get_or_create(self, name, parent=None):
+        node = self.get(name, parent)
         created = False
         if not node:
-            node = ReportNode(name)
-            self.append(node)
+            node = self._add_node(name, parent)
             created = True
         return node, created
 
     def add(self, name, count=0, parent=None, unique=True, link=None):
+        if parent and not isinstance(parent, ReportNode):
+            parent, __ = self.get_or_create(parent)
         if unique:
-            new_node, created = self.get_or_create(name)
+            new_node, __ = self.get_or_create(name, parent)
         else:
-            new_node = ReportNode(name)
-            self.append(new_node)
-            created = True
+            new_node = self._add_node(name, parent)
         new_node.count = count
-        if parent:
-            if not isinstance(parent, ReportNode):
-                parent, __ = self.get_or_create(parent)
-        if created:
-            parent.add_child(new_node)
         new_node.link = link
         return new_node, parent
 
     @property
     def roots(self):
-        return [node for node in self if node.parent is None]
+        return list(self._roots)
 
     @property
     def leaves(self):
-        return [node for node in self if node.children == []]
+        return list(self._leaves.values())
+
+    def update_counts(self):
+        """Add count of every leaf to counts of all its ancestors (in single
+        bottom-up pass over nodes)."""
+        leaves_counts = defaultdict(int)
+        # parent is always before its children
+        for node in reversed(self):
+            if node.children:
+                leaves_count = leaves_counts.pop(node.uid, 0)
+                node.add_to_count(leaves_count)
+            else:
+                leaves_count = node.count
+            if node.parent is not None:
+                leaves_counts[node.parent.uid] += leaves_count
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create container with nodes from (serialized) result of
+        `to_dict`."""
+        container = cls()
+
+        def restore(node_data, parent=None):
+            node = container._add_node(node_data['name'], parent)
+            node.count = node_data['count']
+            for child_data in node_data['children']:
+                restore(child_data, node)
+        for root_data in data:
+            restore(root_data)
+        return container
 
     def to_dict(self):
         def traverse(node):
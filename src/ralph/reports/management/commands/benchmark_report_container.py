@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+from django.core.management.base import BaseCommand
+
+from ralph.helpers import Timer
+from ralph.reports.base import ReportContainer
+
+STATUSES = ['new', 'in use', 'free', 'damaged', 'liquidated']
+
+
+def _build_report(nodes):
+    """
+    Build report like category - model - status report with (about) `nodes`
+    nodes (10 categories, models with status of assets as leaves).
+    """
+    report = ReportContainer()
+    models = nodes // (len(STATUSES) + 1)
+    for i in range(models):
+        node, __ = report.add(
+            name='model {}'.format(i), parent='category {}'.format(i % 10)
+        )
+        for status in STATUSES:
+            report.add(name=status, parent=node, count=1, unique=False)
+    return report
+
+
+class Command(BaseCommand):
+
+    help = "Measure performance of building reports (nodes container)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '-n', '--nodes',
+            type=int,
+            nargs='+',
+            default=[10000, 100000],
+            help='number of nodes of report',
+        )
+
+    def handle(self, *args, **options):
+        for nodes in options['nodes']:
+            self.stdout.write('{} nodes:'.format(nodes))
+            with Timer('build report', self.stdout):
+                report = _build_report(nodes)
+            with Timer('roots and leaves', self.stdout):
+                report.roots
+                report.leaves
+            with Timer('update counts', self.stdout):
+                report.update_counts()
+            with Timer('serialize (to_dict)', self.stdout):
+                report.to_dict()
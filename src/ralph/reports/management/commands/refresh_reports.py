@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+import time
+from collections import OrderedDict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ralph.reports.urls import urlpatterns
+
+
+def get_precomputed_reports():
+    """
+    Return dict with slug (url name) of report as a key and report class (with
+    precomputed results) as a value.
+    """
+    reports = OrderedDict()
+    for pattern in urlpatterns:
+        report_class = getattr(pattern.callback, 'report_class', None)
+        if report_class is not None and report_class.precomputed:
+            reports[pattern.name] = report_class
+    return reports
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Refresh precomputed results of reports. Should be run periodically "
+        "(at least every REPORTS_RESULT_MAX_AGE seconds, ex. by cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'slugs',
+            nargs='*',
+            help='slugs of reports to refresh (all reports by default)',
+        )
+
+    def handle(self, *args, **options):
+        reports = get_precomputed_reports()
+        unknown = set(options['slugs']) - set(reports)
+        if unknown:
+            raise CommandError('Unknown reports: {}'.format(
+                ', '.join(sorted(unknown))
+            ))
+        for slug, report_class in reports.items():
+            if options['slugs'] and slug not in options['slugs']:
+                continue
+            start = time.perf_counter()
+            report = report_class()
+            report.slug = slug
+            keys = report.get_result_keys()
+            for mode, dc in keys:
+                report.refresh_result(mode, dc)
+            self.stdout.write('{}: {} results refreshed in {:.2f}s'.format(
+                slug, len(keys), time.perf_counter() - start
+            ))
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('data_center', '0009_auto_20160301_1820'),
+        ('reports', '0004_reportlanguage_default'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportResult',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', primary_key=True, serialize=False, auto_created=True)),
+                ('created', models.DateTimeField(verbose_name='date created', auto_now_add=True)),
+                ('modified', models.DateTimeField(verbose_name='last modified', auto_now=True)),
+                ('slug', models.CharField(max_length=100)),
+                ('mode', models.CharField(max_length=50)),
+                ('result', models.TextField()),
+                ('data_center_key', models.PositiveIntegerField(default=0, editable=False)),
+                ('data_center', models.ForeignKey(blank=True, null=True, to='data_center.DataCenter')),
+            ],
+        ),
+        migrations.AlterUniqueTogether(
+            name='reportresult',
+            unique_together=set([('slug', 'mode', 'data_center_key')]),
+        ),
+    ]
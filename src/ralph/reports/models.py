@@ -1,3 +1,7 @@
+import json
+from datetime import datetime, timedelta
+
+from django.conf import settings
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.utils.translation import ugettext_lazy as _
@@ -48,3 +52,53 @@ class ReportTemplate(TimeStampMixin, models.Model):
     @property
     def name(self):
         return self.report.name
+
+
+class ReportResult(TimeStampMixin, models.Model):
+    """
+    Precomputed result of report (nodes serialized by
+    `ReportContainer.to_dict`) for mode (asset type) and data center.
+    """
+    # `data_center_key` of result for all data centers (NULL is not unique,
+    # so nullable `data_center` can't be a part of unique key)
+    ALL_DATA_CENTERS = 0
+
+    slug = models.CharField(max_length=100)
+    mode = models.CharField(max_length=50)
+    data_center = models.ForeignKey(
+        'data_center.DataCenter', null=True, blank=True
+    )
+    data_center_key = models.PositiveIntegerField(
+        default=ALL_DATA_CENTERS, editable=False
+    )
+    result = models.TextField()
+
+    class Meta:
+        unique_together = ('slug', 'mode', 'data_center_key')
+
+    @classmethod
+    def get_data_center_key(cls, data_center):
+        return data_center.pk if data_center else cls.ALL_DATA_CENTERS
+
+    def save(self, *args, **kwargs):
+        self.data_center_key = self.get_data_center_key(self.data_center)
+        return super().save(*args, **kwargs)
+
+    def __str__(self):
+        return '{} ({}, {})'.format(
+            self.slug, self.mode, self.data_center or 'all'
+        )
+
+    @property
+    def data(self):
+        return json.loads(self.result)
+
+    @property
+    def is_stale(self):
+        """
+        Return True if result was not refreshed for `REPORTS_RESULT_MAX_AGE`
+        seconds.
+        """
+        return self.modified < datetime.now() - timedelta(
+            seconds=settings.REPORTS_RESULT_MAX_AGE
+        )
@@ -1,6 +1,16 @@
 # -*- coding: utf-8 -*-
+import functools
+from datetime import datetime, timedelta
+from unittest import mock
+
 import factory
 from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.core.urlresolvers import reverse
+from django.db import connection, IntegrityError, transaction
+from django.http import StreamingHttpResponse
+from django.test.utils import CaptureQueriesContext
 
 from ralph.assets.models.choices import ObjectModelType
 from ralph.assets.tests.factories import (
@@ -10,18 +20,24 @@ from ralph.assets.tests.factories import (
 )
 from ralph.back_office.models import BackOfficeAsset
 from ralph.data_center.models.physical import DataCenterAsset
-from ralph.data_center.tests.factories import DataCenterAssetFactory
+from ralph.data_center.tests.factories import (
+    DataCenterAssetFactory,
+    DataCenterFactory
+)
 from ralph.licences.models import BaseObjectLicence
 from ralph.licences.tests.factories import (
     LicenceFactory,
     LicenceWithUserAndBaseObjectsFactory
 )
-from ralph.reports.models import ReportLanguage
+from ralph.reports.base import ReportContainer
+from ralph.reports.models import ReportLanguage, ReportResult
 from ralph.reports.views import (
     AssetRelationsReport,
     CategoryModelReport,
     CategoryModelStatusReport,
-    LicenceRelationsReport
+    iterate_values_in_chunks,
+    LicenceRelationsReport,
+    StatusModelReport
 )
 from ralph.tests import RalphTestCase
 from ralph.tests.mixins import ClientMixin
@@ -147,6 +163,176 @@ class TestReportCategoryTreeView(ClientMixin, RalphTestCase):
         self.assertEqual(item[0]['count'], 3)
 
 
+class TestReportContainer(RalphTestCase):
+
+    def setUp(self):
+        self.report = ReportContainer()
+        for manufacturer, category, model, count in [
+            ('Dell', 'Server', 'R620', 3),
+            ('Dell', 'Server', 'R720', 2),
+            ('Dell', 'Laptop', 'E6430', 1),
+            ('HP', 'Server', 'DL360', 4),
+        ]:
+            node, __ = self.report.add(name=category, parent=manufacturer)
+            self.report.add(name=model, parent=node, count=count)
+
+    def test_nodes_are_unique_per_parent(self):
+        dell = self.report.get('Dell')
+        hp = self.report.get('HP')
+        self.assertEqual(self.report.roots, [dell, hp])
+        self.assertEqual(
+            [node.name for node in dell.children], ['Server', 'Laptop']
+        )
+        self.assertIsNot(
+            self.report.get('Server', dell), self.report.get('Server', hp)
+        )
+        self.assertIsNone(self.report.get('Server'))
+
+    def test_not_unique_nodes(self):
+        dell = self.report.get('Dell')
+        self.report.add(name='Server', parent=dell, unique=False)
+        self.assertEqual(
+            [node.name for node in dell.children],
+            ['Server', 'Laptop', 'Server']
+        )
+        self.assertEqual(
+            self.report.get('Server', dell), dell.children[0]
+        )
+
+    def test_leaves(self):
+        self.assertEqual(
+            [node.name for node in self.report.leaves],
+            ['R620', 'R720', 'E6430', 'DL360']
+        )
+        self.report.add(name='CPU', parent=self.report.leaves[0])
+        self.assertEqual(
+            [node.name for node in self.report.leaves],
+            ['R720', 'E6430', 'DL360', 'CPU']
+        )
+
+    def test_update_counts(self):
+        self.report.update_counts()
+        self.assertEqual(self.report.to_dict(), [
+            {'name': 'Dell', 'count': 6, 'children': [
+                {'name': 'Server', 'count': 5, 'children': [
+                    {'name': 'R620', 'count': 3, 'children': []},
+                    {'name': 'R720', 'count': 2, 'children': []},
+                ]},
+                {'name': 'Laptop', 'count': 1, 'children': [
+                    {'name': 'E6430', 'count': 1, 'children': []},
+                ]},
+            ]},
+            {'name': 'HP', 'count': 4, 'children': [
+                {'name': 'Server', 'count': 4, 'children': [
+                    {'name': 'DL360', 'count': 4, 'children': []},
+                ]},
+            ]},
+        ])
+
+    def test_update_counts_is_the_same_as_update_count_of_leaves(self):
+        data = self.report.to_dict()
+        expected = ReportContainer.from_dict(data)
+        for node in expected.leaves:
+            node.update_count()
+        self.report.update_counts()
+        self.assertEqual(self.report.to_dict(), expected.to_dict())
+
+    def test_nodes_uids_are_unique(self):
+        self.assertEqual(
+            len({node.uid for node in self.report}), len(self.report)
+        )
+
+
+class TestReportResult(ClientMixin, RalphTestCase):
+
+    def setUp(self):
+        self.login_as_user()
+        self.model = DataCenterAssetModelFactory(
+            category=CategoryFactory(name='Keyboard'),
+            type=ObjectModelType.data_center,
+            name='Keyboard1',
+        )
+        DataCenterAssetFactory.create_batch(2, model=self.model)
+        self.url = reverse('category_model_report') + '?asset_type=dc'
+
+    def test_container_from_dict(self):
+        report = CategoryModelStatusReport()
+        report.execute(DataCenterAsset)
+        data = report.report.to_dict()
+        container = ReportContainer.from_dict(data)
+        self.assertEqual(container.to_dict(), data)
+        self.assertEqual(len(container.leaves), len(report.report.leaves))
+
+    def test_view_reads_stored_result(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'][0].count, 2)
+        DataCenterAssetFactory(model=self.model)
+        # stored result is used (without querying assets) until it's
+        # refreshed
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url)
+        self.assertEqual(response.context['result'][0].count, 2)
+        self.assertFalse([
+            query for query in queries.captured_queries
+            if DataCenterAsset._meta.db_table in query['sql']
+        ])
+        call_command('refresh_reports', 'category_model_report')
+        response = self.client.get(self.url)
+        self.assertEqual(response.context['result'][0].count, 3)
+        self.assertFalse(response.context['report_result'].is_stale)
+
+    def test_refresh_reports_command(self):
+        dc = DataCenterFactory()
+        call_command('refresh_reports')
+        self.assertTrue(ReportResult.objects.filter(
+            slug='category_model_report', mode='all', data_center=None
+        ).exists())
+        # results per data center are stored only for reports with data
+        # centers
+        self.assertFalse(ReportResult.objects.filter(
+            slug='category_model_report', data_center=dc
+        ).exists())
+        self.assertTrue(ReportResult.objects.filter(
+            slug='status_model_report', mode='dc', data_center=dc
+        ).exists())
+        self.assertFalse(ReportResult.objects.filter(
+            slug='asset-relations'
+        ).exists())
+        self.assertEqual(
+            ReportResult.objects.filter(slug='status_model_report').count(),
+            len(StatusModelReport().get_result_keys())
+        )
+
+    def test_refresh_reports_command_keeps_single_result_for_all(self):
+        call_command('refresh_reports', 'category_model_report')
+        call_command('refresh_reports', 'category_model_report')
+        self.assertEqual(ReportResult.objects.filter(
+            slug='category_model_report', mode='all', data_center=None
+        ).count(), 1)
+
+    def test_result_for_all_data_centers_is_unique(self):
+        ReportResult.objects.create(slug='report', mode='all', result='{}')
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            ReportResult.objects.create(
+                slug='report', mode='all', result='{}'
+            )
+
+    def test_refresh_reports_command_unknown_report(self):
+        with self.assertRaises(CommandError):
+            call_command('refresh_reports', 'asset-relations')
+
+    def test_stale_result(self):
+        self.client.get(self.url)
+        ReportResult.objects.update(
+            modified=datetime.now() - timedelta(hours=2)
+        )
+        with self.settings(REPORTS_RESULT_MAX_AGE=3600):
+            response = self.client.get(self.url)
+        self.assertTrue(response.context['report_result'].is_stale)
+        self.assertContains(response, 'outdated')
+
+
 class TestReportAssetAndLicence(RalphTestCase):
     def setUp(self):
         self.model = DataCenterAssetModelFactory(
@@ -236,6 +422,51 @@ class TestReportAssetAndLicence(RalphTestCase):
 
         self.assertEqual(report_result, result)
 
+    def test_iterate_values_in_chunks(self):
+        DataCenterAssetFactory.create_batch(4, model=self.model)
+        chunks = list(iterate_values_in_chunks(
+            DataCenterAsset.objects.all(), ['niw'], chunk_size=2
+        ))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2, 1])
+        ids = [values[0] for chunk in chunks for values in chunk]
+        self.assertEqual(ids, sorted(ids))
+        # NullableCharField is converted like on model instance
+        self.assertEqual(chunks[0][0][1], '')
+
+    def test_licence_relation_in_chunks(self):
+        licence = LicenceFactory(
+            number_bought=2,
+            software__asset_type=ObjectModelType.data_center
+        )
+        BaseObjectLicence.objects.create(
+            licence=licence, base_object=self.dc_1.baseobject_ptr
+        )
+        with mock.patch(
+            'ralph.reports.views.iterate_values_in_chunks',
+            functools.partial(iterate_values_in_chunks, chunk_size=1)
+        ):
+            # 2 queries for related objects per chunk and final (empty)
+            # chunk of licences
+            with self.assertNumQueries(7):
+                report_result = list(
+                    LicenceRelationsReport().prepare(DataCenterAsset)
+                )
+        # headers + (licence + asset) rows per each licence
+        self.assertEqual(len(report_result), 5)
+        self.assertEqual(
+            [row[6] for row in report_result[1:]],
+            ['', str(self.dc_1.id)] * 2
+        )
+
+    def test_csv_response_is_streamed(self):
+        response = AssetRelationsReport().get_response(
+            None, iter([['a', 'b'], ['1', '2']])
+        )
+        self.assertIsInstance(response, StreamingHttpResponse)
+        self.assertEqual(
+            b''.join(response.streaming_content), b'a,b\r\n1,2\r\n'
+        )
+
 
 class TestReportLanguage(RalphTestCase):
 
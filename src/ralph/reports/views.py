@@ -1,13 +1,15 @@
 # -*- coding: utf-8 -*-
+import csv
+import json
 import logging
+from collections import defaultdict, OrderedDict
 
-import tablib
-from django.db.models import Count, Prefetch
-from django.http import HttpResponse
+from django.db.models import Count, SubfieldBase
+from django.http import Http404, StreamingHttpResponse
 from django.utils.encoding import smart_str
 from django.utils.translation import ugettext_lazy as _
 
-from ralph.admin.helpers import getattr_dunder
+from ralph.admin.helpers import get_field_by_relation_path
 from ralph.admin.mixins import RalphTemplateView
 from ralph.assets.models.assets import Asset, AssetModel
 from ralph.assets.models.choices import ObjectModelType
@@ -16,6 +18,7 @@ from ralph.data_center.models.physical import DataCenter, DataCenterAsset
 from ralph.licences.models import BaseObjectLicence, Licence, LicenceUser
 from ralph.operations.models import Failure, OperationType
 from ralph.reports.base import ReportContainer
+from ralph.reports.models import ReportResult
 
 logger = logging.getLogger(__name__)
 
@@ -31,6 +34,63 @@ def get_choice_name(choices_class, key, default='------'):
         return 'Does not exist for key {}'.format(key)
 
 
+def get_values_converter(model, fields):
+    """
+    Return function converting values fetched by `values_list` for `fields`
+    the same way as they are converted when set on model instance (`values`
+    and `values_list` omit `to_python` of fields using `SubfieldBase`, ex.
+    NullableCharField).
+    """
+    converters = []
+    for field_path in fields:
+        field = get_field_by_relation_path(model, field_path)
+        converters.append(
+            field.to_python if isinstance(type(field), SubfieldBase) else None
+        )
+
+    def convert(values):
+        return tuple(
+            converter(value) if converter else value
+            for converter, value in zip(converters, values)
+        )
+    return convert
+
+
+def iterate_values_in_chunks(queryset, fields, chunk_size=1000):
+    """
+    Iterate over values of `fields` of queryset objects in chunks (lists of
+    tuples, with primary key as a first value).
+
+    Chunks are fetched using keyset pagination (by primary key), so only
+    single chunk is kept in memory at once.
+    """
+    convert = get_values_converter(queryset.model, fields)
+    queryset = queryset.order_by('pk').values_list('pk', *fields)
+    last_pk = None
+    while True:
+        chunk_queryset = queryset
+        if last_pk is not None:
+            chunk_queryset = queryset.filter(pk__gt=last_pk)
+        chunk = [
+            (values[0],) + convert(values[1:])
+            for values in chunk_queryset[:chunk_size]
+        ]
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            break
+        last_pk = chunk[-1][0]
+
+
+class Echo(object):
+    """
+    File-like object which returns written value instead of storing it
+    (used to write CSV rows one by one).
+    """
+    def write(self, value):
+        return value
+
+
 class CSVReportMixin(object):
     """CSV report mixin.
 
@@ -40,16 +100,19 @@ class CSVReportMixin(object):
     def get_response(self, request, result):
         """Get django response method.
 
+        CSV is streamed - rows are written one by one, as they are
+        generated.
+
         Args:
             request: Django request object
-            result: data list
+            result: iterable of rows (first row contains headers)
 
         Returns:
             Django response object
         """
-        data = tablib.Dataset(*result[1:], headers=result[0])
-        response = HttpResponse(
-            data.csv,
+        writer = csv.writer(Echo())
+        response = StreamingHttpResponse(
+            (writer.writerow(row) for row in result),
             content_type='text/csv;charset=utf-8'
         )
         response['Content-Disposition'] = 'attachment;filename={}'.format(
@@ -66,6 +129,9 @@ class ReportDetail(RalphTemplateView):
     with_datacenters = False
     with_counter = True
     links = False
+    # results of report are precomputed (by `refresh_reports` command) and
+    # stored, so views don't have to query assets
+    precomputed = True
     modes = [
         {
             'name': 'all',
@@ -87,11 +153,17 @@ class ReportDetail(RalphTemplateView):
     def __init__(self):
         self.report = ReportContainer()
 
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # used to find reports, which results should be refreshed
+        view.report_class = cls
+        return view
+
     def execute(self, model, dc=None):
         self.dc = dc
         self.prepare(model, dc=dc)
-        for item in self.report.leaves:
-            item.update_count()
+        self.report.update_counts()
         return self.report.roots
 
     def prepare(self, model, dc):
@@ -131,7 +203,62 @@ class ReportDetail(RalphTemplateView):
         return [self.template_name]
 
     def get_result(self, request, model, *args, **kwargs):
-        return list(self.prepare(model, *args, **kwargs))
+        return self.prepare(model, *args, **kwargs)
+
+    def get_result_data_center(self, mode, dc):
+        """
+        Return data center for which result of report is stored (results are
+        stored per data center only for data center mode of reports with
+        data centers).
+        """
+        return dc if self.with_datacenters and mode == 'dc' else None
+
+    def get_result_keys(self):
+        """
+        Return list of (mode, data center) for which results of report are
+        stored.
+        """
+        keys = []
+        for mode in self.modes:
+            keys.append((mode['name'], None))
+            if self.get_result_data_center(mode['name'], True):
+                keys.extend(
+                    (mode['name'], dc) for dc in DataCenter.objects.all()
+                )
+        return keys
+
+    def refresh_result(self, mode, dc=None):
+        """
+        Execute report and store its (serialized) result.
+        """
+        model = self.get_model(mode)
+        if model is None:
+            raise Http404
+        self.report = ReportContainer()
+        self.execute(model, dc)
+        report_result, _ = ReportResult.objects.update_or_create(
+            slug=self.slug, mode=mode,
+            data_center_key=ReportResult.get_data_center_key(dc),
+            defaults={
+                'data_center': dc,
+                'result': json.dumps(self.report.to_dict()),
+            },
+        )
+        return report_result
+
+    def get_stored_result(self, mode, dc=None):
+        """
+        Return stored result of report (report is executed, if its result is
+        not stored yet).
+        """
+        dc = self.get_result_data_center(mode, dc)
+        try:
+            return ReportResult.objects.get(
+                slug=self.slug, mode=mode,
+                data_center_key=ReportResult.get_data_center_key(dc),
+            )
+        except ReportResult.DoesNotExist:
+            return self.refresh_result(mode, dc)
 
     def dispatch(self, request, *args, **kwargs):
         try:
@@ -146,23 +273,23 @@ class ReportDetail(RalphTemplateView):
 
     def get_context_data(self, **kwargs):
         context_data = super().get_context_data(**kwargs)
+        dc = self.dc
+        report_result = None
+        if self.precomputed:
+            report_result = self.get_stored_result(self.asset_type, dc)
+            result = ReportContainer.from_dict(report_result.data).roots
+        else:
+            result = self.execute(self.get_model(self.asset_type), dc)
         context_data.update({
             'report': self,
             'subsection': self.name,
-            'result': self.execute(
-                self.get_model(self.asset_type),
-                self.dc,
-            ),
-            'cache_key': (
-                self.asset_type +
-                (str(self.dc.id) if self.dc else 'all') +
-                self.slug
-            ),
+            'result': result,
+            'report_result': report_result,
             'modes': self.modes,
             'mode': self.asset_type,
             'datacenters': self.datacenters,
             'slug': self.slug,
-            'dc': self.dc.id if self.dc else 'all',
+            'dc': dc.id if dc else 'all',
         })
         return context_data
 
@@ -309,6 +436,7 @@ class BaseRelationsReport(
     template_name = 'reports/report_relations.html'
     with_modes = True
     links = False
+    precomputed = False
 
 
 class AssetRelationsReport(BaseRelationsReport):
@@ -320,10 +448,6 @@ class AssetRelationsReport(BaseRelationsReport):
         'model__manufacturer__name', 'status', 'service_env__service__name',
         'invoice_date', 'invoice_no', 'hostname'
     ]
-    dc_select_related = [
-        'model', 'model__category', 'service_env', 'service_env__service',
-        'model__manufacturer'
-    ]
     bo_headers = [
         'id', 'niw', 'barcode', 'sn', 'model__category__name',
         'model__manufacturer__name', 'model__name', 'user__username',
@@ -333,23 +457,50 @@ class AssetRelationsReport(BaseRelationsReport):
         'property_of', 'warehouse__name', 'invoice_date', 'invoice_no',
         'region__name', 'hostname', 'depreciation_rate', 'buyout_date'
     ]
-    bo_select_related = [
-        'model', 'model__category', 'office_infrastructure', 'warehouse',
-        'user', 'owner', 'model__manufacturer', 'region'
-    ]
+    # fields fetched from database for headers (if different than header)
+    fields = {
+        'property_of': 'property_of__name',
+    }
+    # headers calculated by model (properties) with fields required to
+    # calculate them
+    calculated_fields = {
+        'buyout_date': [
+            'depreciation_end_date', 'invoice_date', 'depreciation_rate'
+        ],
+    }
+
+    def _get_fields(self, headers):
+        fields = []
+        for column in headers:
+            fields.extend(
+                self.calculated_fields.get(column) or
+                [self.fields.get(column, column)]
+            )
+        return list(OrderedDict.fromkeys(fields))
+
+    def _get_value(self, model, column, values):
+        if column in self.calculated_fields:
+            instance = model(**{
+                field: values[field]
+                for field in self.calculated_fields[column]
+            })
+            return getattr(instance, column)
+        return values[self.fields.get(column, column)]
 
     def prepare(self, model, *args, **kwargs):
-        queryset = model.objects.all()
         headers = self.bo_headers
-        select_related = self.bo_select_related
         if model._meta.object_name == 'DataCenterAsset':
             headers = self.dc_headers
-            select_related = self.dc_select_related
 
         yield headers
-        for asset in queryset.select_related(*select_related):
-            row = [str(getattr_dunder(asset, column)) for column in headers]
-            yield row
+        fields = self._get_fields(headers)
+        for chunk in iterate_values_in_chunks(model.objects.all(), fields):
+            for values in chunk:
+                values = dict(zip(fields, values[1:]))
+                yield [
+                    str(self._get_value(model, column, values))
+                    for column in headers
+                ]
 
 
 class LicenceRelationsReport(BaseRelationsReport):
@@ -374,30 +525,40 @@ class LicenceRelationsReport(BaseRelationsReport):
     licences_users_headers = [
         'user__username', 'user__first_name', 'user__last_name'
     ]
+    # fields fetched from database for licences headers (if different than
+    # header)
+    licences_fields = {
+        'software': 'software__name',
+    }
+
+    def _get_related_values(self, queryset, licence_ids, fields):
+        """
+        Return dict with licence id as a key and list of values of `fields`
+        of related objects as a value.
+        """
+        result = defaultdict(list)
+        convert = get_values_converter(queryset.model, fields)
+        for values in queryset.filter(
+            licence_id__in=licence_ids
+        ).order_by('pk').values_list('licence_id', *fields):
+            values = (values[0],) + convert(values[1:])
+            result[values[0]].append(
+                [smart_str(value) for value in values[1:]]
+            )
+        return result
 
     def prepare(self, model, *args, **kwargs):
         queryset = Licence.objects.all()
-        asset_related = [None]
         if model._meta.object_name == 'BackOfficeAsset':
             queryset = queryset.filter(
                 software__asset_type__in=(
                     ObjectModelType.back_office, ObjectModelType.all
                 )
             )
-            asset_related = [
-                'base_object__asset', 'base_object__asset__backofficeasset',
-                'base_object__asset__backofficeasset__user',
-                'base_object__asset__backofficeasset__owner',
-                'base_object__asset__backofficeasset__region'
-            ]
         if model._meta.object_name == 'DataCenterAsset':
             queryset = queryset.filter(
                 software__asset_type=ObjectModelType.data_center
             )
-            asset_related = [
-                'base_object__asset',
-                'base_object__asset__backofficeasset'
-            ]
 
         fill_empty_assets = [''] * len(self.licences_asset_headers)
         fill_empty_licences = [''] * len(self.licences_users_headers)
@@ -406,54 +567,43 @@ class LicenceRelationsReport(BaseRelationsReport):
             self.licences_users_headers + ['single_cost']
         yield headers
 
-        queryset = queryset.select_related(
-            'software'
-        ).prefetch_related(
-            Prefetch(
-                'licenceuser_set',
-                queryset=LicenceUser.objects.select_related('user')
-            ),
-            Prefetch(
-                'baseobjectlicence_set',
-                queryset=BaseObjectLicence.objects.select_related(
-                    *asset_related
-                )
+        licences_fields = [
+            self.licences_fields.get(column, column)
+            for column in self.licences_headers
+        ]
+        asset_fields = [
+            'base_object__{}'.format(column)
+            for column in self.licences_asset_headers
+        ]
+        for chunk in iterate_values_in_chunks(queryset, licences_fields):
+            licence_ids = [values[0] for values in chunk]
+            assets = self._get_related_values(
+                BaseObjectLicence.objects, licence_ids, asset_fields
             )
-        )
-
-        for licence in queryset:
-            row = [
-                smart_str(getattr_dunder(licence, column))
-                for column in self.licences_headers
-            ]
-            base_row = row
-
-            row = row + fill_empty_assets + fill_empty_licences + ['']
-            yield row
-            if licence.number_bought > 0 and licence.price:
-                single_licence_cost = str(
-                    licence.price / licence.number_bought
-                )
-            else:
-                single_licence_cost = ''
-
-            for asset in licence.baseobjectlicence_set.all():
-                row = [
-                    smart_str(
-                        getattr_dunder(asset.base_object, column),
-                    ) for column in self.licences_asset_headers
-                ]
-                yield base_row + row + fill_empty_licences + [
-                    single_licence_cost
-                ]
-            for user in licence.licenceuser_set.all():
-                row = [
-                    smart_str(getattr_dunder(user, column))
-                    for column in self.licences_users_headers
-                ]
-                yield base_row + fill_empty_assets + row + [
-                    single_licence_cost
-                ]
+            users = self._get_related_values(
+                LicenceUser.objects, licence_ids, self.licences_users_headers
+            )
+            for values in chunk:
+                licence_id, values = values[0], values[1:]
+                licence = dict(zip(self.licences_headers, values))
+                base_row = [smart_str(value) for value in values]
+
+                yield base_row + fill_empty_assets + fill_empty_licences + ['']
+                if licence['number_bought'] > 0 and licence['price']:
+                    single_licence_cost = str(
+                        licence['price'] / licence['number_bought']
+                    )
+                else:
+                    single_licence_cost = ''
+
+                for row in assets[licence_id]:
+                    yield base_row + row + fill_empty_licences + [
+                        single_licence_cost
+                    ]
+                for row in users[licence_id]:
+                    yield base_row + fill_empty_assets + row + [
+                        single_licence_cost
+                    ]
 
 
 class FailureReport(ReportWithoutAllModeDetail, ReportDetail):
@@ -465,9 +615,9 @@ class FailureReport(ReportWithoutAllModeDetail, ReportDetail):
         queryset = model._default_manager
         if dc:
             queryset = queryset.filter(rack__server_room__data_center=dc)
-        operation_types = OperationType.objects.get(
-            pk=OperationType.choices.failure
-        ).get_descendants(include_self=True)
+        operation_types = OperationType.get_descendants_ids(
+            OperationType.choices.failure
+        )
         failures = Failure.base_objects.through.objects.filter(
             baseobject__in=queryset.all(),
             operation__type__in=operation_types
@@ -1,12 +1,16 @@
 # -*- coding: utf-8 -*-
 from collections import OrderedDict
 
-from rest_framework import serializers
+from rest_framework import serializers, status
+from rest_framework.decorators import list_route
+from rest_framework.exceptions import PermissionDenied
+from rest_framework.response import Response
 
 from ralph.api import RalphAPISerializer, RalphAPIViewSet, router
-from ralph.api.serializers import RalphAPISaveSerializer
+from ralph.api.serializers import RalphAPISaveSerializer, ReversedChoiceField
 from ralph.data_center.models import DataCenterAsset, IPAddress
-from ralph.security.models import SecurityScan, Vulnerability
+from ralph.security.bulk import ingest_scans
+from ralph.security.models import Risk, ScanStatus, SecurityScan, Vulnerability
 
 
 class VulnerabilitySerializer(RalphAPISerializer):
@@ -85,11 +89,81 @@ class SaveSecurityScanSerializer(RalphAPISaveSerializer):
         return result
 
 
+class BulkVulnerabilitySerializer(serializers.Serializer):
+    external_vulnerability_id = serializers.IntegerField()
+    name = serializers.CharField(max_length=1024)
+    patch_deadline = serializers.DateTimeField(required=False, allow_null=True)
+    risk = ReversedChoiceField(Risk(), required=False, allow_null=True)
+
+
+class BulkSecurityScanSerializer(serializers.Serializer):
+    """
+    Single scan of bulk ingestion. Host of scan is identified by
+    `base_object` (id), `host_ip` or `hostname`.
+    """
+    base_object = serializers.IntegerField(required=False)
+    host_ip = serializers.IPAddressField(required=False)
+    hostname = serializers.CharField(required=False)
+    last_scan_date = serializers.DateTimeField()
+    scan_status = ReversedChoiceField(ScanStatus())
+    next_scan_date = serializers.DateTimeField()
+    details_url = serializers.URLField(
+        max_length=255, required=False, allow_blank=True
+    )
+    rescan_url = serializers.URLField(required=False, allow_blank=True)
+    vulnerabilities = BulkVulnerabilitySerializer(many=True, required=False)
+    external_vulnerabilities = serializers.ListField(
+        child=serializers.IntegerField(), required=False
+    )
+
+
 class SecurityScanViewSet(RalphAPIViewSet):
     queryset = SecurityScan.objects.all()
     serializer_class = SecurityScanSerializer
     save_serializer_class = SaveSecurityScanSerializer
 
+    @list_route(methods=['post'])
+    def bulk(self, request):
+        """
+        Create scans (list of scans in request) in bulk. Vulnerabilities of
+        scans are created or updated by `external_vulnerability_id`.
+
+        Returns result (`id` of created scan or `errors`) for every scan.
+        """
+        if not isinstance(request.data, list):
+            return Response(
+                {'detail': 'Expected a list of scans.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if any(
+            isinstance(item, dict) and item.get('vulnerabilities')
+            for item in request.data
+        ) and not request.user.has_perms([
+            'security.add_vulnerability', 'security.change_vulnerability'
+        ]):
+            raise PermissionDenied()
+        # single serializer is used to validate every item
+        serializer = BulkSecurityScanSerializer()
+        items = []
+        validation_errors = []
+        for item in request.data:
+            try:
+                items.append(serializer.run_validation(item))
+            except serializers.ValidationError as e:
+                validation_errors.append(e.detail)
+            else:
+                validation_errors.append(None)
+        saved = iter(ingest_scans(items))
+        results = []
+        for errors in validation_errors:
+            if errors is None:
+                scan_id, errors = next(saved)
+            if errors is None:
+                results.append({'status': 'created', 'id': scan_id})
+            else:
+                results.append({'status': 'error', 'errors': errors})
+        return Response(results, status=status.HTTP_200_OK)
+
 
 router.register(r'vulnerabilities', VulnerabilityViewSet)
 router.register(r'security-scans', SecurityScanViewSet)
@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+Bulk ingestion of security scans (ex. from nightly sweep of scanner).
+
+Whole batch is saved with constant number of queries (per chunk of items):
+base objects of scans are resolved (by id, hostname or IP) at once,
+vulnerabilities are upserted by `external_vulnerability_id` and scans
+(with their vulnerabilities) are inserted using `bulk_create`.
+"""
+from collections import defaultdict
+from datetime import datetime
+
+from django.db import IntegrityError, transaction
+from django.db.models import Case, F, Max, Value, When
+
+from ralph.assets.models.assets import Asset
+from ralph.assets.models.base import BaseObject
+from ralph.data_center.models import DataCenterAsset, IPAddress
+from ralph.security.models import SecurityScan, Vulnerability
+
+CHUNK_SIZE = 500
+# number of attempts of upserting vulnerabilities (when another batch inserts
+# the same vulnerabilities concurrently)
+UPSERT_ATTEMPTS = 3
+SCAN_FIELDS = (
+    'last_scan_date', 'scan_status', 'next_scan_date', 'details_url',
+    'rescan_url',
+)
+VULNERABILITY_FIELDS = ('name', 'patch_deadline', 'risk')
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for index in range(0, len(items), size):
+        yield items[index:index + size]
+
+
+def _get_mapping(queryset, key_field, value_field, keys):
+    """
+    Return dict with key as a key and set of (not null) values as a value.
+    """
+    mapping = defaultdict(set)
+    for chunk in _chunks(keys):
+        for key, value in queryset.filter(
+            **{'{}__in'.format(key_field): chunk}
+        ).values_list(key_field, value_field):
+            if value is not None:
+                mapping[key].add(value)
+    return mapping
+
+
+def _get_base_object(values, field, not_found_msg):
+    if not values:
+        return None, {field: [not_found_msg]}
+    if len(values) > 1:
+        return None, {field: ['Assigned to more than one host']}
+    return next(iter(values)), None
+
+
+def resolve_base_objects(items):
+    """
+    Resolve base objects of scans by `base_object` (id), `host_ip` or
+    `hostname` (first one passed in item is used).
+
+    IP is looked up in IP addresses first, then in management IPs of data
+    center assets. Hostname is looked up in assets first, then in IP
+    addresses.
+
+    Returns:
+        list of `(base_object_id, errors)` tuples (one for every item)
+    """
+    ids = {item['base_object'] for item in items if item.get('base_object')}
+    ips = {item['host_ip'] for item in items if item.get('host_ip')}
+    hostnames = {
+        item['hostname'] for item in items if item.get('hostname')
+    }
+    existing_ids = set()
+    for chunk in _chunks(ids):
+        existing_ids.update(
+            BaseObject.objects.filter(pk__in=chunk).values_list(
+                'pk', flat=True
+            )
+        )
+    # TODO: management_ip is temporary solution until it will be stored
+    # properly in ipaddresses assigned to object
+    by_ip = _get_mapping(IPAddress.objects, 'address', 'base_object_id', ips)
+    by_ip.update(_get_mapping(
+        DataCenterAsset.objects, 'management_ip', 'baseobject_ptr_id',
+        ips - set(by_ip),
+    ))
+    by_hostname = _get_mapping(
+        Asset.objects, 'hostname', 'baseobject_ptr_id', hostnames
+    )
+    by_hostname.update(_get_mapping(
+        IPAddress.objects, 'hostname', 'base_object_id',
+        hostnames - set(by_hostname),
+    ))
+    results = []
+    for item in items:
+        if item.get('base_object'):
+            base_object_id = item['base_object']
+            if base_object_id in existing_ids:
+                results.append((base_object_id, None))
+            else:
+                results.append(
+                    (None, {'base_object': ['Base object does not exist']})
+                )
+        elif item.get('host_ip'):
+            results.append(_get_base_object(
+                by_ip.get(item['host_ip']), 'host_ip',
+                'IP is not assigned to any host',
+            ))
+        elif item.get('hostname'):
+            results.append(_get_base_object(
+                by_hostname.get(item['hostname']), 'hostname',
+                'Hostname is not assigned to any host',
+            ))
+        else:
+            results.append((None, {
+                'base_object': ['Base object, hostname or host IP is required']
+            }))
+    return results
+
+
+def upsert_vulnerabilities(vulnerabilities, external_ids=()):
+    """
+    Create or update vulnerabilities by `external_vulnerability_id`.
+
+    When vulnerabilities are inserted by another batch in the meantime
+    (violating uniqueness of external id), upsert is retried - lookup of
+    retry uses locking read, which sees rows committed by other batches.
+
+    Args:
+        vulnerabilities: dict with external id as a key and dict of
+            vulnerability fields as a value
+        external_ids: external ids of (already existing) vulnerabilities,
+            which are only referenced
+
+    Returns:
+        dict with external id as a key and id of vulnerability as a value
+        (unknown external ids are skipped)
+    """
+    for attempt in range(1, UPSERT_ATTEMPTS + 1):
+        try:
+            with transaction.atomic():
+                return _upsert_vulnerabilities(
+                    vulnerabilities, external_ids, lock=attempt > 1
+                )
+        except IntegrityError:
+            if attempt == UPSERT_ATTEMPTS:
+                raise
+
+
+def _upsert_vulnerabilities(vulnerabilities, external_ids, lock):
+    queryset = Vulnerability.objects.all()
+    if lock:
+        queryset = queryset.select_for_update()
+    ids = {}
+    changed = {}
+    for chunk in _chunks(set(vulnerabilities) | set(external_ids)):
+        for row in queryset.filter(
+            external_vulnerability_id__in=chunk
+        ).values('pk', 'external_vulnerability_id', *VULNERABILITY_FIELDS):
+            external_id = row['external_vulnerability_id']
+            ids[external_id] = row['pk']
+            data = vulnerabilities.get(external_id, {})
+            if any(
+                field in data and data[field] != row[field]
+                for field in VULNERABILITY_FIELDS
+            ):
+                changed[row['pk']] = data
+    # every changed field is updated with single query per chunk
+    for chunk in _chunks(changed):
+        updates = {}
+        for field in VULNERABILITY_FIELDS:
+            whens = [
+                When(pk=pk, then=Value(changed[pk][field]))
+                for pk in chunk if field in changed[pk]
+            ]
+            if whens:
+                updates[field] = Case(
+                    *whens, default=F(field),
+                    output_field=Vulnerability._meta.get_field(field)
+                )
+        Vulnerability.objects.filter(pk__in=chunk).update(
+            modified=datetime.now(), **updates
+        )
+    new = [
+        Vulnerability(external_vulnerability_id=external_id, **data)
+        for external_id, data in vulnerabilities.items()
+        if external_id not in ids
+    ]
+    Vulnerability.objects.bulk_create(new, batch_size=CHUNK_SIZE)
+    # ids of inserted rows are not returned by `bulk_create`
+    for chunk in _chunks(v.external_vulnerability_id for v in new):
+        ids.update(Vulnerability.objects.filter(
+            external_vulnerability_id__in=chunk
+        ).values_list('external_vulnerability_id', 'pk'))
+    return ids
+
+
+def create_scans(scans):
+    """
+    Insert scans and their vulnerabilities (using `bulk_create`). Base
+    objects of scans are locked, so it has to be called in transaction.
+
+    Args:
+        scans: list of dicts with scan fields, `base_object_id` and
+            `vulnerabilities` (set of ids); base object has to be unique
+            within scans
+
+    Returns:
+        list of ids of created scans
+    """
+    # scans of the same base objects could be created concurrently only
+    # after this transaction is finished, so created scans (with id greater
+    # than the last one) are distinguishable by base object
+    for chunk in _chunks(sorted(scan['base_object_id'] for scan in scans)):
+        list(BaseObject.objects.select_for_update().filter(
+            pk__in=chunk
+        ).order_by('pk').values_list('pk', flat=True))
+    last_id = SecurityScan.objects.aggregate(
+        last_id=Max('pk')
+    )['last_id'] or 0
+    SecurityScan.objects.bulk_create([
+        SecurityScan(
+            base_object_id=scan['base_object_id'],
+            **{field: scan[field] for field in SCAN_FIELDS if field in scan}
+        )
+        for scan in scans
+    ], batch_size=CHUNK_SIZE)
+    # ids of inserted rows are not returned by `bulk_create` - base object
+    # (unique within scans) identifies created scan
+    created = {}
+    for chunk in _chunks(scan['base_object_id'] for scan in scans):
+        created.update(SecurityScan.objects.filter(
+            pk__gt=last_id, base_object_id__in=chunk,
+        ).order_by('pk').values_list('base_object_id', 'pk'))
+    through = SecurityScan.vulnerabilities.through
+    through.objects.bulk_create([
+        through(
+            securityscan_id=created[scan['base_object_id']],
+            vulnerability_id=vulnerability_id,
+        )
+        for scan in scans
+        for vulnerability_id in scan['vulnerabilities']
+    ], batch_size=CHUNK_SIZE)
+    return [created[scan['base_object_id']] for scan in scans]
+
+
+def _get_vulnerabilities(items):
+    """
+    Return vulnerabilities defined in items (the last definition of external
+    id wins) and external ids referenced by items.
+    """
+    vulnerabilities = {}
+    external_ids = set()
+    for item in items:
+        for vulnerability in item.get('vulnerabilities', []):
+            data = dict(vulnerability)
+            vulnerabilities[data.pop('external_vulnerability_id')] = data
+        external_ids.update(item.get('external_vulnerabilities', []))
+    return vulnerabilities, external_ids
+
+
+@transaction.atomic
+def ingest_scans(items):
+    """
+    Save (validated) scans in bulk.
+
+    Every item is a dict with scan fields, one of `base_object` (id),
+    `host_ip` or `hostname` and vulnerabilities of scan - `vulnerabilities`
+    (list of dicts with `external_vulnerability_id` and vulnerability fields,
+    which are created or updated) and/or `external_vulnerabilities` (list of
+    external ids of existing vulnerabilities).
+
+    Returns:
+        list of `(scan_id, errors)` tuples (one for every item); scans of
+        items with errors are not saved
+    """
+    errors = []
+    base_object_ids = set()
+    for base_object_id, item_errors in resolve_base_objects(items):
+        if item_errors is None and base_object_id in base_object_ids:
+            item_errors = {'base_object': ['Host is duplicated in batch']}
+        base_object_ids.add(base_object_id)
+        errors.append((base_object_id, item_errors))
+    # vulnerabilities of items with unknown host are not saved
+    vulnerability_ids = upsert_vulnerabilities(*_get_vulnerabilities(
+        item for item, (_, item_errors) in zip(items, errors)
+        if item_errors is None
+    ))
+    scans = []
+    for index, (item, (base_object_id, item_errors)) in enumerate(
+        zip(items, errors)
+    ):
+        if item_errors is not None:
+            continue
+        unknown = set(item.get('external_vulnerabilities', [])) - set(
+            vulnerability_ids
+        )
+        if unknown:
+            errors[index] = (None, {'external_vulnerabilities': [
+                'Unknown external vulnerabilities: {}'.format(
+                    ', '.join(map(str, sorted(unknown)))
+                )
+            ]})
+            continue
+        external_ids = set(item.get('external_vulnerabilities', [])) | {
+            vulnerability['external_vulnerability_id']
+            for vulnerability in item.get('vulnerabilities', [])
+        }
+        scan = {field: item[field] for field in SCAN_FIELDS if field in item}
+        scan['base_object_id'] = base_object_id
+        scan['vulnerabilities'] = {
+            vulnerability_ids[external_id] for external_id in external_ids
+        }
+        scans.append(scan)
+    scan_ids = iter(create_scans(scans))
+    return [
+        (None, item_errors) if item_errors else (next(scan_ids), None)
+        for _, item_errors in errors
+    ]
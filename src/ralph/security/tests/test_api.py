@@ -5,7 +5,10 @@ from django.core.urlresolvers import reverse
 from rest_framework import status
 
 from ralph.api.tests._base import RalphAPITestCase
-from ralph.data_center.tests.factories import IPAddressFactory
+from ralph.data_center.tests.factories import (
+    DataCenterAssetFactory,
+    IPAddressFactory
+)
 from ralph.security.models import Risk, ScanStatus, SecurityScan, Vulnerability
 from ralph.security.tests.factories import (
     SecurityScanFactory,
@@ -122,6 +125,145 @@ class SecurityScanAPITests(RalphAPITestCase):
         )
 
 
+class SecurityScanBulkAPITests(RalphAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.url = reverse('securityscan-bulk')
+        self.ip = IPAddressFactory(address='10.20.30.40')
+        self.dc_asset = DataCenterAssetFactory(
+            hostname='bulk-scan.mydc.net', management_ip='10.20.30.41'
+        )
+        self.dc_asset_2 = DataCenterAssetFactory(
+            hostname='bulk-scan-2.mydc.net'
+        )
+        self.vulnerability = VulnerabilityFactory(
+            name='old name', external_vulnerability_id=9000
+        )
+
+    def _get_scan(self, **kwargs):
+        data = {
+            'last_scan_date': '2015-01-01T00:00:00',
+            'scan_status': ScanStatus.fail.name,
+            'next_scan_date': '2016-01-01T00:00:00',
+            'details_url': 'https://example.com/scan-deatils',
+        }
+        data.update(kwargs)
+        return data
+
+    def test_bulk_create_security_scans(self):
+        data = [
+            self._get_scan(
+                host_ip=self.ip.address,
+                vulnerabilities=[
+                    {
+                        'external_vulnerability_id': 9000,
+                        'name': 'new name',
+                        'risk': Risk.high.name,
+                    },
+                    {'external_vulnerability_id': 9001, 'name': 'vuln 9001'},
+                ]
+            ),
+            self._get_scan(
+                host_ip=self.dc_asset.management_ip,
+                external_vulnerabilities=[9000],
+            ),
+            self._get_scan(
+                hostname=self.dc_asset_2.hostname,
+                scan_status=ScanStatus.ok.name,
+            ),
+            # the same host as in second scan
+            self._get_scan(base_object=self.dc_asset.id),
+        ]
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [result['status'] for result in response.data],
+            ['created', 'created', 'created', 'error'],
+        )
+        self.assertIn('base_object', response.data[3]['errors'])
+
+        scan = SecurityScan.objects.get(pk=response.data[0]['id'])
+        self.assertEqual(scan.base_object_id, self.ip.base_object_id)
+        self.assertEqual(scan.scan_status, ScanStatus.fail)
+        self.assertCountEqual(
+            scan.vulnerabilities.values_list(
+                'external_vulnerability_id', flat=True
+            ),
+            [9000, 9001]
+        )
+        scan = SecurityScan.objects.get(pk=response.data[1]['id'])
+        self.assertEqual(scan.base_object_id, self.dc_asset.id)
+        self.assertEqual(scan.vulnerabilities.get(), self.vulnerability)
+        scan = SecurityScan.objects.get(pk=response.data[2]['id'])
+        self.assertEqual(scan.base_object_id, self.dc_asset_2.id)
+        self.assertEqual(scan.scan_status, ScanStatus.ok)
+        self.assertEqual(scan.vulnerabilities.count(), 0)
+
+        self.vulnerability.refresh_from_db()
+        self.assertEqual(self.vulnerability.name, 'new name')
+        self.assertEqual(self.vulnerability.risk, Risk.high)
+        self.assertEqual(
+            Vulnerability.objects.get(external_vulnerability_id=9001).name,
+            'vuln 9001'
+        )
+
+    def test_bulk_create_security_scans_errors(self):
+        data = [
+            self._get_scan(host_ip='10.20.30.99'),
+            self._get_scan(hostname='unknown.mydc.net'),
+            self._get_scan(
+                host_ip=self.ip.address, external_vulnerabilities=[1234]
+            ),
+            self._get_scan(host_ip=self.ip.address, scan_status='invalid'),
+            self._get_scan(),
+        ]
+        scans_count = SecurityScan.objects.count()
+        response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [list(result['errors']) for result in response.data],
+            [
+                ['host_ip'], ['hostname'], ['external_vulnerabilities'],
+                ['scan_status'], ['base_object']
+            ]
+        )
+        self.assertEqual(SecurityScan.objects.count(), scans_count)
+
+    def test_bulk_create_security_scans_queries_count(self):
+        ips = [
+            IPAddressFactory(address='10.20.40.{}'.format(i))
+            for i in range(20)
+        ]
+        data = [
+            self._get_scan(
+                host_ip=ip.address,
+                vulnerabilities=[
+                    {'external_vulnerability_id': 9000, 'name': 'new name'},
+                    {'external_vulnerability_id': i, 'name': 'vuln'},
+                ]
+            )
+            for i, ip in enumerate(ips, start=100)
+        ]
+        # 2 queries of savepoint of vulnerabilities upsert and 1 query
+        # locking base objects
+        with self.assertNumQueries(16):
+            response = self.client.post(self.url, data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            SecurityScan.vulnerabilities.through.objects.filter(
+                securityscan_id__in=[result['id'] for result in response.data]
+            ).count(),
+            40
+        )
+
+    def test_bulk_create_security_scans_requires_list(self):
+        response = self.client.post(
+            self.url, self._get_scan(host_ip=self.ip.address), format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
 class VulnerabilityAPITests(RalphAPITestCase):
 
     def setUp(self):
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+from unittest import mock
+
+from django.db import IntegrityError
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from ralph.security.bulk import create_scans, upsert_vulnerabilities
+from ralph.security.models import ScanStatus, SecurityScan, Vulnerability
+from ralph.security.tests.factories import (
+    SecurityScanFactory,
+    VulnerabilityFactory
+)
+
+
+class UpsertVulnerabilitiesTest(TestCase):
+    def _race_with_other_batch(self, names):
+        """
+        Simulate another batch inserting vulnerabilities concurrently - first
+        insert fails and vulnerabilities are visible to locking read.
+        """
+        bulk_create = QuerySet.bulk_create
+        select_for_update = QuerySet.select_for_update
+        state = {'inserted': False}
+
+        def _bulk_create(queryset, objs, *args, **kwargs):
+            if queryset.model is Vulnerability and not state['inserted']:
+                state['inserted'] = True
+                raise IntegrityError('UNIQUE constraint failed')
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        def _select_for_update(queryset, *args, **kwargs):
+            if queryset.model is Vulnerability:
+                for external_id, name in names.items():
+                    VulnerabilityFactory(
+                        external_vulnerability_id=external_id, name=name
+                    )
+                names.clear()
+            return select_for_update(queryset, *args, **kwargs)
+
+        return mock.patch.multiple(
+            QuerySet, bulk_create=_bulk_create,
+            select_for_update=_select_for_update,
+        )
+
+    def test_upsert_retried_when_vulnerability_inserted_concurrently(self):
+        with self._race_with_other_batch({9001: 'other batch'}):
+            ids = upsert_vulnerabilities({
+                9001: {'name': 'vuln 9001'}, 9002: {'name': 'vuln 9002'},
+            })
+        self.assertEqual(
+            ids,
+            dict(Vulnerability.objects.values_list(
+                'external_vulnerability_id', 'pk'
+            ))
+        )
+        self.assertCountEqual(
+            Vulnerability.objects.values_list('name', flat=True),
+            ['vuln 9001', 'vuln 9002']
+        )
+
+    @mock.patch('ralph.security.bulk.UPSERT_ATTEMPTS', 1)
+    def test_upsert_raises_error_when_attempts_exceeded(self):
+        with self._race_with_other_batch({9001: 'other batch'}):
+            with self.assertRaises(IntegrityError):
+                upsert_vulnerabilities({9001: {'name': 'vuln 9001'}})
+        self.assertFalse(Vulnerability.objects.exists())
+
+
+class CreateScansTest(TestCase):
+    def test_create_scans_of_hosts_with_previous_scans(self):
+        previous_scans = [SecurityScanFactory() for _ in range(2)]
+        vulnerability = VulnerabilityFactory()
+        scans = [
+            {
+                'base_object_id': scan.base_object_id,
+                'last_scan_date': scan.last_scan_date,
+                'next_scan_date': scan.next_scan_date,
+                'scan_status': ScanStatus.fail.id,
+                'vulnerabilities': {vulnerability.pk},
+            }
+            for scan in reversed(previous_scans)
+        ]
+        ids = create_scans(scans)
+        created = SecurityScan.objects.in_bulk(ids)
+        self.assertEqual(
+            [created[pk].base_object_id for pk in ids],
+            [scan['base_object_id'] for scan in scans]
+        )
+        for pk in ids:
+            self.assertEqual(created[pk].scan_status, ScanStatus.fail)
+            self.assertEqual(
+                created[pk].vulnerabilities.get(), vulnerability
+            )
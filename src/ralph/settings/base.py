@@ -139,6 +139,12 @@ MEDIA_URL = '/media/'
 MEDIA_ROOT = os.environ.get(
     'MEDIA_ROOT', os.path.join(BASE_DIR, 'var', 'media')
 )
+# md5 checksum of large files (attachments) is calculated while they're
+# streamed to disk
+FILE_UPLOAD_HANDLERS = (
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'ralph.attachments.uploadhandlers.MD5TemporaryFileUploadHandler',
+)
 
 # adapt message's tags to bootstrap
 MESSAGE_TAGS = {
@@ -148,6 +154,53 @@ MESSAGE_TAGS = {
 
 DEFAULT_DEPRECIATION_RATE = int(os.environ.get('DEFAULT_DEPRECIATION_RATE', 25))  # noqa
 CHECK_IP_HOSTNAME_ON_SAVE = True
+# when enabled, hostname of IP address is not resolved on save, but later,
+# by `resolve_ip_hostnames` command (which should be run periodically)
+CHECK_IP_HOSTNAME_DEFERRED = os_env_true('CHECK_IP_HOSTNAME_DEFERRED')
+# DNS lookups timeout (in seconds), number of concurrent lookups and cache
+# timeouts (in seconds) of resolved and not resolved lookups
+DNS_RESOLVER_TIMEOUT = float(os.environ.get('DNS_RESOLVER_TIMEOUT', 2))
+DNS_RESOLVER_WORKERS = int(os.environ.get('DNS_RESOLVER_WORKERS', 10))
+DNS_CACHE_TIMEOUT = int(os.environ.get('DNS_CACHE_TIMEOUT', 3600))
+DNS_NEGATIVE_CACHE_TIMEOUT = int(
+    os.environ.get('DNS_NEGATIVE_CACHE_TIMEOUT', 300)
+)
+# data invalidated by signals is cached at most this long (in seconds) when
+# cache isn't shared between processes (ex. default local memory cache) -
+# invalidation is seen only by the process which made the change, so shared
+# cache (ex. Redis, see `USE_REDIS_CACHE`) is required for longer timeouts
+PROCESS_LOCAL_CACHE_TIMEOUT = int(
+    os.environ.get('PROCESS_LOCAL_CACHE_TIMEOUT', 60)
+)
+# occupancy of data center racks (DC view) is invalidated by signals and
+# calculated again after this timeout (in seconds); limited to
+# `PROCESS_LOCAL_CACHE_TIMEOUT` when cache is not shared
+DC_VIEW_OCCUPANCY_TIMEOUT = int(
+    os.environ.get('DC_VIEW_OCCUPANCY_TIMEOUT', 60 * 60 * 24)
+)
+# subtrees of operation types are cached by every process and calculated
+# again after this timeout (in seconds) to see changes made by other processes
+OPERATION_TYPES_CACHE_TIMEOUT = int(
+    os.environ.get('OPERATION_TYPES_CACHE_TIMEOUT', 60)
+)
+# networks index (used by ex. `Network.from_ip`) is cached by every process
+# and checked (with single query) for changes made by other processes at
+# most every this many seconds
+NETWORK_INDEX_CHECK_INTERVAL = int(
+    os.environ.get('NETWORK_INDEX_CHECK_INTERVAL', 10)
+)
+# number of rows fetched at once (with related objects) during export of
+# objects from admin
+EXPORT_CHUNK_SIZE = int(os.environ.get('EXPORT_CHUNK_SIZE', 1000))
+# results of reports older than this (in seconds) are marked as stale - they
+# should be refreshed (by `refresh_reports` command) periodically
+REPORTS_RESULT_MAX_AGE = int(os.environ.get('REPORTS_RESULT_MAX_AGE', 3600))
+# dashboard counters are kept up to date by signals and calculated again
+# (reconciled) after this timeout (in seconds); limited to
+# `PROCESS_LOCAL_CACHE_TIMEOUT` when cache is not shared
+DASHBOARD_COUNTERS_TIMEOUT = int(
+    os.environ.get('DASHBOARD_COUNTERS_TIMEOUT', 3600)
+)
 ASSET_HOSTNAME_TEMPLATE = {
     'prefix': '{{ country_code|upper }}{{ code|upper }}',
     'postfix': '',
@@ -250,6 +303,16 @@ REDIS_CONNECTION = {
 }
 
 
+# name of RQ queue in which asynchronous transitions are run (by RQ worker);
+# when empty, asynchronous transitions are run synchronously (in-process)
+RALPH_TRANSITIONS_QUEUE = os.environ.get('RALPH_TRANSITIONS_QUEUE', '')
+# number of objects processed (and committed) at once by asynchronous
+# transition - status of job objects is updated after every chunk
+RALPH_TRANSITIONS_JOB_CHUNK_SIZE = int(
+    os.environ.get('RALPH_TRANSITIONS_JOB_CHUNK_SIZE', 100)
+)
+
+
 SENTRY_ENABLED = os_env_true('SENTRY_ENABLED')
 SENTRY_JS_DSN = os.environ.get('SENTRY_JS_DSN', None)
 SENTRY_JS_CONFIG = json.loads(os.environ.get('SENTRY_JS_CONFIG', '{}'))
@@ -1,9 +1,12 @@
 # -*- coding: utf-8 -*-
+import shutil
 import sys
+import tempfile
 from imp import reload
 
 from django.conf import settings
 from django.core.urlresolvers import clear_url_caches
+from django.test.utils import override_settings
 from django.utils.importlib import import_module
 
 from ralph.tests.factories import UserFactory
@@ -21,6 +24,38 @@ class ClientMixin(object):
         return self.client.login(username=user.username, password=password)
 
 
+class TemporaryMediaRootMixin(object):
+    """
+    Use this mixin if tests save files (ex. attachments or report
+    templates) - they are saved in temporary `MEDIA_ROOT`, removed after all
+    tests of the class.
+    """
+    @classmethod
+    def setUpClass(cls):
+        cls._media_root = tempfile.mkdtemp()
+        cls._media_root_override = override_settings(
+            MEDIA_ROOT=cls._media_root
+        )
+        cls._media_root_override.enable()
+        try:
+            super().setUpClass()
+        except Exception:
+            cls._remove_media_root()
+            raise
+
+    @classmethod
+    def tearDownClass(cls):
+        try:
+            super().tearDownClass()
+        finally:
+            cls._remove_media_root()
+
+    @classmethod
+    def _remove_media_root(cls):
+        cls._media_root_override.disable()
+        shutil.rmtree(cls._media_root, ignore_errors=True)
+
+
 class ReloadUrlsMixin(object):
     """
     Use this mixin if you register dynamically models to admin.
@@ -68,8 +68,10 @@ class Order(
         choices=OrderStatus(),
     )
 
+    transition_bulk_update_fields = ('status',)
+
     @classmethod
-    @transition_action(return_attachment=True)
+    @transition_action(return_attachment=True, modifies_instances=False)
     def pack(cls, instances, request, **kwargs):
         path = os.path.join(tempfile.gettempdir(), 'test.txt')
         with open(path, 'w') as f:
@@ -83,10 +85,16 @@ class Order(
         return_attachment=True,
         verbose_name='Go to post office',
         run_after=['pack'],
+        modifies_instances=False,
     )
     def go_to_post_office(cls, instances, **kwargs):
         pass
 
+    @classmethod
+    @transition_action(modifies_instances=False)
+    def send_notification(cls, instances, **kwargs):
+        pass
+
     @classmethod
     @transition_action(
         return_attachment=False,
@@ -13,6 +13,7 @@ api_urls = list(map(lambda u: url(r'^', include(u)), [
     'ralph.back_office.api',
     'ralph.data_center.api.routers',
     'ralph.dc_view.urls.api',
+    'ralph.lib.transitions.api',
     'ralph.supports.api',
     'ralph.security.api',
     'ralph.virtual.api',
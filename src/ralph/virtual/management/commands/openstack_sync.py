@@ -2,6 +2,7 @@
 import logging
 import re
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from functools import lru_cache
 
@@ -10,7 +11,10 @@ from django.conf import settings
 from django.core.exceptions import ObjectDoesNotExist
 from django.core.management.base import BaseCommand
 from django.db import transaction
+from django.db.models import Case, DateTimeField, Value, When
 
+from ralph.assets.models.base import BaseObject
+from ralph.data_center.models.networks import reconcile_ip_addresses
 from ralph.data_center.models.physical import DataCenterAsset
 from ralph.virtual.models import (
     CloudFlavor,
@@ -43,13 +47,57 @@ class EmptyListError(Exception):
         repr(self.value)
 
 
+# status of deleted server (returned by nova only in `changes-since` mode)
+DELETED_STATUS = 'DELETED'
+
+
 class Command(BaseCommand):
+    help = (
+        'Synchronize OpenStack projects, flavors and instances with Ralph. '
+        'Sites are fetched concurrently; when --changes-since is passed, only '
+        'servers changed (or deleted) since then are synchronized.'
+    )
+
     def __init__(self):
         super().__init__()
         self.DATETIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
         self.summary = defaultdict(int)
         self.openstack_projects = {}
         self.openstack_flavors = {}
+        # ids of servers deleted in openstack (in `changes-since` mode)
+        self.deleted_servers = set()
+        # the latest `updated` timestamp of synced servers
+        self.latest_update = None
+        self.hypervisors = {}
+        # IP addresses of servers in currently processed batch
+        self.ip_assignments = {}
+        self.changes_since = None
+        self.threads = 4
+        self.batch_size = 500
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--changes-since',
+            dest='changes_since',
+            default=None,
+            help=(
+                'synchronize only servers changed since given timestamp '
+                '(ex. 2016-01-01T00:00:00Z)'
+            ),
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=self.threads,
+            help='number of OpenStack sites fetched concurrently',
+        )
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            type=int,
+            default=self.batch_size,
+            help='number of servers saved in single transaction (revision)',
+        )
 
     @staticmethod
     def _get_novaclient_connection(site):
@@ -63,13 +111,18 @@ class Command(BaseCommand):
         return nt
 
     @staticmethod
-    def _get_servers_list(nt, site):
+    def _get_servers_list(nt, site, changes_since=None):
         """
         Returns list of servers for a project.
         :parm site: novaclient connection
+        :param changes_since: fetch only servers changed since this timestamp
+            (including deleted servers)
         """
         servers = []
         marker = None
+        search_opts = {'all_tenants': True}
+        if changes_since:
+            search_opts['changes-since'] = changes_since
         logger.info('Fetching servers list from {}'.format(site['tag']))
         while True:
             try:
@@ -77,7 +130,7 @@ class Command(BaseCommand):
                     'Fetching servers with marker {}'.format(marker)
                 )
                 servers_part = nt.servers.list(
-                    search_opts={'all_tenants': True},
+                    search_opts=search_opts,
                     limit=1000,
                     marker=marker,
                 )
@@ -87,7 +140,8 @@ class Command(BaseCommand):
                 break
 
         servers = list(map(lambda server: server.__dict__, servers))
-        if len(servers) == 0:
+        # there could be no changes since last sync
+        if len(servers) == 0 and not changes_since:
             raise EmptyListError(
                 'Got an empty list of instances from {}'.format(
                     site['auth_url']
@@ -131,10 +185,10 @@ class Command(BaseCommand):
             )
         return flavors
 
-    def _update_projects(self, site):
+    @staticmethod
+    def _get_keystone_projects(site):
         """
-        Returns a map tenant_id->tenant_name
-        :rtype: dict
+        Returns list of (tenant_id, tenant_name) of site
         """
         keystone_client = ks.Client(
             username=site['username'],
@@ -142,78 +196,120 @@ class Command(BaseCommand):
             tenant_name=site['tenant_name'],
             auth_url=site['auth_url'],
         )
+        return [
+            (project.id, project.name)
+            for project in keystone_client.tenants.list()
+        ]
+
+    def _fetch_site(self, site):
+        """
+        Fetch projects, flavors and servers of single OpenStack site.
 
-        for project in keystone_client.tenants.list():
-            if project.id not in self.openstack_projects:
-                self.openstack_projects[project.id] = {
-                    'name': project.name,
+        It's called in worker thread, so it must not touch the database.
+        """
+        logger.info('Processing {} ({})'.format(
+            site['auth_url'], site['tag']
+        ))
+        nt = self._get_novaclient_connection(site)
+        flavors = self._get_flavors_list(nt, site)
+        servers = self._get_servers_list(nt, site, self.changes_since)
+        flavors_ids = {flavor['id'] for flavor in flavors}
+        for server in servers:
+            if server.get('status') == DELETED_STATUS:
+                continue
+            server['image_name'] = self._get_image_name(
+                nt, server['image']['id']
+            ) if server['image'] else None
+            flavor_id = server['flavor']['id']
+            if flavor_id not in flavors_ids:
+                logger.warning((
+                    'Flavor {} (found in host {}) not in flavors list.'
+                    ' Fetching it'
+                ).format(flavor_id, server['id']))
+                flavors.append(nt.flavors.get(flavor_id).__dict__)
+                flavors_ids.add(flavor_id)
+        return {
+            'projects': self._get_keystone_projects(site),
+            'flavors': flavors,
+            'servers': servers,
+        }
+
+    def _update_projects(self, site, projects):
+        """
+        Update map tenant_id->tenant_name with projects of site
+        """
+        for project_id, project_name in projects:
+            if project_id not in self.openstack_projects:
+                self.openstack_projects[project_id] = {
+                    'name': project_name,
                     'servers': {},
                     'tags': []
                 }
-            self.openstack_projects[project.id]['tags'].append(site['tag'])
+            self.openstack_projects[project_id]['tags'].append(site['tag'])
+
+    def _add_openstack_flavor(self, site, flavor):
+        self.openstack_flavors[flavor['id']] = {
+            'name': flavor['name'],
+            'cores': flavor['vcpus'],
+            'memory': flavor['ram'],
+            'disk': flavor['disk'] * 1024,
+            'tag': site['tag'],
+        }
+
+    def _add_openstack_server(self, site, server):
+        project_id = server['tenant_id']
+        host_id = server['id']
+        if server.get('updated'):
+            self.latest_update = max(
+                self.latest_update or server['updated'], server['updated']
+            )
+        if server.get('status') == DELETED_STATUS:
+            self.deleted_servers.add(host_id)
+            return
+        new_server = {
+            'hostname': server['name'],
+            'id': server['id'],
+            'flavor_id': server['flavor']['id'],
+            'tag': site['tag'],
+            'ips': [],
+            'created': server['created'],
+            'hypervisor': server['OS-EXT-SRV-ATTR:hypervisor_hostname'],
+            'image': server['image_name'],
+        }
+        for zone in server['addresses']:
+            if (
+                'network_regex' in site and
+                not re.match(site['network_regex'], zone)
+            ):
+                continue
+            for ip in server['addresses'][zone]:
+                new_server['ips'].append(ip['addr'])
+        try:
+            self.openstack_projects[project_id]['servers'][host_id] = (
+                new_server
+            )
+        except KeyError:
+            logger.error('Project {} not found for server {}'.format(
+                project_id, host_id,
+            ))
 
     def _process_openstack_instances(self):
-        for site in settings.OPENSTACK_INSTANCES:
-            logger.info('Processing {} ({})'.format(
-                site['auth_url'], site['tag']
-            ))
-            nt = self._get_novaclient_connection(site)
-            self._update_projects(site)
-
-            def _add_flavor(flavor):
-                flavor_id = flavor['id']
-                new_flavor = {
-                    'name': flavor['name'],
-                    'cores': flavor['vcpus'],
-                    'memory': flavor['ram'],
-                    'disk': flavor['disk'] * 1024,
-                    'tag': site['tag'],
-                }
-                self.openstack_flavors[flavor_id] = new_flavor
-
-            for flavor in self._get_flavors_list(nt, site):
-                _add_flavor(flavor)
-
-            for server in self._get_servers_list(nt, site):
-                project_id = server['tenant_id']
-                host_id = server['id']
-                image_name = self._get_image_name(
-                    nt, server['image']['id']
-                ) if server['image'] else None
-                flavor_id = server['flavor']['id']
-                new_server = {
-                    'hostname': server['name'],
-                    'id': server['id'],
-                    'flavor_id': flavor_id,
-                    'tag': site['tag'],
-                    'ips': [],
-                    'created': server['created'],
-                    'hypervisor': server['OS-EXT-SRV-ATTR:hypervisor_hostname'],
-                    'image': image_name,
-                }
-                for zone in server['addresses']:
-                    if (
-                        'network_regex' in site and
-                        not re.match(site['network_regex'], zone)
-                    ):
-                        continue
-                    for ip in server['addresses'][zone]:
-                        new_server['ips'].append(ip['addr'])
-                try:
-                    self.openstack_projects[project_id]['servers'][host_id] = (
-                        new_server
-                    )
-                except KeyError:
-                    logger.error('Project {} not found for server {}'.format(
-                        project_id, host_id,
-                    ))
-
-                if flavor_id not in self.openstack_flavors:
-                    logger.warning((
-                        'Flavor {} (found in host {}) not in flavors list.'
-                        ' Fetching it'
-                    ).format(flavor_id, host_id))
-                    _add_flavor(nt.flavors.get(flavor_id).__dict__)
+        """
+        Fetch data of all OpenStack sites (concurrently) and merge it
+        (in order of sites in settings).
+        """
+        sites = settings.OPENSTACK_INSTANCES
+        if not sites:
+            return
+        with ThreadPoolExecutor(
+            max_workers=max(1, min(self.threads, len(sites)))
+        ) as executor:
+            for site, data in zip(sites, executor.map(self._fetch_site, sites)):
+                self._update_projects(site, data['projects'])
+                for flavor in data['flavors']:
+                    self._add_openstack_flavor(site, flavor)
+                for server in data['servers']:
+                    self._add_openstack_server(site, server)
 
     def _get_cloud_provider(self):
         """Get or create cloud provider object"""
@@ -235,60 +331,77 @@ class Command(BaseCommand):
             project_id = project.project_id
             self.ralph_projects[project_id] = {
                 'name': project.name,
-                'servers': {},
-                'tags': project.tags.names(),
-            }
-
-        for server in CloudHost.objects.filter(
-            parent__in=projects
-        ).select_related(
-            'hypervisor', 'parent', 'parent__cloudproject',
-        ).prefetch_related(
-            'ipaddress_set', 'tags'
-        ):
-            new_server = {
-                'hostname': server.hostname,
-                'hypervisor': server.hypervisor,
-                'tags': server.tags.names(),
-                'ips': [ip.address for ip in server.ipaddress_set.all()],
-                'host_id': server.host_id,
+                # tags are prefetched (`names()` would query the database)
+                'tags': [tag.name for tag in project.tags.all()],
             }
-            host_id = server.host_id
-            project_id = server.parent.cloudproject.project_id
-            self.ralph_projects[project_id]['servers'][host_id] = new_server
 
-        for flavor in CloudFlavor.objects.filter(
-            cloudprovider=self.cloud_provider
+        # index of all hosts by host id - servers are compared against it,
+        # without querying the database for every server
+        self.ralph_hosts = {
+            server.host_id: server
+            for server in CloudHost.objects.filter(
+                parent__in=projects
+            ).select_related(
+                'hypervisor', 'parent', 'parent__cloudproject',
+            ).prefetch_related(
+                'ipaddress_set', 'tags'
+            )
+        }
+
+        # index of all flavors by flavor id (flavor id is unique)
+        self.flavors = {
+            flavor.flavor_id: flavor
+            for flavor in CloudFlavor.objects.all()
+        }
+        for flavor_id, flavor in self.flavors.items():
+            if flavor.cloudprovider_id == self.cloud_provider.id:
+                self.ralph_flavors[flavor_id] = {'name': flavor.name}
+
+    def _load_hypervisors(self, host_names):
+        """
+        Fetch (using single query) hypervisors which are not in hypervisors
+        index yet.
+        """
+        missing = set(host_names) - self.hypervisors.keys()
+        if not missing:
+            return
+        self.hypervisors.update({host_name: None for host_name in missing})
+        for hypervisor in DataCenterAsset.objects.filter(
+            hostname__in=missing
         ):
-            self.ralph_flavors[flavor.flavor_id] = {'name': flavor.name}
+            self.hypervisors[hypervisor.hostname] = hypervisor
 
-    @staticmethod
-    def _get_hypervisor(host_name, server_id):
+    def _get_hypervisor(self, host_name, server_id):
         """get or None for CloudHost hypervisor"""
-        try:
-            obj = DataCenterAsset.objects.get(hostname=host_name)
-            return obj
-        except ObjectDoesNotExist:
+        self._load_hypervisors([host_name])
+        hypervisor = self.hypervisors[host_name]
+        if hypervisor is None:
             logger.error('Hypervisor {} not found for {}'.format(
                 host_name, server_id,
             ))
-            return None
+        return hypervisor
 
-    @lru_cache()
-    def _get_flavors(self):
-        return {fl.flavor_id: fl for fl in CloudFlavor.objects.all()}
-
-    def _add_server(self, openstack_server, server_id, project):
-        """add new server to ralph"""
+    def _get_flavor(self, openstack_server):
         try:
-            flavor = self._get_flavors()[openstack_server['flavor_id']]
+            return self.flavors[openstack_server['flavor_id']]
         except KeyError:
             logger.error(
                 'Flavor {} not found for host {}'.format(
                     openstack_server['flavor_id'], openstack_server
                 )
             )
-            return
+            return None
+
+    def _add_server(self, openstack_server, server_id, project):
+        """
+        Add new server to ralph.
+
+        Should be called inside revision (server is saved without creating
+        separated revision).
+        """
+        flavor = self._get_flavor(openstack_server)
+        if flavor is None:
+            return None
         logger.info('Creating new server {} ({})'.format(
             server_id, openstack_server['hostname']
         ))
@@ -303,112 +416,150 @@ class Command(BaseCommand):
             cloudprovider=self.cloud_provider,
             image_name=openstack_server['image'],
         )
-
-        # workaround - created field has auto_now_add attribute
         new_server.save()
-        new_server.created = datetime.strptime(openstack_server['created'],
-                                               self.DATETIME_FORMAT)
-        self._save_object(new_server, 'add server %s'
-                          % new_server.hostname)
-
+        # created field has auto_now_add attribute - it's updated in the
+        # database for all servers in batch at once (see `_update_created`)
+        new_server.created = datetime.strptime(
+            openstack_server['created'], self.DATETIME_FORMAT
+        )
         new_server.tags.add(openstack_server['tag'])
-        with transaction.atomic(), revisions.create_revision():
-            new_server.ip_addresses = openstack_server['ips']
-            revisions.set_comment('Assign ip addresses to a host')
+        self.ip_assignments[new_server] = openstack_server['ips']
+        self.ralph_hosts[server_id] = new_server
+        return new_server
 
-    def _update_server(self, openstack_server, server_id, ralph_server):
-        """Compare and apply changes to a CloudHost"""
-        modified = False
-        obj = CloudHost.objects.get(host_id=server_id)
-        try:
-            flavor = self._get_flavors()[openstack_server['flavor_id']]
-        except KeyError:
-            logger.error(
-                'Flavor {} not found for host {}'.format(
-                    openstack_server['flavor_id'], openstack_server
-                )
-            )
+    @staticmethod
+    def _update_created(servers):
+        """
+        Set created date of servers using single query.
+        """
+        if not servers:
             return
+        BaseObject.objects.filter(
+            pk__in=[server.pk for server in servers]
+        ).update(created=Case(
+            *[
+                When(pk=server.pk, then=Value(server.created))
+                for server in servers
+            ],
+            output_field=DateTimeField()
+        ))
 
-        if obj.hostname != openstack_server['hostname']:
-            logger.info('Updating hostname ({}) for {}'.format(
-                openstack_server['hostname'], server_id
-            ))
-            obj.hostname = openstack_server['hostname']
-            self._save_object(obj, 'Modify hostname')
-            modified = True
-
-        if obj.cloudflavor != flavor:
-            logger.info('Updating flavor ({}) for {}'.format(
-                flavor, server_id
-            ))
-            obj.cloudflavor = flavor
-            self._save_object(obj, 'Modify cloudflavor')
-            modified = True
-
-        hypervisor = self._get_hypervisor(
-            openstack_server['hypervisor'], server_id
-        )
-        if obj.hypervisor != hypervisor:
-            logger.info('Updating hypervisor ({}) for {}'.format(
-                hypervisor, server_id
-            ))
-            obj.hypervisor = hypervisor
-            self._save_object(obj, 'Modify hypervisor')
-            modified = True
+    def _assign_ip_addresses(self):
+        """
+        Assign IP addresses to all servers of the batch at once.
+        """
+        result = reconcile_ip_addresses(self.ip_assignments)
+        hostnames = {
+            server.pk: server.hostname for server in self.ip_assignments
+        }
+        for conflict in result.conflicts:
+            logger.warning((
+                'Cannot assign IP {} to {} - it is already in use by '
+                'another asset'
+            ).format(conflict.address, hostnames[conflict.base_object_id]))
+
+    def _update_server(self, openstack_server, obj, project):
+        """
+        Compare and apply changes to a CloudHost.
 
-        if obj.image_name != openstack_server['image']:
-            logger.info('Updating image ({}) for {}'.format(
-                openstack_server['image'], server_id
+        Should be called inside revision (server is saved without creating
+        separated revision).
+        """
+        flavor = self._get_flavor(openstack_server)
+        if flavor is None:
+            return False
+        server_id = obj.host_id
+        changes = {
+            'hostname': openstack_server['hostname'],
+            'cloudflavor': flavor,
+            'hypervisor': self._get_hypervisor(
+                openstack_server['hypervisor'], server_id
+            ),
+            'image_name': openstack_server['image'],
+        }
+        update_fields = []
+        for field, value in changes.items():
+            if getattr(obj, field) != value:
+                logger.info('Updating {} ({}) for {}'.format(
+                    field, value, server_id
+                ))
+                setattr(obj, field, value)
+                update_fields.append(field)
+        # server could be moved to another project (parent is BaseObject, so
+        # it's compared by id)
+        if obj.parent_id != project.pk:
+            logger.info('Updating project ({}) for {}'.format(
+                project, server_id
             ))
-            obj.image_name = openstack_server['image']
-            self._save_object(obj, 'Updated image info')
-            modified = True
+            obj.parent = project
+            update_fields.extend(['parent', 'service_env'])
+        if update_fields:
+            obj.save(update_fields=update_fields)
 
-        if openstack_server['tag'] not in ralph_server['tags']:
+        if openstack_server['tag'] not in [tag.name for tag in obj.tags.all()]:
             obj.tags.add(openstack_server['tag'])
 
-        # add/remove IPs
-        if set(openstack_server['ips']) != set(ralph_server['ips']):
-            modified = True
-            with transaction.atomic(), revisions.create_revision():
-                obj.ip_addresses = openstack_server['ips']
-                revisions.set_comment('Assign ip addresses to a host')
+        # add/remove IPs (assigned for the whole batch at once)
+        if set(openstack_server['ips']) != set(obj.ip_addresses):
+            update_fields.append('ip_addresses')
+            self.ip_assignments[obj] = openstack_server['ips']
 
-        return modified
+        return bool(update_fields)
 
     def _process_servers(self, servers, project):
-        """Add/modify/remove servers within project"""
-        for server_id, server in servers.items():
-            try:
-                ralph_server = (
-                    self.ralph_projects[project.project_id]['servers'][server_id]  # noqa
-                )
-            except KeyError:
-                self._add_server(server, server_id, project)
-                self.summary['new_instances'] += 1
-            else:
-                modified = self._update_server(
-                    server,
-                    server_id,
-                    ralph_server,
+        """
+        Add/modify servers within project.
+
+        Servers are saved in batches - every batch in single transaction and
+        single revision.
+        """
+        self._load_hypervisors(
+            server['hypervisor'] for server in servers.values()
+        )
+        servers = list(servers.items())
+        for index in range(0, len(servers), self.batch_size):
+            created = []
+            self.ip_assignments = {}
+            with transaction.atomic(), revisions.create_revision():
+                for server_id, server in servers[index:index + self.batch_size]:
+                    obj = self.ralph_hosts.get(server_id)
+                    if obj is None:
+                        obj = self._add_server(server, server_id, project)
+                        if obj is not None:
+                            created.append(obj)
+                            self.summary['new_instances'] += 1
+                    elif self._update_server(server, obj, project):
+                        self.summary['mod_instances'] += 1
+                    self.summary['total_instances'] += 1
+                self._update_created(created)
+                self._assign_ip_addresses()
+                revisions.set_comment(
+                    'openstack_sync: servers of {}'.format(project.name)
                 )
-                if modified:
-                    self.summary['mod_instances'] += 1
-            self.summary['total_instances'] += 1
-        self._cleanup_servers(servers, project.project_id)
 
-    def _cleanup_servers(self, servers, project_id):
-        """Remove servers which no longer exists in openstack project"""
-        try:
-            for server_id in (
-                self.ralph_projects[project_id]['servers'].keys(
-                ) - servers.keys()
-            ):
-                self._delete_object(CloudHost.objects.get(host_id=server_id))
-                self.summary['del_instances'] += 1
-        except KeyError:
-            pass
+    def _cleanup_servers(self):
+        """
+        Remove servers which no longer exists in openstack.
+
+        In `changes-since` mode only servers reported as deleted are removed
+        (other servers are not fetched from openstack).
+        """
+        if self.changes_since:
+            to_delete = self.deleted_servers & self.ralph_hosts.keys()
+        else:
+            to_delete = self.ralph_hosts.keys() - {
+                server_id
+                for project in self.openstack_projects.values()
+                for server_id in project['servers']
+            }
+        to_delete = sorted(to_delete)
+        for index in range(0, len(to_delete), self.batch_size):
+            batch = to_delete[index:index + self.batch_size]
+            logger.warning('Deleting servers {}'.format(', '.join(batch)))
+            with transaction.atomic(), revisions.create_revision():
+                CloudHost.objects.filter(host_id__in=batch).delete()
+                revisions.set_comment('openstack_sync::_cleanup_servers')
+            self.summary['del_instances'] += len(batch)
 
     def _add_project(self, data, project_id):
         """Add/modify project in ralph"""
@@ -441,7 +592,8 @@ class Command(BaseCommand):
 
     def _add_flavor(self, flavor, flavor_id):
         """Add/modify flavor in ralph"""
-        if flavor_id not in self.ralph_flavors:
+        obj = self.flavors.get(flavor_id)
+        if obj is None:
             new_flavor = CloudFlavor(
                 name=flavor['name'],
                 flavor_id=flavor_id,
@@ -451,12 +603,12 @@ class Command(BaseCommand):
             new_flavor.tags.add(flavor['tag'])
             for component in ['cores', 'memory', 'disk']:
                 setattr(new_flavor, component, flavor[component])
+            self.flavors[flavor_id] = new_flavor
 
             self.summary['new_flavors'] += 1
         else:
             mod = False
-            obj = CloudFlavor.objects.get(flavor_id=flavor_id)
-            if self.ralph_flavors[flavor_id]['name'] != flavor['name']:
+            if obj.name != flavor['name']:
                 obj.name = flavor['name']
                 self._save_object(obj, 'Change name')
                 mod = True
@@ -488,14 +640,16 @@ class Command(BaseCommand):
 
     def _cleanup(self):
         """
-        Remove all projects and flavors that doesn't exist in openstack from
-        ralph
+        Remove all servers, projects and flavors that doesn't exist in
+        openstack from ralph
         """
+        self._cleanup_servers()
         for project_id in (set(self.ralph_projects.keys()) - set(
             self.openstack_projects.keys())
         ):
             self._delete_object(CloudProject.objects.get(
                 project_id=project_id))
+            self.summary['del_projects'] += 1
 
         for del_flavor in (
                 set(self.ralph_flavors) - set(self.openstack_flavors)):
@@ -535,7 +689,11 @@ class Command(BaseCommand):
         New flavors:        {new_flavors}
         Modified flavors:   {mod_flavors}
         Deleted flavors:    {del_flavors}
-        Total flavors:      {total_flavors}""".format(**self.summary)
+        Total flavors:      {total_flavors}""".format_map(self.summary)
+        if self.latest_update:
+            msg += """
+
+        Latest server update: {}""".format(self.latest_update)
 
         self.stdout.write(msg)
         logger.info(msg)
@@ -550,6 +708,9 @@ class Command(BaseCommand):
         if not hasattr(settings, 'OPENSTACK_INSTANCES'):
             logger.error('Nothing to sync')
             return
+        self.changes_since = options.get('changes_since')
+        self.threads = options.get('threads') or self.threads
+        self.batch_size = options.get('batch_size') or self.batch_size
         self.stdout.write("syncing...")
         self._get_cloud_provider()
         self._process_openstack_instances()
@@ -10,7 +10,7 @@ from ralph.admin.helpers import get_value_by_relation_path
 from ralph.assets.models.base import BaseObject
 from ralph.assets.models.choices import ComponentType
 from ralph.assets.models.components import Component, ComponentModel
-from ralph.data_center.models.networks import IPAddress
+from ralph.data_center.models.networks import reconcile_ip_addresses
 from ralph.data_center.models.physical import DataCenterAsset
 from ralph.lib.mixins.models import NamedMixin
 
@@ -164,25 +164,16 @@ class CloudHost(BaseObject):
     def ip_addresses(self, value):
         if set(self.ip_addresses) == set(value):
             return
-        for ip in set(value)-set(self.ip_addresses):
-            try:
-                new_ip = IPAddress.objects.get(address=ip)
-                if new_ip.base_object is None:
-                    new_ip.base_object = self
-                    new_ip.save()
-                else:
-                    logger.warning((
-                        'Cannot assign IP %s to %s - it is already in use by '
-                        'another asset'
-                    ) % (ip, self.hostname))
-            except ObjectDoesNotExist:
-                new_ip = IPAddress(base_object=self, address=ip)
-                new_ip.save()
-
-        for ip in set(self.ip_addresses) - set(value):
-            release_ip = IPAddress.objects.get(base_object=self, address=ip)
-            release_ip.base_object = None
-            release_ip.save()
+        result = reconcile_ip_addresses({self: value})
+        for conflict in result.conflicts:
+            logger.warning((
+                'Cannot assign IP %s to %s - it is already in use by '
+                'another asset'
+            ) % (conflict.address, self.hostname))
+        # addresses could be prefetched
+        getattr(self, '_prefetched_objects_cache', {}).pop(
+            'ipaddress_set', None
+        )
 
     @property
     def cloudproject(self):
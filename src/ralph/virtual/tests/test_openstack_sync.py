@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
 from datetime import datetime
+from io import StringIO
+from unittest import mock
 
 from django.core.exceptions import ObjectDoesNotExist
+from django.core.management import call_command
+from django.test import override_settings
 
 from ralph.assets.models.components import ComponentModel
 from ralph.assets.tests.factories import DataCenterAssetModelFactory
@@ -145,3 +149,182 @@ class TestOpenstackSync(RalphTestCase):
         )
         ip = IPAddress.objects.get(address='2.2.3.4')
         self.assertEqual(ip.base_object, None)
+
+
+class FakeResource(object):
+    def __init__(self, **kwargs):
+        self.__dict__.update(kwargs)
+
+
+class FakeServersManager(object):
+    def __init__(self, servers):
+        self.servers = servers
+        self.search_opts = []
+
+    def list(self, search_opts, limit, marker):
+        self.search_opts.append(search_opts)
+        servers = self.servers
+        if 'changes-since' in search_opts:
+            servers = [
+                server for server in servers
+                if server.updated >= search_opts['changes-since']
+            ]
+        if marker:
+            ids = [server.id for server in servers]
+            servers = servers[ids.index(marker) + 1:]
+        return servers[:limit]
+
+
+class FakeFlavorsManager(object):
+    def __init__(self, flavors):
+        self.flavors = flavors
+
+    def list(self, is_public):
+        return self.flavors if is_public else []
+
+    def get(self, flavor_id):
+        return FakeResource(
+            id=flavor_id, name=flavor_id, vcpus=1, ram=512, disk=1
+        )
+
+
+class FakeImagesManager(object):
+    def list(self):
+        return [FakeResource(id='image1', name='Ubuntu 14.04')]
+
+
+class FakeNovaClient(object):
+    def __init__(self, servers, flavors):
+        self.servers = FakeServersManager(servers)
+        self.flavors = FakeFlavorsManager(flavors)
+        self.images = FakeImagesManager()
+
+
+def _fake_server(server_id, tenant_id, updated, status='ACTIVE', **kwargs):
+    server = {
+        'id': server_id,
+        'name': server_id,
+        'tenant_id': tenant_id,
+        'image': {'id': 'image1'},
+        'flavor': {'id': 'flavor1'},
+        'created': '2016-01-01T10:00:00Z',
+        'updated': updated,
+        'status': status,
+        'OS-EXT-SRV-ATTR:hypervisor_hostname': 'hypervisor1.dcn.net',
+        'addresses': {'private': [{'addr': kwargs.pop('ip', '10.0.0.1')}]},
+    }
+    server.update(kwargs)
+    return FakeResource(**server)
+
+
+OPENSTACK_SITES = [
+    {'tag': 'site1', 'auth_url': 'http://site1'},
+    {'tag': 'site2', 'auth_url': 'http://site2'},
+]
+
+
+@override_settings(OPENSTACK_INSTANCES=OPENSTACK_SITES)
+@mock.patch(
+    'ralph.virtual.management.commands.openstack_sync.nova_client_exists',
+    True
+)
+@mock.patch(
+    'ralph.virtual.management.commands.openstack_sync.keystone_client_exists',
+    True
+)
+class TestOpenstackSyncCommand(RalphTestCase):
+    def setUp(self):
+        self.hypervisor = DataCenterAsset.objects.create(
+            hostname='hypervisor1.dcn.net',
+            model=DataCenterAssetModelFactory(),
+        )
+        flavor = FakeResource(
+            id='flavor1', name='m1', vcpus=2, ram=1024, disk=10
+        )
+        self.clients = {
+            'site1': FakeNovaClient([
+                _fake_server(
+                    'server1', 'tenant1', '2016-01-02T00:00:00Z',
+                    ip='10.0.0.1'
+                ),
+                _fake_server(
+                    'server2', 'tenant1', '2016-01-02T00:00:00Z',
+                    ip='10.0.0.2'
+                ),
+            ], [flavor]),
+            'site2': FakeNovaClient([
+                _fake_server(
+                    'server3', 'tenant2', '2016-01-03T00:00:00Z',
+                    ip='10.0.0.3'
+                ),
+            ], [flavor]),
+        }
+        self.projects = {
+            'site1': [('tenant1', 'project1')],
+            'site2': [('tenant2', 'project2')],
+        }
+
+    def _sync(self, **options):
+        with mock.patch.object(
+            Command, '_get_novaclient_connection',
+            side_effect=lambda site: self.clients[site['tag']]
+        ), mock.patch.object(
+            Command, '_get_keystone_projects',
+            side_effect=lambda site: self.projects[site['tag']]
+        ):
+            call_command('openstack_sync', stdout=StringIO(), **options)
+
+    def test_sync_all_sites(self):
+        self._sync(batch_size=1)
+
+        self.assertEqual(
+            set(CloudProject.objects.values_list('project_id', flat=True)),
+            {'tenant1', 'tenant2'}
+        )
+        self.assertEqual(CloudHost.objects.count(), 3)
+        host = CloudHost.objects.get(host_id='server3')
+        self.assertEqual(host.parent.cloudproject.project_id, 'tenant2')
+        self.assertEqual(host.hypervisor, self.hypervisor)
+        self.assertEqual(host.image_name, 'Ubuntu 14.04')
+        self.assertEqual(host.ip_addresses, ['10.0.0.3'])
+        self.assertEqual(list(host.tags.names()), ['site2'])
+        self.assertEqual(host.created, datetime(2016, 1, 1, 10, 0))
+        self.assertEqual(
+            CloudFlavor.objects.get(flavor_id='flavor1').cores, 2
+        )
+
+    def test_sync_removes_not_existing_servers(self):
+        self._sync()
+        self.clients['site1'].servers.servers.pop()
+        self._sync()
+
+        self.assertFalse(CloudHost.objects.filter(host_id='server2').exists())
+        self.assertEqual(
+            IPAddress.objects.get(address='10.0.0.2').base_object, None
+        )
+
+    def test_sync_changes_since(self):
+        self._sync()
+        servers = self.clients['site1'].servers
+        servers.servers = [
+            _fake_server(
+                'server1', 'tenant1', '2016-02-01T00:00:00Z',
+                name='renamed', ip='10.0.0.11'
+            ),
+            _fake_server(
+                'server2', 'tenant1', '2016-02-01T00:00:00Z',
+                status='DELETED'
+            ),
+        ]
+        self.clients['site2'].servers.servers = []
+        self._sync(changes_since='2016-01-15T00:00:00Z')
+
+        self.assertEqual(
+            servers.search_opts[-1]['changes-since'], '2016-01-15T00:00:00Z'
+        )
+        host = CloudHost.objects.get(host_id='server1')
+        self.assertEqual(host.hostname, 'renamed')
+        self.assertEqual(host.ip_addresses, ['10.0.0.11'])
+        self.assertFalse(CloudHost.objects.filter(host_id='server2').exists())
+        # not changed servers are not removed
+        self.assertTrue(CloudHost.objects.filter(host_id='server3').exists())